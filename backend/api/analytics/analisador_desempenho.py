@@ -1,5 +1,12 @@
+from django.db import transaction
 from django.utils import timezone
-from ..utils.metricas_projeto import calcular_metricas_projeto
+from ..models import AnaliseProjeto, Project
+from ..utils.metricas_projeto import calcular_metricas_projeto, contexto_metricas
+from .regras_desempenho import (
+    DIAS_PRESSAO, FAIXAS_STATUS, PONTOS_ATRASADAS, PONTOS_PRESSAO, PONTOS_SPI, PROBABILIDADE_MAXIMA,
+    STATUS_CRITICO, STATUS_PRAZO_VENCIDO, TAXA_CONCLUIDO, TAXA_PRESSAO, analise_concluida,
+)
+from .sistema_sugestoes import SistemaSugestoes
 
 class AnalisadorDesempenho:
     """
@@ -13,66 +20,35 @@ class AnalisadorDesempenho:
         """
         Analisa a situação atual do projeto baseado em múltiplas métricas
         """
-        metricas = calcular_metricas_projeto(projeto.id)
+        metricas = calcular_metricas_projeto(projeto)
         if not metricas:
             return {'erro': 'Não foi possível calcular métricas'}
             
         # ✅ VERIFICAR SE PROJETO ESTÁ FINALIZADO
-        if metricas['taxa_conclusao'] >= 99.9:
-            return {
-                'status': "CONCLUÍDO",
-                'cor': "verde",
-                'explicacao': "🎉 Projeto finalizado com sucesso! Parabéns pela conclusão!",
-                'spi': 1.0,
-                'sv': 0,
-                'tcpi': 1.0,
-                'eac': metricas['total_dias'],
-                'vac': 0,
-                'dias_restantes': 0,
-                'tarefas_atrasadas': 0,
-                'tarefas_pendentes': 0, 
-                'taxa_conclusao': 100,
-                'total_tarefas': metricas['total_tarefas'],
-                'tarefas_concluidas': metricas['tarefas_concluidas']
-            }
+        if metricas['taxa_conclusao'] >= TAXA_CONCLUIDO:
+            return analise_concluida(metricas['total_dias'], metricas['total_tarefas'], metricas['tarefas_concluidas'])
         
         spi = metricas['spi']
         tarefas_atrasadas = metricas['tarefas_atrasadas']
         projeto_atrasado = metricas['projeto_atrasado']
-        taxa_conclusao = metricas['taxa_conclusao']
         
         # ✅ LÓGICA CONSISTENTE: Projeto atrasado SEMPRE tem status crítico
         if projeto_atrasado and metricas['tarefas_pendentes'] > 0:
-            status = "ATRASO CRÍTICO"
-            cor = "vermelho"
-            explicacao = f"⚠️ PROJETO ATRASADO! {metricas['tarefas_pendentes']} tarefas pendentes após o prazo final"
-        
-        # ✅ LÓGICA BASEADA EM SPI E TAREFAS ATRASADAS
-        elif spi >= 1.1 and tarefas_atrasadas == 0:
-            status = "ADIANTADO"
-            cor = "verde"
-            explicacao = "Projeto adiantado em relação ao cronograma"
-        elif spi >= 0.95 and tarefas_atrasadas == 0:
-            status = "NO PRAZO" 
-            cor = "verde-claro"
-            explicacao = "Projeto dentro do cronograma planejado"
-        elif spi >= 0.85 or tarefas_atrasadas <= 2:
-            status = "ATENÇÃO"
-            cor = "amarelo" 
-            explicacao = f"Projeto com pequeno desvio - {tarefas_atrasadas} tarefas atrasadas"
-        elif spi >= 0.6 or tarefas_atrasadas <= 5:
-            status = "ATRASO MODERADO"
-            cor = "laranja"
-            explicacao = f"Projeto com atraso moderado - {tarefas_atrasadas} tarefas atrasadas"
+            status, cor, explicacao = STATUS_PRAZO_VENCIDO
         else:
-            status = "ATRASO CRÍTICO"
-            cor = "vermelho"
-            explicacao = f"Projeto com atraso crítico - {tarefas_atrasadas} tarefas atrasadas"
+            # ✅ LÓGICA BASEADA EM SPI E TAREFAS ATRASADAS (faixas em regras_desempenho.py)
+            status, cor, explicacao = STATUS_CRITICO
+            for faixa_status, faixa_cor, faixa_explicacao, spi_minimo, maximo_atrasadas, ambas in FAIXAS_STATUS:
+                spi_ok = spi >= spi_minimo
+                atrasadas_ok = tarefas_atrasadas <= maximo_atrasadas
+                if (spi_ok and atrasadas_ok) if ambas else (spi_ok or atrasadas_ok):
+                    status, cor, explicacao = faixa_status, faixa_cor, faixa_explicacao
+                    break
         
         return {
             'status': status,
             'cor': cor,
-            'explicacao': explicacao,
+            'explicacao': explicacao.format(pendentes=metricas['tarefas_pendentes'], atrasadas=tarefas_atrasadas),
             'spi': round(spi, 3),
             'sv': metricas['sv'],
             'tcpi': metricas['tcpi'],
@@ -85,3 +61,46 @@ class AnalisadorDesempenho:
             'total_tarefas': metricas['total_tarefas'],
             'tarefas_concluidas': metricas['tarefas_concluidas']
         }
+
+    def calcular_probabilidade_atraso(self, analise_desempenho):
+        """Calcular probabilidade de atraso baseada em métricas EXISTENTES"""
+        if analise_desempenho.get('status') == "CONCLUÍDO":
+            return 0
+            
+        probabilidade = 0
+        spi = analise_desempenho['spi']
+        tarefas_atrasadas = analise_desempenho['tarefas_atrasadas']
+        taxa_conclusao = analise_desempenho['taxa_conclusao']
+        dias_restantes = analise_desempenho['dias_restantes']
+        
+        # Baseado no SPI (50% do peso)
+        probabilidade += next((pontos for limite, pontos in PONTOS_SPI if spi < limite), 0)
+        
+        # Baseado em tarefas atrasadas (30% do peso)
+        probabilidade += next((pontos for limite, pontos in PONTOS_ATRASADAS if tarefas_atrasadas > limite), 0)
+        
+        # Baseado em pressão de tempo (20% do peso)
+        if taxa_conclusao < TAXA_PRESSAO and dias_restantes < DIAS_PRESSAO:
+            probabilidade += PONTOS_PRESSAO
+        
+        return min(PROBABILIDADE_MAXIMA, probabilidade)
+
+def job_analisar_projeto(project_id):
+    """Handler do job 'analise.projeto': roda a análise completa e grava o histórico"""
+    projeto = Project.objects.get(id=project_id)
+    analisador = AnalisadorDesempenho()
+
+    with contexto_metricas():
+        analise = analisador.analisar_situacao_projeto(projeto)
+        if 'erro' in analise:
+            return
+        sugestoes = SistemaSugestoes.gerar_sugestoes(projeto)
+    probabilidade = analisador.calcular_probabilidade_atraso(analise)
+
+    with transaction.atomic():
+        AnaliseProjeto.objects.create(
+            projeto=projeto,
+            probabilidade_atraso=probabilidade,
+            sugestoes_geradas=sugestoes,
+        )
+        Project.objects.filter(id=project_id).update(probabilidade_atraso=probabilidade)
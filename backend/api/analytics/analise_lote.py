@@ -0,0 +1,206 @@
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.db.models import Count, Q
+from django.utils import timezone
+from ..models import Project
+from ..utils.contadores import inicializar_contadores
+from .regras_desempenho import (
+    DIAS_PRESSAO, FAIXAS_STATUS, PONTOS_ATRASADAS, PONTOS_PRESSAO, PONTOS_SPI, PROBABILIDADE_MAXIMA,
+    STATUS_CRITICO, STATUS_PRAZO_VENCIDO, TAXA_CONCLUIDO, TAXA_PRESSAO, analise_concluida,
+)
+
+# Mesmas regras do AnalisadorDesempenho (regras_desempenho.py), avaliadas para todos os projetos de uma vez.
+# As contas são feitas em float64 (mesmo IEEE-754 do float do Python); o arredondamento
+# final usa round() do Python, porque np.round não arredonda igual nos casos de meio.
+
+def buscar_dados_projetos(project_ids, agora):
+    """
+    Contadores, datas e nº de tarefas atrasadas de cada projeto em uma consulta agrupada
+    (repetida uma vez se algum projeto ainda estava com os contadores por inicializar)
+    """
+    def consultar():
+        return list(
+            Project.objects
+            .filter(id__in=project_ids)
+            .values('id', 'name', 'start_date', 'end_date', 'total_tasks', 'completed_tasks', 'contadores_inicializados')
+            .annotate(tarefas_atrasadas=Count(
+                'projectphase__task',
+                filter=Q(projectphase__task__is_completed=False, projectphase__task__due_date__lt=agora),
+            ))
+            .order_by('id')
+        )
+
+    linhas = consultar()
+    faltando = [linha['id'] for linha in linhas if not linha['contadores_inicializados']]
+    if faltando:
+        inicializar_contadores(faltando)
+        linhas = consultar()
+    return linhas
+
+def _datas_utc(datas):
+    return np.array([d.astimezone(dt_timezone.utc).replace(tzinfo=None) for d in datas], dtype='datetime64[us]')
+
+def _dias(delta):
+    """Equivalente vetorizado de timedelta.days (arredonda para baixo)"""
+    return delta // np.timedelta64(1, 'D')
+
+def _arredondar(valores, casas):
+    return [round(v, casas) for v in valores.tolist()]
+
+def calcular_metricas_lote(linhas, agora):
+    """
+    Versão vetorizada de montar_metricas. Retorna {project_id: metricas}, com None
+    para projetos sem tarefas (igual ao cálculo individual)
+    """
+    if not linhas:
+        return {}
+
+    total = np.array([l['total_tasks'] for l in linhas], dtype=np.int64)
+    concluidas = np.array([l['completed_tasks'] for l in linhas], dtype=np.int64)
+    atrasadas = np.array([l['tarefas_atrasadas'] for l in linhas], dtype=np.int64)
+    inicio = _datas_utc(l['start_date'] for l in linhas)
+    fim = _datas_utc(l['end_date'] for l in linhas)
+    agora64 = np.datetime64(agora.astimezone(dt_timezone.utc).replace(tzinfo=None), 'us')
+
+    com_tarefas = total > 0
+    divisor = np.where(com_tarefas, total, 1)
+    pendentes = total - concluidas
+    taxa_conclusao = concluidas / divisor * 100
+
+    total_dias = np.maximum(1, _dias(fim - inicio))
+    dias_decorridos = np.maximum(0, _dias(agora64 - inicio))
+    dias_restantes = np.maximum(0, _dias(fim - agora64))
+    projeto_atrasado = agora64 > fim
+
+    ev = concluidas / divisor
+    pv = np.minimum(dias_decorridos / total_dias, 1.0)
+
+    spi = np.where(pv > 0, ev / np.where(pv > 0, pv, 1.0), 1.0)
+    spi = np.where(atrasadas > 0, np.maximum(0.1, spi - (atrasadas / divisor) * 0.5), spi)
+    spi = np.where(projeto_atrasado & (pendentes > 0), 0.3, spi)
+
+    sv = ev - pv
+    # Com spi <= 0.1 o cálculo individual devolve total_dias * 2 como inteiro
+    eac_por_spi = spi > 0.1
+    eac = np.where(eac_por_spi, total_dias / np.where(eac_por_spi, spi, 1.0), total_dias * 2)
+    vac = total_dias - eac
+
+    trabalho_restante = np.maximum(0, 1 - ev)
+    tcpi = np.where(
+        dias_restantes > 0,
+        trabalho_restante / (np.where(dias_restantes > 0, dias_restantes, 1) / total_dias),
+        2.0,
+    )
+    tcpi = np.minimum(tcpi, 2.0)
+
+    colunas = {
+        'spi': _arredondar(spi, 3),
+        'sv': _arredondar(sv, 3),
+        'tcpi': _arredondar(tcpi, 3),
+        'eac': _arredondar(eac, 1),
+        'vac': _arredondar(vac, 1),
+        'taxa_conclusao': _arredondar(taxa_conclusao, 2),
+        'ev': _arredondar(ev, 3),
+        'pv': _arredondar(pv, 3),
+    }
+
+    metricas = {}
+    for i, linha in enumerate(linhas):
+        if not com_tarefas[i]:
+            metricas[linha['id']] = None
+            continue
+        eac_i, vac_i = colunas['eac'][i], colunas['vac'][i]
+        if not eac_por_spi[i]:
+            eac_i, vac_i = int(eac_i), int(vac_i)
+        metricas[linha['id']] = {
+            'spi': colunas['spi'][i],
+            'sv': colunas['sv'][i],
+            'tcpi': colunas['tcpi'][i],
+            'eac': eac_i,
+            'vac': vac_i,
+            'dias_restantes': int(dias_restantes[i]),
+            'tarefas_atrasadas': int(atrasadas[i]),
+            'tarefas_pendentes': int(pendentes[i]),
+            'taxa_conclusao': colunas['taxa_conclusao'][i],
+            'total_tarefas': int(total[i]),
+            'tarefas_concluidas': int(concluidas[i]),
+            'dias_decorridos': int(dias_decorridos[i]),
+            'total_dias': int(total_dias[i]),
+            'ev': colunas['ev'][i],
+            'pv': colunas['pv'][i],
+            'projeto_atrasado': bool(projeto_atrasado[i]),
+        }
+    return metricas
+
+# Índice 0: prazo vencido; depois as FAIXAS_STATUS em ordem; por último, o crítico
+STATUS_FAIXAS = (STATUS_PRAZO_VENCIDO, *(faixa[:3] for faixa in FAIXAS_STATUS), STATUS_CRITICO)
+
+def analisar_metricas_lote(metricas):
+    """
+    Status e probabilidade de atraso (mesmas regras do AnalisadorDesempenho) para um
+    dict {project_id: metricas}. Retorna {project_id: analise}
+    """
+    validos = [(pid, m) for pid, m in metricas.items() if m]
+    analises = {pid: {'erro': 'Não foi possível calcular métricas'} for pid, m in metricas.items() if not m}
+    if not validos:
+        return analises
+
+    spi = np.array([m['spi'] for _, m in validos])
+    atrasadas = np.array([m['tarefas_atrasadas'] for _, m in validos])
+    pendentes = np.array([m['tarefas_pendentes'] for _, m in validos])
+    taxa = np.array([m['taxa_conclusao'] for _, m in validos])
+    dias_restantes = np.array([m['dias_restantes'] for _, m in validos])
+    projeto_atrasado = np.array([m['projeto_atrasado'] for _, m in validos])
+
+    concluido = taxa >= TAXA_CONCLUIDO
+    condicoes = [projeto_atrasado & (pendentes > 0)]
+    for *_, spi_minimo, maximo_atrasadas, ambas in FAIXAS_STATUS:
+        juntar = np.logical_and if ambas else np.logical_or
+        condicoes.append(juntar(spi >= spi_minimo, atrasadas <= maximo_atrasadas))
+    faixa = np.select(condicoes, list(range(len(condicoes))), default=len(condicoes))
+
+    # Probabilidade: SPI (50%), tarefas atrasadas (30%) e pressão de prazo (20%)
+    probabilidade = (
+        np.select([spi < limite for limite, _ in PONTOS_SPI], [pontos for _, pontos in PONTOS_SPI], default=0)
+        + np.select(
+            [atrasadas > limite for limite, _ in PONTOS_ATRASADAS], [pontos for _, pontos in PONTOS_ATRASADAS], default=0,
+        )
+        + np.where((taxa < TAXA_PRESSAO) & (dias_restantes < DIAS_PRESSAO), PONTOS_PRESSAO, 0)
+    )
+    probabilidade = np.where(concluido, 0, np.minimum(PROBABILIDADE_MAXIMA, probabilidade))
+
+    for i, (pid, m) in enumerate(validos):
+        if concluido[i]:
+            analise = analise_concluida(m['total_dias'], m['total_tarefas'], m['tarefas_concluidas'])
+        else:
+            status, cor, explicacao = STATUS_FAIXAS[faixa[i]]
+            analise = {
+                'status': status,
+                'cor': cor,
+                'explicacao': explicacao.format(pendentes=m['tarefas_pendentes'], atrasadas=m['tarefas_atrasadas']),
+                'spi': round(m['spi'], 3),
+                'sv': m['sv'],
+                'tcpi': m['tcpi'],
+                'eac': m['eac'],
+                'vac': m['vac'],
+                'dias_restantes': m['dias_restantes'],
+                'tarefas_atrasadas': m['tarefas_atrasadas'],
+                'tarefas_pendentes': m['tarefas_pendentes'],
+                'taxa_conclusao': m['taxa_conclusao'],
+                'total_tarefas': m['total_tarefas'],
+                'tarefas_concluidas': m['tarefas_concluidas'],
+            }
+        analise['probabilidade_atraso'] = int(probabilidade[i])
+        analises[pid] = analise
+    return analises
+
+def analisar_projetos(project_ids, agora=None):
+    """
+    Análise EVM de vários projetos com uma consulta ao banco.
+    Retorna (linhas, metricas, analises), os dois últimos indexados por project_id
+    """
+    agora = agora or timezone.now()
+    linhas = buscar_dados_projetos(project_ids, agora)
+    metricas = calcular_metricas_lote(linhas, agora)
+    return linhas, metricas, analisar_metricas_lote(metricas)
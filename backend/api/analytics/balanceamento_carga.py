@@ -0,0 +1,126 @@
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ..models import TaskAssignee, UserProject
+from ..utils.versionamento import incrementar_versao
+
+# Diferença (em nº de tarefas pendentes) a partir da qual a carga é considerada desigual
+LIMITE_DESEQUILIBRIO = 3
+
+def cargas_por_membro(project_id):
+    """
+    Carga pendente de cada membro do projeto em uma consulta agrupada:
+    {user_id: {'tarefas': nº de tarefas pendentes, 'peso': soma da complexidade}}
+    """
+    pendentes = Q(
+        user__taskassignee__task__project_phase__project_id=project_id,
+        user__taskassignee__task__is_completed=False,
+    )
+    linhas = (
+        UserProject.objects
+        .filter(project_id=project_id)
+        .values('user_id')
+        .annotate(
+            tarefas=Count('user__taskassignee', filter=pendentes),
+            peso=Coalesce(Sum('user__taskassignee__task__complexidade', filter=pendentes), 0.0),
+        )
+    )
+    return {linha['user_id']: {'tarefas': linha['tarefas'], 'peso': linha['peso']} for linha in linhas}
+
+def verificar_desequilibrio(project_id):
+    """Resumo usado pela sugestão 'balancear_carga' (mesmo formato de antes)"""
+    cargas = [carga['tarefas'] for carga in cargas_por_membro(project_id).values()]
+    if not cargas:
+        return {'desequilibrio': False, 'diferenca': 0}
+
+    diferenca = max(cargas) - min(cargas)
+    return {
+        'desequilibrio': diferenca > LIMITE_DESEQUILIBRIO,
+        'diferenca': diferenca,
+        'maior_carga': max(cargas),
+        'menor_carga': min(cargas)
+    }
+
+def planejar_rebalanceamento(cargas, atribuicoes):
+    """
+    Guloso com min-heap: percorre os membros mais carregados e passa as tarefas
+    (maiores primeiro) para o membro de menor carga enquanto a troca diminuir a
+    diferença entre os dois. Só mexe em memória; `cargas` ({user_id: peso}) é atualizado.
+
+    atribuicoes: TaskAssignee movíveis como dicts com id, task_id, user_id e complexidade.
+    Retorna [(taskassignee_id, novo user_id)]
+    """
+    if len(cargas) < 2:
+        return []
+
+    media = sum(cargas.values()) / len(cargas)
+    ja_atribuidas = {(a['task_id'], a['user_id']) for a in atribuicoes}
+    por_membro = defaultdict(list)
+    for atribuicao in atribuicoes:
+        if atribuicao['user_id'] in cargas:
+            por_membro[atribuicao['user_id']].append(atribuicao)
+
+    # entradas antigas (carga já alterada) ficam no heap e são descartadas ao chegar no topo
+    heap = [(carga, user_id) for user_id, carga in cargas.items()]
+    heapq.heapify(heap)
+
+    movimentos = []
+    for origem in sorted(por_membro, key=cargas.get, reverse=True):
+        for atribuicao in sorted(por_membro[origem], key=lambda a: a['complexidade'], reverse=True):
+            if cargas[origem] <= media:
+                break
+            while heap[0][0] != cargas[heap[0][1]]:
+                heapq.heappop(heap)
+            carga_destino, destino = heap[0]
+            peso = atribuicao['complexidade']
+
+            # só move se o destino continuar abaixo da origem (senão só troca quem está sobrecarregado)
+            if destino == origem or carga_destino + peso >= cargas[origem]:
+                continue
+            if (atribuicao['task_id'], destino) in ja_atribuidas:
+                continue
+
+            heapq.heappop(heap)
+            cargas[origem] -= peso
+            cargas[destino] += peso
+            heapq.heappush(heap, (cargas[destino], destino))
+            heapq.heappush(heap, (cargas[origem], origem))
+            ja_atribuidas.discard((atribuicao['task_id'], origem))
+            ja_atribuidas.add((atribuicao['task_id'], destino))
+            movimentos.append((atribuicao['id'], destino))
+    return movimentos
+
+@transaction.atomic
+def rebalancear_carga(project_id, agora=None):
+    """
+    Redistribui as tarefas pendentes e ainda não iniciadas dos membros sobrecarregados
+    (peso = complexidade) e grava tudo com um único bulk_update em TaskAssignee
+    """
+    agora = agora or timezone.now()
+    cargas = cargas_por_membro(project_id)
+    pesos = {user_id: carga['peso'] for user_id, carga in cargas.items()}
+    diferenca_antes = max(pesos.values()) - min(pesos.values()) if pesos else 0
+
+    atribuicoes = list(
+        TaskAssignee.objects
+        .filter(task__project_phase__project_id=project_id, task__is_completed=False)
+        .filter(Q(task__start_date__isnull=True) | Q(task__start_date__gt=agora))
+        .values('id', 'task_id', 'user_id', complexidade=F('task__complexidade'))
+    )
+    movimentos = planejar_rebalanceamento(pesos, atribuicoes)
+    if movimentos:
+        TaskAssignee.objects.bulk_update(
+            [TaskAssignee(id=atribuicao_id, user_id=user_id) for atribuicao_id, user_id in movimentos],
+            ['user'],
+        )
+        incrementar_versao(project_id)
+
+    return {
+        'tarefas_reatribuidas': len(movimentos),
+        'diferenca_antes': round(diferenca_antes, 1),
+        'diferenca_depois': round(max(pesos.values()) - min(pesos.values()), 1) if pesos else 0,
+    }
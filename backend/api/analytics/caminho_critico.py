@@ -0,0 +1,177 @@
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from ..models import Project, Task, TaskDependency
+
+# Método do caminho crítico (CPM) sobre as dependências entre tarefas de um projeto.
+# Duração = prazo - início planejado (start_date, ou created_at se não houver).
+#   ida:   início mais cedo = max(início planejado, fim mais cedo das predecessoras)
+#   volta: início mais tarde = min(fim do projeto, início mais tarde das sucessoras) - duração
+#   folga = início mais tarde - início mais cedo (negativa: o atraso já estoura o fim do projeto)
+# Os três valores ficam em cache na própria Task.
+
+CAMPOS = ('id', 'created_at', 'start_date', 'due_date', 'inicio_mais_cedo', 'inicio_mais_tarde', 'folga_dias')
+CAMPOS_CACHE = ['inicio_mais_cedo', 'inicio_mais_tarde', 'folga_dias']
+TAMANHO_LOTE = 500
+
+class CicloDependencias(ValueError):
+    pass
+
+def _duracao(tarefa):
+    return max(timedelta(0), tarefa.due_date - (tarefa.start_date or tarefa.created_at))
+
+def _inicio_planejado(tarefa):
+    return tarefa.start_date or tarefa.created_at
+
+def carregar_grafo(project_id):
+    """(predecessoras, sucessoras) do projeto: {task_id: [ids]}, em uma consulta"""
+    predecessoras = defaultdict(list)
+    sucessoras = defaultdict(list)
+    arestas = TaskDependency.objects.filter(
+        task__project_phase__project_id=project_id
+    ).values_list('depends_on_id', 'task_id')
+    for antes, depois in arestas:
+        sucessoras[antes].append(depois)
+        predecessoras[depois].append(antes)
+    return predecessoras, sucessoras
+
+def alcancaveis(origens, vizinhos):
+    """Origens + todos os nós alcançáveis a partir delas (BFS)"""
+    vistos = set(origens)
+    fila = deque(origens)
+    while fila:
+        for proximo in vizinhos.get(fila.popleft(), ()):
+            if proximo not in vistos:
+                vistos.add(proximo)
+                fila.append(proximo)
+    return vistos
+
+def ordem_topologica(nos, predecessoras, sucessoras):
+    """Kahn restrito a `nos` (arestas para fora do conjunto são ignoradas). O(V+E)"""
+    grau = {no: sum(1 for p in predecessoras.get(no, ()) if p in nos) for no in nos}
+    fila = deque(no for no, g in grau.items() if g == 0)
+    ordem = []
+    while fila:
+        no = fila.popleft()
+        ordem.append(no)
+        for sucessora in sucessoras.get(no, ()):
+            if sucessora in grau:
+                grau[sucessora] -= 1
+                if grau[sucessora] == 0:
+                    fila.append(sucessora)
+    if len(ordem) != len(nos):
+        raise CicloDependencias("As dependências entre tarefas formam um ciclo")
+    return ordem
+
+def _calcular(tarefas, frente, tras, predecessoras, sucessoras, fim_projeto):
+    """
+    Ida sobre `frente` e volta sobre `tras` (em ordem topológica), usando os valores em
+    cache das tarefas vizinhas que ficaram de fora. Retorna as tarefas que mudaram
+    """
+    cedo = {tid: t.inicio_mais_cedo for tid, t in tarefas.items()}
+    tarde = {tid: t.inicio_mais_tarde for tid, t in tarefas.items()}
+
+    for tid in ordem_topologica(frente, predecessoras, sucessoras):
+        tarefa = tarefas[tid]
+        cedo[tid] = max(
+            [_inicio_planejado(tarefa)]
+            + [cedo[p] + _duracao(tarefas[p]) for p in predecessoras.get(tid, ())]
+        )
+
+    for tid in reversed(ordem_topologica(tras, predecessoras, sucessoras)):
+        tarefa = tarefas[tid]
+        tarde[tid] = min([fim_projeto] + [tarde[s] for s in sucessoras.get(tid, ())]) - _duracao(tarefa)
+
+    alteradas = []
+    for tid in frente | tras:
+        tarefa = tarefas[tid]
+        folga = round((tarde[tid] - cedo[tid]).total_seconds() / 86400, 2)
+        if (tarefa.inicio_mais_cedo, tarefa.inicio_mais_tarde, tarefa.folga_dias) != (cedo[tid], tarde[tid], folga):
+            tarefa.inicio_mais_cedo, tarefa.inicio_mais_tarde, tarefa.folga_dias = cedo[tid], tarde[tid], folga
+            alteradas.append(tarefa)
+    return alteradas
+
+@transaction.atomic
+def calcular_caminho_critico(project_id):
+    """Recalcula o projeto inteiro (ida + volta) e grava o que mudou com um bulk_update"""
+    fim_projeto = Project.objects.values_list('end_date', flat=True).get(id=project_id)
+    tarefas = {t.id: t for t in Task.objects.filter(project_phase__project_id=project_id).only(*CAMPOS)}
+    predecessoras, sucessoras = carregar_grafo(project_id)
+    todas = set(tarefas)
+    alteradas = _calcular(tarefas, todas, todas, predecessoras, sucessoras, fim_projeto)
+    Task.objects.bulk_update(alteradas, CAMPOS_CACHE, batch_size=TAMANHO_LOTE)
+    return alteradas
+
+@transaction.atomic
+def atualizar_caminho_critico(project_id, task_ids):
+    """
+    Atualização incremental depois que as tarefas `task_ids` mudaram (datas ou dependências):
+    o início mais cedo só muda delas para frente e o mais tarde só delas para trás,
+    então só esses nós são recalculados e gravados
+    """
+    task_ids = set(task_ids)
+    if not task_ids:
+        return []
+
+    predecessoras, sucessoras = carregar_grafo(project_id)
+    frente = alcancaveis(task_ids, sucessoras)
+    tras = alcancaveis(task_ids, predecessoras)
+    vizinhas = set()
+    for tid in frente:
+        vizinhas.update(predecessoras.get(tid, ()))
+    for tid in tras:
+        vizinhas.update(sucessoras.get(tid, ()))
+
+    tarefas = {t.id: t for t in Task.objects.filter(id__in=frente | tras | vizinhas).only(*CAMPOS)}
+    # algum valor que não será recalculado está sem cache (tarefa nova, projeto nunca
+    # calculado): refaz o projeto todo
+    recalculadas = frente & tras
+    if any(
+        tarefa.inicio_mais_cedo is None or tarefa.inicio_mais_tarde is None
+        for tid, tarefa in tarefas.items() if tid not in recalculadas
+    ):
+        return calcular_caminho_critico(project_id)
+
+    fim_projeto = Project.objects.values_list('end_date', flat=True).get(id=project_id)
+    alteradas = _calcular(
+        tarefas, frente & tarefas.keys(), tras & tarefas.keys(), predecessoras, sucessoras, fim_projeto
+    )
+    Task.objects.bulk_update(alteradas, CAMPOS_CACHE, batch_size=TAMANHO_LOTE)
+    return alteradas
+
+@transaction.atomic
+def adicionar_dependencia(task, depends_on, project_id):
+    """Cria a aresta depends_on -> task, recusando ciclos, e atualiza o caminho crítico"""
+    _, sucessoras = carregar_grafo(project_id)
+    if task.id == depends_on.id or depends_on.id in alcancaveis([task.id], sucessoras):
+        raise CicloDependencias("Essa dependência criaria um ciclo entre as tarefas")
+    dependencia, criada = TaskDependency.objects.get_or_create(task=task, depends_on=depends_on)
+    if criada:
+        atualizar_caminho_critico(project_id, [task.id, depends_on.id])
+    return dependencia
+
+@transaction.atomic
+def remover_dependencia(task, depends_on_id, project_id):
+    removidas, _ = TaskDependency.objects.filter(task=task, depends_on_id=depends_on_id).delete()
+    if removidas:
+        atualizar_caminho_critico(project_id, [task.id, depends_on_id])
+    return bool(removidas)
+
+def resumo_caminho_critico(project_id, agora=None):
+    """
+    Tarefas pendentes no caminho crítico (folga <= 0) e quantas delas já estão atrasadas
+    (atraso que empurra o fim do projeto, ao contrário de atrasos com folga)
+    """
+    agora = agora or timezone.now()
+    pendentes = Task.objects.filter(project_phase__project_id=project_id, is_completed=False)
+    if pendentes.filter(inicio_mais_cedo__isnull=True).exists():
+        calcular_caminho_critico(project_id)
+
+    return pendentes.aggregate(
+        tarefas_criticas=Count('id', filter=Q(folga_dias__lte=0)),
+        atrasos_criticos=Count('id', filter=Q(folga_dias__lte=0, due_date__lt=agora)),
+        atrasos_com_folga=Count('id', filter=Q(folga_dias__gt=0, due_date__lt=agora)),
+    )
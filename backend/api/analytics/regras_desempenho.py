@@ -0,0 +1,53 @@
+# Regras de status e de probabilidade de atraso, compartilhadas pelo AnalisadorDesempenho
+# (um projeto por vez) e por analise_lote (todos os projetos de uma vez, com numpy).
+# Mudou um limite aqui, muda nos dois caminhos.
+
+# taxa_conclusao (%) a partir da qual o projeto é considerado concluído
+TAXA_CONCLUIDO = 99.9
+
+# Prazo final vencido com tarefas pendentes: crítico, antes de olhar o SPI
+STATUS_PRAZO_VENCIDO = (
+    "ATRASO CRÍTICO", "vermelho", "⚠️ PROJETO ATRASADO! {pendentes} tarefas pendentes após o prazo final",
+)
+
+# Faixas avaliadas em ordem; a primeira que casar define o status.
+# (status, cor, explicação, spi mínimo, máximo de tarefas atrasadas, exige as duas condições)
+FAIXAS_STATUS = (
+    ("ADIANTADO", "verde", "Projeto adiantado em relação ao cronograma", 1.1, 0, True),
+    ("NO PRAZO", "verde-claro", "Projeto dentro do cronograma planejado", 0.95, 0, True),
+    ("ATENÇÃO", "amarelo", "Projeto com pequeno desvio - {atrasadas} tarefas atrasadas", 0.85, 2, False),
+    ("ATRASO MODERADO", "laranja", "Projeto com atraso moderado - {atrasadas} tarefas atrasadas", 0.6, 5, False),
+)
+
+# Nenhuma faixa casou
+STATUS_CRITICO = ("ATRASO CRÍTICO", "vermelho", "Projeto com atraso crítico - {atrasadas} tarefas atrasadas")
+
+# Probabilidade de atraso: soma dos pontos de cada critério, limitada a PROBABILIDADE_MAXIMA.
+# SPI (50% do peso): (spi abaixo de, pontos), o primeiro que casar
+PONTOS_SPI = ((0.7, 50), (0.9, 30), (1.0, 10))
+# Tarefas atrasadas (30% do peso): (atrasadas acima de, pontos), o primeiro que casar
+PONTOS_ATRASADAS = ((5, 30), (2, 20), (0, 10))
+# Pressão de prazo (20% do peso): menos de TAXA_PRESSAO % concluído e menos de DIAS_PRESSAO dias restantes
+TAXA_PRESSAO = 50
+DIAS_PRESSAO = 7
+PONTOS_PRESSAO = 20
+PROBABILIDADE_MAXIMA = 95
+
+def analise_concluida(total_dias, total_tarefas, tarefas_concluidas):
+    """Análise fixa de um projeto concluído (taxa_conclusao >= TAXA_CONCLUIDO)"""
+    return {
+        'status': "CONCLUÍDO",
+        'cor': "verde",
+        'explicacao': "🎉 Projeto finalizado com sucesso! Parabéns pela conclusão!",
+        'spi': 1.0,
+        'sv': 0,
+        'tcpi': 1.0,
+        'eac': total_dias,
+        'vac': 0,
+        'dias_restantes': 0,
+        'tarefas_atrasadas': 0,
+        'tarefas_pendentes': 0,
+        'taxa_conclusao': 100,
+        'total_tarefas': total_tarefas,
+        'tarefas_concluidas': tarefas_concluidas,
+    }
@@ -1,5 +1,6 @@
 from ..utils.metricas_projeto import calcular_metricas_projeto
-from ..models import UserProject, Task, TaskAssignee
+from ..models import Project
+from .balanceamento_carga import verificar_desequilibrio
 
 class SistemaSugestoes:
     """
@@ -12,7 +13,7 @@ class SistemaSugestoes:
         Gera sugestões contextuais baseadas em análise realista do projeto
         """
         sugestoes = []
-        metricas = calcular_metricas_projeto(projeto.id)
+        metricas = calcular_metricas_projeto(projeto)
         
         if not metricas:
             return sugestoes
@@ -105,25 +106,5 @@ class SistemaSugestoes:
     
     @staticmethod
     def _verificar_carga_desequilibrada(projeto):
-        """Verifica desbalanceamento na carga de trabalho da equipe"""
-        usuarios = UserProject.objects.filter(project=projeto)
-        cargas = []
-        
-        for up in usuarios:
-            tarefas_pendentes = Task.objects.filter(
-                project_phase__project=projeto,
-                is_completed=False,
-                taskassignee__user=up.user
-            ).count()
-            cargas.append(tarefas_pendentes)
-        
-        if not cargas:
-            return {'desequilibrio': False, 'diferenca': 0}
-        
-        diferenca = max(cargas) - min(cargas)
-        return {
-            'desequilibrio': diferenca > 3,
-            'diferenca': diferenca,
-            'maior_carga': max(cargas),
-            'menor_carga': min(cargas)
-        }
+        """Verifica desbalanceamento na carga de trabalho da equipe (uma consulta agrupada)"""
+        return verificar_desequilibrio(projeto.id if isinstance(projeto, Project) else projeto)
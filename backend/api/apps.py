@@ -1,6 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def _invalidar_membros(sender, instance, **kwargs):
+    from .utils.membros import invalidar_membros
+    invalidar_membros(instance.user_id)
+
+
+def _inicializar_contadores(sender, apps, **kwargs):
+    # migrate parcial (ex.: voltando para antes da coluna): nada a preencher
+    try:
+        apps.get_model('api', 'Project')._meta.get_field('contadores_inicializados')
+    except LookupError:
+        return
+    from .utils.contadores import inicializar_contadores
+    inicializar_contadores()
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # vínculo criado/alterado/removido (inclusive em cascata ao excluir o projeto)
+        # derruba o mapa de papéis do usuário (utils/membros.py)
+        UserProject = self.get_model('UserProject')
+        post_save.connect(_invalidar_membros, sender=UserProject, dispatch_uid='userproject_membros_save')
+        post_delete.connect(_invalidar_membros, sender=UserProject, dispatch_uid='userproject_membros_delete')
+        # projetos que já existiam quando os contadores foram criados: preenchidos no deploy
+        # (utils/contadores.py:inicializar_contadores), sem depender de rodar um comando à parte
+        post_migrate.connect(_inicializar_contadores, sender=self, dispatch_uid='api_inicializar_contadores')
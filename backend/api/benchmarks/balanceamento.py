@@ -0,0 +1,76 @@
+import random
+from datetime import timedelta
+from django.utils import timezone
+
+from api.analytics.balanceamento_carga import rebalancear_carga, verificar_desequilibrio
+from api.models import User, Project, UserProject, ProjectRole, Phase, ProjectPhase, Task, TaskAssignee
+from .base import banco_descartavel, medir, imprimir_tabela
+
+# Nº de tarefas do projeto (distribuídas entre MEMBROS)
+TAMANHOS_PADRAO = [1000, 10000]
+MEMBROS = 50
+# Fração dos membros que recebe a maior parte das tarefas
+FRACAO_SOBRECARREGADOS = 0.1
+
+def _popular(qtd_tarefas):
+    """Projeto com MEMBROS membros e tarefas concentradas em poucos deles (carga desigual)"""
+    rnd = random.Random(42)
+    agora = timezone.now()
+    membros = User.objects.bulk_create([
+        User(email=f'bench-carga-{i}@byp.local', username=f'carga{i}', full_name=f'Membro {i}')
+        for i in range(MEMBROS)
+    ])
+    projeto = Project.objects.create(
+        name='Benchmark carga', description='', start_date=agora, end_date=agora + timedelta(days=90),
+    )
+    UserProject.objects.bulk_create([
+        UserProject(user=membro, project=projeto, role=ProjectRole.LEADER if i == 0 else ProjectRole.MEMBER)
+        for i, membro in enumerate(membros)
+    ])
+    fase = Phase.objects.create(name='Benchmark carga', description='')
+    project_phase = ProjectPhase.objects.create(project=projeto, phase=fase)
+
+    tarefas = Task.objects.bulk_create([
+        Task(
+            project_phase=project_phase, title=f'Tarefa {i}', due_date=agora + timedelta(days=30),
+            complexidade=rnd.choice([1.0, 2.0, 3.0, 5.0, 8.0]),
+            # metade já começou e não pode ser movida
+            start_date=agora - timedelta(days=1) if i % 2 else agora + timedelta(days=1),
+        )
+        for i in range(qtd_tarefas)
+    ])
+    sobrecarregados = membros[:max(1, int(MEMBROS * FRACAO_SOBRECARREGADOS))]
+    TaskAssignee.objects.bulk_create([
+        TaskAssignee(task=tarefa, user=rnd.choice(sobrecarregados) if rnd.random() < 0.8 else rnd.choice(membros))
+        for tarefa in tarefas
+    ])
+    return projeto
+
+def _verificar_legado(projeto):
+    """Fluxo antigo: um COUNT por membro do projeto"""
+    cargas = []
+    for up in UserProject.objects.filter(project=projeto):
+        cargas.append(Task.objects.filter(
+            project_phase__project=projeto, is_completed=False, taskassignee__user=up.user
+        ).count())
+    return cargas
+
+def executar(stdout, tamanhos=None, repeticoes=3):
+    linhas = []
+    resumos = []
+    for tamanho in tamanhos or TAMANHOS_PADRAO:
+        with banco_descartavel():
+            projeto = _popular(tamanho)
+            consultas, ms = medir(lambda: _verificar_legado(projeto), repeticoes)
+            linhas.append((tamanho, 'legado', consultas, ms))
+            consultas, ms = medir(lambda: verificar_desequilibrio(projeto.id), repeticoes)
+            linhas.append((tamanho, 'agrupado', consultas, ms))
+            # a 1ª execução rebalanceia; as repetições medem o caso já equilibrado
+            consultas, ms = medir(lambda: resumos.append((tamanho, rebalancear_carga(projeto.id))), repeticoes)
+            linhas.append((tamanho, 'rebalancear', consultas, ms))
+    imprimir_tabela(stdout, f'Carga de trabalho ({MEMBROS} membros)', linhas)
+    for tamanho, resumo in resumos[::repeticoes + 1]:
+        stdout.write(
+            f"{tamanho:>10} {resumo['tarefas_reatribuidas']} tarefas reatribuídas, diferença de peso "
+            f"{resumo['diferenca_antes']} -> {resumo['diferenca_depois']}"
+        )
@@ -0,0 +1,47 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+@contextmanager
+def banco_descartavel():
+    """Executa o bloco numa transação que é sempre desfeita, para não sujar o banco"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+def medir(funcao, repeticoes=3):
+    """
+    Executa a função uma vez contando as consultas e depois `repeticoes` vezes medindo o tempo.
+    Retorna (nº de consultas, latência mediana em ms)
+    """
+    reset_queries()
+    with CaptureQueriesContext(connection) as consultas:
+        funcao()
+
+    tempos = []
+    for _ in range(repeticoes):
+        reset_queries()  # com DEBUG=True o log de consultas cresce a cada execução
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return len(consultas), statistics.median(tempos)
+
+def chamar_view(view, user, metodo='get', caminho='/', dados=None, **kwargs):
+    """Chama uma view DRF autenticada e renderiza a resposta (inclui o custo de serialização)"""
+    factory = APIRequestFactory()
+    request = getattr(factory, metodo)(caminho, dados, format='json')
+    force_authenticate(request, user=user)
+    response = view(request, **kwargs)
+    response.render()
+    return response
+
+def imprimir_tabela(stdout, titulo, linhas):
+    """Imprime as linhas (tamanho, variante, consultas, ms) no formato de tabela"""
+    stdout.write(f"\n{titulo}")
+    stdout.write(f"{'tamanho':>10} {'variante':<12} {'consultas':>10} {'ms':>10}")
+    for tamanho, variante, consultas, ms in linhas:
+        stdout.write(f"{tamanho:>10} {variante:<12} {consultas:>10} {ms:>10.1f}")
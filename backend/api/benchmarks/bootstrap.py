@@ -0,0 +1,45 @@
+from datetime import timedelta
+from django.utils import timezone
+
+from api.models import Project, Phase, ProjectPhase, Task
+from api.utils.bootstrap_projeto import SUBTAREFAS_PADRAO, criar_estrutura_projeto, distribuir_periodo
+from .base import banco_descartavel, medir, imprimir_tabela
+
+# Nº de fases do projeto criado
+TAMANHOS_PADRAO = [10, 50]
+
+def _novo_projeto(qtd_fases):
+    agora = timezone.now()
+    return Project.objects.create(
+        name='Benchmark', description='', start_date=agora, end_date=agora + timedelta(days=qtd_fases * 10),
+    )
+
+def _legado(project, fases):
+    """Fluxo antigo: serializer + view criavam tudo com um objects.create por linha"""
+    for nome in fases:
+        phase, _ = Phase.objects.get_or_create(name=nome)
+        project_phase = ProjectPhase.objects.create(project=project, phase=phase)
+        Task.objects.create(project_phase=project_phase, title=nome, due_date=project.end_date)
+
+    janelas = distribuir_periodo(project.start_date, project.end_date - timedelta(days=1), len(fases))
+    for nome, (inicio, fim) in zip(fases, janelas):
+        phase, _ = Phase.objects.get_or_create(name=nome)
+        project_phase = ProjectPhase.objects.create(project=project, phase=phase)
+        principal = Task.objects.create(project_phase=project_phase, title=nome, due_date=fim)
+        for modelo, (sub_inicio, sub_fim) in zip(SUBTAREFAS_PADRAO, distribuir_periodo(inicio, fim, len(SUBTAREFAS_PADRAO))):
+            Task.objects.create(
+                project_phase=project_phase, parent_task=principal,
+                title=modelo.format(fase=nome), due_date=sub_fim,
+            )
+
+def executar(stdout, tamanhos=None, repeticoes=3):
+    linhas = []
+    for tamanho in tamanhos or TAMANHOS_PADRAO:
+        fases = [f'Fase {i}' for i in range(tamanho)]
+        with banco_descartavel():
+            consultas, ms = medir(lambda: criar_estrutura_projeto(_novo_projeto(tamanho), fases), repeticoes)
+            linhas.append((tamanho, 'bulk', consultas, ms))
+        with banco_descartavel():
+            consultas, ms = medir(lambda: _legado(_novo_projeto(tamanho), fases), repeticoes)
+            linhas.append((tamanho, 'legado', consultas, ms))
+    imprimir_tabela(stdout, 'Bootstrap de projeto (fases -> tarefa principal -> subtarefas)', linhas)
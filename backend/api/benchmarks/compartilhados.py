@@ -0,0 +1,61 @@
+from datetime import timedelta
+from django.utils import timezone
+
+from api.models import User, Project, UserProject, ProjectRole, Phase, ProjectPhase, Task
+from api.serializers import SharedProjectSerializer
+from api.views.project_views import ProjectShareWithMeView
+from .base import banco_descartavel, medir, chamar_view, imprimir_tabela
+
+TAMANHOS_PADRAO = [10, 100, 1000]
+MEMBROS_POR_PROJETO = 3
+TAREFAS_POR_PROJETO = 5
+
+def _popular(qtd_projetos):
+    """Cria um usuário membro de `qtd_projetos` projetos, cada um com líder, membros e tarefas"""
+    agora = timezone.now()
+    usuario = User.objects.create_user(email='bench-membro@byp.local', username='bench', password='bench')
+    lider = User.objects.create_user(email='bench-lider@byp.local', username='lider', password='bench', full_name='Líder')
+    outros = User.objects.bulk_create([
+        User(email=f'bench-{i}@byp.local', username=f'bench{i}', full_name=f'Membro {i}')
+        for i in range(MEMBROS_POR_PROJETO)
+    ])
+    fase = Phase.objects.create(name='Benchmark', description='')
+
+    projetos = Project.objects.bulk_create([
+        Project(name=f'Projeto {i}', description='', start_date=agora, end_date=agora + timedelta(days=60))
+        for i in range(qtd_projetos)
+    ])
+    vinculos = []
+    for projeto in projetos:
+        vinculos.append(UserProject(user=lider, project=projeto, role=ProjectRole.LEADER))
+        vinculos.append(UserProject(user=usuario, project=projeto, role=ProjectRole.MEMBER))
+        vinculos.extend(UserProject(user=u, project=projeto, role=ProjectRole.MEMBER) for u in outros)
+    UserProject.objects.bulk_create(vinculos)
+
+    fases_projeto = ProjectPhase.objects.bulk_create([ProjectPhase(project=p, phase=fase) for p in projetos])
+    Task.objects.bulk_create([
+        Task(title=f'Tarefa {j}', project_phase=pp, due_date=agora + timedelta(days=j), is_completed=j % 2 == 0)
+        for pp in fases_projeto
+        for j in range(TAREFAS_POR_PROJETO)
+    ])
+    return usuario
+
+def _legado(usuario):
+    """Caminho antigo: queryset sem anotações, 4-5 consultas por projeto"""
+    projetos = Project.objects.filter(
+        userproject__user=usuario,
+        userproject__role=ProjectRole.MEMBER
+    ).distinct()
+    return SharedProjectSerializer(projetos, many=True).data
+
+def executar(stdout, tamanhos=None, repeticoes=3):
+    view = ProjectShareWithMeView.as_view()
+    linhas = []
+    for tamanho in tamanhos or TAMANHOS_PADRAO:
+        with banco_descartavel():
+            usuario = _popular(tamanho)
+            consultas, ms = medir(lambda: chamar_view(view, usuario, caminho='/api/projetos/sharewithme/'), repeticoes)
+            linhas.append((tamanho, 'otimizado', consultas, ms))
+            consultas, ms = medir(lambda: _legado(usuario), repeticoes)
+            linhas.append((tamanho, 'legado', consultas, ms))
+    imprimir_tabela(stdout, 'GET /projetos/sharewithme/ (projetos compartilhados)', linhas)
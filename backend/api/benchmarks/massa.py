@@ -0,0 +1,181 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import (
+    AnaliseProjeto, Chat, Phase, Project, ProjectPhase, ProjectRole, Task, TaskAssignee, User, UserProject,
+)
+
+# Massa sintética reprodutível (mesma semente, mesma estrutura) para carga, benchmarks e testes
+# de plano de consulta. Tudo com bulk_create em lotes; as tarefas são geradas por grupos de
+# projetos, cada grupo na própria transação, para a memória não crescer com o total.
+
+TAMANHO_LOTE = 5000
+# tarefas mantidas em memória por grupo de projetos
+TAREFAS_POR_GRUPO = 50_000
+
+SUGESTOES = [
+    {'tipo': 'priorizar_atrasadas', 'mensagem': 'Priorize as tarefas atrasadas'},
+    {'tipo': 'balancear_carga', 'mensagem': 'Redistribua as tarefas entre os membros'},
+    {'tipo': 'manter_ritmo', 'mensagem': 'O projeto está no ritmo esperado'},
+]
+
+def _repartir(total, partes):
+    """`total` dividido em `partes` inteiros que diferem no máximo em 1"""
+    base, resto = divmod(total, partes)
+    return [base + (1 if i < resto else 0) for i in range(partes)]
+
+def _criar_usuarios(qtd, prefixo, senha):
+    hash_senha = make_password(senha)  # um hash só: calcular um por usuário levaria minutos
+    usuarios = []
+    for inicio in range(0, qtd, TAMANHO_LOTE):
+        usuarios.extend(User.objects.bulk_create([
+            User(
+                username=f'{prefixo}{i}', email=f'{prefixo}{i}@byp.local',
+                full_name=f'Usuário {prefixo} {i}', password=hash_senha,
+            )
+            for i in range(inicio, min(qtd, inicio + TAMANHO_LOTE))
+        ]))
+    return usuarios
+
+def _catalogo_fases(qtd):
+    nomes = [f'Fase {i}' for i in range(qtd)]
+    # o nome é único: reaproveita o catálogo de uma carga anterior
+    Phase.objects.bulk_create([Phase(name=nome, description='') for nome in nomes], ignore_conflicts=True)
+    por_nome = {fase.name: fase for fase in Phase.objects.filter(name__in=nomes)}
+    return [por_nome[nome] for nome in nomes]
+
+def _nova_tarefa(aleatorio, agora, project_phase, titulo, pai=None):
+    return Task(
+        project_phase=project_phase, title=titulo, parent_task=pai,
+        path=f'{pai.path}{pai.id}/' if pai else '/',
+        is_completed=aleatorio.random() < 0.3,
+        due_date=agora + timedelta(days=aleatorio.randint(-20, 50)),
+        priority=aleatorio.randint(0, 3),
+        complexidade=aleatorio.choice([1.0, 2.0, 3.0, 5.0, 8.0]),
+    )
+
+def _criar_tarefas(aleatorio, agora, project_phases, tarefas_por_fase, subtarefas_por_raiz):
+    """
+    Em cada fase, ceil(n / (1 + subtarefas_por_raiz)) raízes e o restante como subtarefas
+    distribuídas entre elas. Raízes primeiro (os ids são do pai que monta o path das filhas)
+    """
+    raizes_por_fase = {}
+    novas_raizes = []
+    for pp, qtd in zip(project_phases, tarefas_por_fase):
+        qtd_raizes = -(-qtd // (1 + subtarefas_por_raiz))
+        raizes_por_fase[pp.id] = [_nova_tarefa(aleatorio, agora, pp, f'Tarefa {i}') for i in range(qtd_raizes)]
+        novas_raizes.extend(raizes_por_fase[pp.id])
+    raizes = Task.objects.bulk_create(novas_raizes, batch_size=TAMANHO_LOTE)
+
+    novas_subtarefas = []
+    for pp, qtd in zip(project_phases, tarefas_por_fase):
+        pais = raizes_por_fase[pp.id]
+        novas_subtarefas.extend(
+            _nova_tarefa(aleatorio, agora, pp, f'Subtarefa {i}', pais[i % len(pais)])
+            for i in range(qtd - len(pais))
+        )
+    return raizes + Task.objects.bulk_create(novas_subtarefas, batch_size=TAMANHO_LOTE)
+
+def _preencher_grupo(aleatorio, agora, projetos, equipes, catalogo, tarefas_por_projeto, subtarefas_por_raiz,
+                     mensagens_por_projeto, analises_por_projeto):
+    project_phases = ProjectPhase.objects.bulk_create(
+        [ProjectPhase(project=projeto, phase=fase) for projeto in projetos for fase in catalogo],
+        batch_size=TAMANHO_LOTE,
+    )
+    tarefas_por_fase = []
+    for qtd in tarefas_por_projeto:
+        tarefas_por_fase.extend(_repartir(qtd, len(catalogo)))
+    tarefas = _criar_tarefas(aleatorio, agora, project_phases, tarefas_por_fase, subtarefas_por_raiz)
+
+    TaskAssignee.objects.bulk_create([
+        TaskAssignee(task=tarefa, user=aleatorio.choice(equipes[tarefa.project_phase.project_id]))
+        for tarefa in tarefas
+    ], batch_size=TAMANHO_LOTE)
+
+    # contadores desnormalizados direto da geração, sem varrer as tarefas depois
+    for tarefa in tarefas:
+        for alvo in (tarefa.project_phase, tarefa.project_phase.project):
+            alvo.total_tasks += 1
+            alvo.completed_tasks += tarefa.is_completed
+    ProjectPhase.objects.bulk_update(project_phases, ['total_tasks', 'completed_tasks'], batch_size=TAMANHO_LOTE)
+
+    Chat.objects.bulk_create([
+        Chat(project=projeto, user=aleatorio.choice(equipes[projeto.id]), content=f'Mensagem {i} sobre {projeto.name}')
+        for projeto in projetos for i in range(mensagens_por_projeto)
+    ], batch_size=TAMANHO_LOTE)
+
+    # histórico de análises: a i-ésima de cada projeto recua i semanas (data_analise é auto_now_add)
+    historico = [[] for _ in range(analises_por_projeto)]
+    for projeto in projetos:
+        for i in range(analises_por_projeto):
+            probabilidade = round(aleatorio.random(), 2)
+            historico[i].append(AnaliseProjeto(
+                projeto=projeto, probabilidade_atraso=probabilidade, sugestoes_geradas=[aleatorio.choice(SUGESTOES)],
+            ))
+            if i == 0:
+                projeto.probabilidade_atraso = probabilidade
+    for semanas, analises in enumerate(historico):
+        criadas = AnaliseProjeto.objects.bulk_create(analises, batch_size=TAMANHO_LOTE)
+        if semanas:
+            AnaliseProjeto.objects.filter(id__in=[a.id for a in criadas]).update(
+                data_analise=agora - timedelta(weeks=semanas),
+            )
+
+    Project.objects.bulk_update(
+        projetos, ['total_tasks', 'completed_tasks', 'probabilidade_atraso'], batch_size=TAMANHO_LOTE,
+    )
+    return len(tarefas)
+
+def gerar_massa(usuarios=100, projetos=10, fases=3, tarefas=1000, membros_por_projeto=4, subtarefas_por_raiz=3,
+                mensagens_por_projeto=5, analises_por_projeto=3, semente=42, prefixo='usuario', senha='carga123',
+                progresso=None):
+    """
+    `usuarios` usuários (mesma senha), `projetos` projetos com `fases` fases cada e `tarefas`
+    tarefas no total, repartidas igualmente entre projetos e fases, em árvores de uma raiz com
+    até `subtarefas_por_raiz` filhas. Cada projeto tem um líder e membros sorteados, um
+    responsável por tarefa, mensagens de chat e histórico de AnaliseProjeto.
+    `progresso(tarefas_criadas)` é chamado ao fim de cada grupo. Retorna (usuarios, projetos)
+    """
+    if membros_por_projeto < 1 or usuarios < 1:
+        raise ValueError("Cada projeto precisa de pelo menos um usuário (o líder)")
+    aleatorio = random.Random(semente)
+    agora = timezone.now()
+    membros_por_projeto = min(membros_por_projeto, usuarios)
+
+    with transaction.atomic():
+        lista_usuarios = _criar_usuarios(usuarios, prefixo, senha)
+        catalogo = _catalogo_fases(fases)
+        lista_projetos = Project.objects.bulk_create([
+            Project(
+                name=f'Projeto {i}', description='', start_date=agora - timedelta(days=30),
+                end_date=agora + timedelta(days=60),
+            )
+            for i in range(projetos)
+        ], batch_size=TAMANHO_LOTE)
+
+        equipes = {}
+        vinculos = []
+        for projeto in lista_projetos:
+            equipe = aleatorio.sample(lista_usuarios, membros_por_projeto)
+            equipes[projeto.id] = equipe
+            vinculos.append(UserProject(user=equipe[0], project=projeto, role=ProjectRole.LEADER))
+            vinculos.extend(UserProject(user=u, project=projeto, role=ProjectRole.MEMBER) for u in equipe[1:])
+        UserProject.objects.bulk_create(vinculos, batch_size=TAMANHO_LOTE)
+
+    tarefas_por_projeto = _repartir(tarefas, projetos) if projetos else []
+    projetos_por_grupo = max(1, TAREFAS_POR_GRUPO // max(1, tarefas // max(1, projetos)))
+    criadas = 0
+    for inicio in range(0, projetos, projetos_por_grupo):
+        fim = inicio + projetos_por_grupo
+        with transaction.atomic():
+            criadas += _preencher_grupo(
+                aleatorio, agora, lista_projetos[inicio:fim], equipes, catalogo, tarefas_por_projeto[inicio:fim],
+                subtarefas_por_raiz, mensagens_por_projeto, analises_por_projeto,
+            )
+        if progresso:
+            progresso(criadas)
+    return lista_usuarios, lista_projetos
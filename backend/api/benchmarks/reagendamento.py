@@ -0,0 +1,56 @@
+from datetime import timedelta
+from django.utils import timezone
+
+from api.models import Project, Phase, ProjectPhase, Task
+from api.utils.bootstrap_projeto import distribuir_periodo
+from api.utils.reagendamento import reagendar_subtarefas
+from .base import banco_descartavel, medir, imprimir_tabela
+
+# Nº de subtarefas da tarefa pai
+TAMANHOS_PADRAO = [100, 500]
+
+def _popular(qtd_subtarefas):
+    """Tarefa pai com `qtd_subtarefas` subtarefas de prazos desordenados"""
+    agora = timezone.now()
+    projeto = Project.objects.create(
+        name='Benchmark reagendamento', description='', start_date=agora, end_date=agora + timedelta(days=365),
+    )
+    project_phase = ProjectPhase.objects.create(
+        project=projeto, phase=Phase.objects.create(name='Benchmark reagendamento', description=''),
+    )
+    pai = Task.objects.create(
+        project_phase=project_phase, title='Pai', start_date=agora, due_date=agora + timedelta(days=300),
+    )
+    Task.objects.bulk_create([
+        Task(
+            project_phase=project_phase, parent_task=pai, path=f"/{pai.id}/", title=f'Sub {i}',
+            due_date=agora + timedelta(days=(i * 7) % 300 + 1),
+        )
+        for i in range(qtd_subtarefas)
+    ])
+    return pai
+
+def _legado(pai):
+    """Mesma redistribuição gravando uma subtarefa por vez"""
+    subtarefas = list(Task.objects.filter(parent_task=pai).order_by('due_date', 'id'))
+    for subtarefa, (inicio, fim) in zip(subtarefas, distribuir_periodo(pai.start_date, pai.due_date, len(subtarefas))):
+        subtarefa.start_date, subtarefa.due_date = inicio, fim
+        subtarefa.save()
+
+def _alternar_prazo(pai, funcao):
+    # muda o prazo do pai a cada execução para que sempre haja o que regravar
+    def executar():
+        pai.due_date += timedelta(days=1)
+        funcao(pai)
+    return executar
+
+def executar(stdout, tamanhos=None, repeticoes=3):
+    linhas = []
+    for tamanho in tamanhos or TAMANHOS_PADRAO:
+        with banco_descartavel():
+            pai = _popular(tamanho)
+            consultas, ms = medir(_alternar_prazo(pai, reagendar_subtarefas), repeticoes)
+            linhas.append((tamanho, 'bulk', consultas, ms))
+            consultas, ms = medir(_alternar_prazo(pai, _legado), repeticoes)
+            linhas.append((tamanho, 'legado', consultas, ms))
+    imprimir_tabela(stdout, 'Reagendamento das subtarefas de uma tarefa pai', linhas)
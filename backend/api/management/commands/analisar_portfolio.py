@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.db.models import F
+
+from api.analytics.analise_lote import analisar_projetos
+from api.analytics.sistema_sugestoes import SistemaSugestoes
+from api.models import AnaliseProjeto, Project
+from api.utils.contadores import inicializar_contadores
+from api.utils.metricas_projeto import contexto_metricas, memorizar_metricas
+
+def _inicializar_processo():
+    # processos novos (spawn) precisam carregar o Django; com fork é só reaproveitar
+    django.setup()
+
+def analisar_lote(project_ids):
+    """
+    Analisa um lote de projetos: métricas/probabilidade em lote e sugestões de cada um
+    reaproveitando as métricas já calculadas. Retorna [(project_id, probabilidade, sugestoes)]
+    """
+    try:
+        _, metricas, analises = analisar_projetos(project_ids)
+        resultado = []
+        with contexto_metricas():
+            for project_id, valores in metricas.items():
+                memorizar_metricas(project_id, valores)
+            for project_id, analise in analises.items():
+                if 'erro' in analise:
+                    continue
+                resultado.append((
+                    project_id,
+                    analise['probabilidade_atraso'],
+                    SistemaSugestoes.gerar_sugestoes(project_id),
+                ))
+        return resultado
+    finally:
+        # cada thread/processo do pool usa a própria conexão
+        connection.close()
+
+class Command(BaseCommand):
+    help = "Reanalisa os projetos ativos e grava o histórico (AnaliseProjeto) e a probabilidade de atraso"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Lotes analisados em paralelo')
+        parser.add_argument('--modo', choices=('thread', 'processo'), default='thread', help='Tipo de pool')
+        parser.add_argument('--lote', type=int, default=200, help='Projetos por lote')
+
+    def handle(self, *args, **options):
+        tamanho_lote = max(1, options['lote'])
+        workers = max(1, options['workers'])
+
+        # Ativo = ainda tem tarefa pendente (contadores do projeto, que precisam estar preenchidos)
+        inicializar_contadores()
+        ids = list(
+            Project.objects.filter(completed_tasks__lt=F('total_tasks')).order_by('id').values_list('id', flat=True)
+        )
+        total = len(ids)
+        if not total:
+            self.stdout.write("Nenhum projeto ativo para analisar")
+            return
+
+        lotes = [ids[i:i + tamanho_lote] for i in range(0, total, tamanho_lote)]
+        self.stdout.write(
+            f"Analisando {total} projetos em {len(lotes)} lotes ({workers} workers, modo {options['modo']})"
+        )
+
+        if options['modo'] == 'processo':
+            # os filhos não podem herdar a conexão aberta do processo pai
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_processo)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analise')
+
+        inicio = time.perf_counter()
+        processados = gravados = 0
+        with pool:
+            futuros = {pool.submit(analisar_lote, lote): len(lote) for lote in lotes}
+            for futuro in as_completed(futuros):
+                gravados += self._gravar(futuro.result())
+                processados += futuros[futuro]
+                decorrido = time.perf_counter() - inicio
+                self.stdout.write(
+                    f"  {processados}/{total} projetos ({processados / total:.0%}) - {processados / decorrido:.1f} projetos/s"
+                )
+
+        decorrido = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{gravados} análises gravadas em {decorrido:.2f}s ({total / decorrido:.1f} projetos/s)"
+        ))
+
+    @staticmethod
+    def _gravar(resultados):
+        """Histórico com bulk_create e probabilidade atual com bulk_update, um lote por transação"""
+        if not resultados:
+            return 0
+        with transaction.atomic():
+            AnaliseProjeto.objects.bulk_create([
+                AnaliseProjeto(projeto_id=project_id, probabilidade_atraso=probabilidade, sugestoes_geradas=sugestoes)
+                for project_id, probabilidade, sugestoes in resultados
+            ])
+            Project.objects.bulk_update(
+                [Project(id=project_id, probabilidade_atraso=probabilidade) for project_id, probabilidade, _ in resultados],
+                ['probabilidade_atraso'],
+            )
+        return len(resultados)
@@ -0,0 +1,22 @@
+from importlib import import_module
+from django.core.management.base import BaseCommand
+
+# Cenários disponíveis: nome -> módulo com TAMANHOS_PADRAO e executar(stdout, tamanhos, repeticoes)
+CENARIOS = {
+    'compartilhados': 'api.benchmarks.compartilhados',
+    'bootstrap': 'api.benchmarks.bootstrap',
+    'balanceamento': 'api.benchmarks.balanceamento',
+    'reagendamento': 'api.benchmarks.reagendamento',
+}
+
+class Command(BaseCommand):
+    help = "Mede nº de consultas e latência de um cenário em vários tamanhos (os dados criados são descartados)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('cenario', choices=sorted(CENARIOS))
+        parser.add_argument('--tamanhos', type=int, nargs='+', help='Sobrescreve os tamanhos padrão do cenário')
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        modulo = import_module(CENARIOS[options['cenario']])
+        modulo.executar(self.stdout, tamanhos=options['tamanhos'], repeticoes=options['repeticoes'])
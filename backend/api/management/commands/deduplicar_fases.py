@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+
+from api.models import Phase, ProjectPhase
+from api.utils.catalogo_fases import limpar_cache
+
+class Command(BaseCommand):
+    help = (
+        "Mescla fases com o mesmo nome (mantém a de menor id e repontua as referências). "
+        "Rode antes de aplicar a migração que torna Phase.name único."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Só lista as duplicatas, sem alterar nada')
+
+    def handle(self, *args, **options):
+        duplicadas = (
+            Phase.objects.values('name')
+            .annotate(total=Count('id'), manter=Min('id'))
+            .filter(total__gt=1)
+        )
+
+        mescladas = 0
+        with transaction.atomic():
+            for grupo in duplicadas:
+                remover = list(
+                    Phase.objects.filter(name=grupo['name']).exclude(id=grupo['manter']).values_list('id', flat=True)
+                )
+                self.stdout.write(f"'{grupo['name']}': mantendo {grupo['manter']}, removendo {remover}")
+                if options['dry_run']:
+                    continue
+                ProjectPhase.objects.filter(phase_id__in=remover).update(phase_id=grupo['manter'])
+                Phase.objects.filter(parent_phase_id__in=remover).update(parent_phase_id=grupo['manter'])
+                Phase.objects.filter(id__in=remover).delete()
+                mescladas += len(remover)
+
+        limpar_cache()
+        self.stdout.write(self.style.SUCCESS(f"{mescladas} fases duplicadas mescladas"))
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.jobs import RETENCAO_PADRAO, purgar_jobs
+
+class Command(BaseCommand):
+    help = "Apaga da fila os jobs finalizados (concluídos ou que falharam) há mais de N dias"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=RETENCAO_PADRAO.days, help='Dias de retenção')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0:
+            raise CommandError("--dias não pode ser negativo")
+        apagados = purgar_jobs(timedelta(days=options['dias']))
+        self.stdout.write(self.style.SUCCESS(f"{apagados} jobs finalizados apagados"))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Task
+
+TAMANHO_LOTE = 1000
+
+class Command(BaseCommand):
+    help = "Reconstrói (ou só verifica) o Task.path de todas as tarefas a partir de parent_task"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='Só compara e falha se houver divergência')
+
+    def handle(self, *args, **options):
+        pais = {}
+        paths_atuais = {}
+        for task_id, parent_id, path in Task.objects.values_list('id', 'parent_task_id', 'path').iterator(chunk_size=TAMANHO_LOTE):
+            pais[task_id] = parent_id
+            paths_atuais[task_id] = path
+
+        esperado = {}
+
+        def calcular(task_id):
+            # sobe até a primeira tarefa com path já calculado (iterativo: árvores fundas não estouram a pilha)
+            cadeia = []
+            while task_id not in esperado:
+                cadeia.append(task_id)
+                if pais[task_id] is None:
+                    esperado[task_id] = '/'
+                    cadeia.pop()
+                    break
+                task_id = pais[task_id]
+            for filho in reversed(cadeia):
+                pai = pais[filho]
+                esperado[filho] = f"{esperado[pai]}{pai}/"
+
+        for task_id in pais:
+            calcular(task_id)
+
+        corrigir = [Task(id=task_id, path=path) for task_id, path in esperado.items() if paths_atuais[task_id] != path]
+        self.stdout.write(f"Task: {len(corrigir)} com path divergente")
+
+        if options['verificar']:
+            if corrigir:
+                raise CommandError(f"{len(corrigir)} paths divergentes; rode sem --verificar para corrigir")
+            self.stdout.write(self.style.SUCCESS("Paths ok"))
+            return
+
+        if corrigir:
+            with transaction.atomic():
+                Task.objects.bulk_update(corrigir, ['path'], batch_size=TAMANHO_LOTE)
+        self.stdout.write(self.style.SUCCESS("Paths reconstruídos"))
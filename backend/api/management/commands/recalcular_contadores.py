@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from api.models import Project, ProjectPhase, Task
+
+TAMANHO_LOTE = 1000
+
+def _contagens(campo):
+    """{id: (total, concluidas)} agrupando as tarefas pelo campo informado (uma consulta)"""
+    linhas = (
+        Task.objects.order_by()
+        .values(campo)
+        .annotate(total=Count('id'), concluidas=Count('id', filter=Q(is_completed=True)))
+    )
+    return {linha[campo]: (linha['total'], linha['concluidas']) for linha in linhas}
+
+class Command(BaseCommand):
+    help = "Reconstrói (ou só verifica) os contadores total_tasks/completed_tasks de fases e projetos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='Só compara e falha se houver divergência')
+
+    def handle(self, *args, **options):
+        divergentes = 0
+        for modelo, campo in ((ProjectPhase, 'project_phase_id'), (Project, 'project_phase__project_id')):
+            esperado = _contagens(campo)
+            corrigir = []
+            for obj in modelo.objects.only('id', 'total_tasks', 'completed_tasks').iterator(chunk_size=TAMANHO_LOTE):
+                total, concluidas = esperado.get(obj.id, (0, 0))
+                if (obj.total_tasks, obj.completed_tasks) != (total, concluidas):
+                    obj.total_tasks, obj.completed_tasks = total, concluidas
+                    corrigir.append(obj)
+
+            divergentes += len(corrigir)
+            self.stdout.write(f"{modelo.__name__}: {len(corrigir)} com contadores divergentes")
+            if corrigir and not options['verificar']:
+                with transaction.atomic():
+                    modelo.objects.bulk_update(corrigir, ['total_tasks', 'completed_tasks'], batch_size=TAMANHO_LOTE)
+
+        if not options['verificar']:
+            # recontados agora: os projetos antigos deixam de depender de inicializar_contadores
+            Project.objects.filter(contadores_inicializados=False).update(contadores_inicializados=True)
+
+        if options['verificar'] and divergentes:
+            raise CommandError(f"{divergentes} contadores divergentes; rode sem --verificar para corrigir")
+        self.stdout.write(self.style.SUCCESS("Contadores ok" if options['verificar'] else "Contadores reconstruídos"))
@@ -0,0 +1,52 @@
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.utils.jobs import executar_job, reivindicar_jobs
+
+def _executar_e_fechar_conexao(job):
+    # cada thread do pool abre a própria conexão; fecha ao terminar para não vazar
+    try:
+        return executar_job(job)
+    finally:
+        connection.close()
+
+class Command(BaseCommand):
+    help = "Processa a fila de jobs em segundo plano (emails, análises) com N threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs executados em paralelo')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos entre consultas com a fila vazia')
+        parser.add_argument('--uma-vez', action='store_true', help='Processa o que estiver disponível e sai')
+
+    def handle(self, *args, **options):
+        concorrencia = max(1, options['concurrency'])
+        self._parar = False
+        signal.signal(signal.SIGTERM, self._sinal_parada)
+        signal.signal(signal.SIGINT, self._sinal_parada)
+
+        self.stdout.write(f"Worker iniciado com concorrência {concorrencia}")
+        processados = falhas = 0
+        with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='job') as pool:
+            while not self._parar:
+                jobs = reivindicar_jobs(limite=concorrencia)
+                if not jobs:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                for job, sucesso in zip(jobs, pool.map(_executar_e_fechar_conexao, jobs)):
+                    processados += 1
+                    if not sucesso:
+                        falhas += 1
+                        self.stderr.write(f"Falha no job {job}")
+
+        self.stdout.write(f"Worker finalizado: {processados} jobs processados, {falhas} falhas")
+
+    def _sinal_parada(self, signum, frame):
+        # termina os jobs em andamento e sai no próximo ciclo
+        self._parar = True
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.massa import gerar_massa
+from api.models import User
+
+class Command(BaseCommand):
+    help = (
+        "Gera uma massa sintética reprodutível (usuários, vínculos, fases, árvores de tarefas, responsáveis, "
+        "chat e histórico de análises) para testes de carga e benchmarks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--phases', type=int, default=5, help='Fases por projeto')
+        parser.add_argument('--tasks', type=int, default=100_000, help='Total de tarefas, repartido entre os projetos')
+        parser.add_argument('--membros', type=int, default=5, help='Usuários por projeto (o primeiro é o líder)')
+        parser.add_argument('--subtarefas', type=int, default=3, help='Subtarefas por tarefa raiz')
+        parser.add_argument('--mensagens', type=int, default=5, help='Mensagens de chat por projeto')
+        parser.add_argument('--analises', type=int, default=3, help='Registros de AnaliseProjeto por projeto')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--prefixo', default='carga', help='Prefixo de username/email dos usuários gerados')
+        parser.add_argument('--senha', default='carga123', help='Senha de todos os usuários gerados')
+
+    def handle(self, *args, **options):
+        # --membros inclui o líder, que todo projeto precisa ter
+        if min(options['users'], options['projects'], options['phases'], options['membros']) < 1:
+            raise CommandError("--users, --projects, --phases e --membros precisam ser maiores que zero")
+        if min(options['tasks'], options['subtarefas'], options['mensagens'], options['analises']) < 0:
+            raise CommandError("As quantidades não podem ser negativas")
+        if User.objects.filter(email=f"{options['prefixo']}0@byp.local").exists():
+            raise CommandError(f"Já existe uma carga com o prefixo '{options['prefixo']}'; use outro --prefixo")
+
+        inicio = time.perf_counter()
+
+        def progresso(criadas):
+            self.stdout.write(f"{criadas}/{options['tasks']} tarefas ({time.perf_counter() - inicio:.1f}s)")
+
+        usuarios, projetos = gerar_massa(
+            usuarios=options['users'], projetos=options['projects'], fases=options['phases'],
+            tarefas=options['tasks'], membros_por_projeto=options['membros'],
+            subtarefas_por_raiz=options['subtarefas'], mensagens_por_projeto=options['mensagens'],
+            analises_por_projeto=options['analises'], semente=options['semente'], prefixo=options['prefixo'],
+            senha=options['senha'], progresso=progresso,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuarios)} usuários, {len(projetos)} projetos e {options['tasks']} tarefas "
+            f"em {time.perf_counter() - inicio:.1f}s"
+        ))
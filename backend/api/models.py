@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db.models import JSONField # Usei jsonfield pra lidar com o campo template que tem itens aninhados, então não dava pra usar text 
 
@@ -10,6 +11,18 @@ class ProjectRole(models.TextChoices):
     MEMBER = 'member', 'Member'
     LEADER = 'leader', 'Leader'
 
+class TaskPriority(models.IntegerChoices):
+    BAIXA = 0, 'Baixa'
+    MEDIA = 1, 'Média'
+    ALTA = 2, 'Alta'
+    URGENTE = 3, 'Urgente'
+
+class JobStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    RUNNING = 'running', 'Running'
+    DONE = 'done', 'Done'
+    FAILED = 'failed', 'Failed'
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, username, password=None, **extra_fields):
         if not email:
@@ -59,6 +72,16 @@ class Project(models.Model):
     end_date = models.DateTimeField()
     phases = models.JSONField(null=True, blank=True)
 
+    # Contadores desnormalizados (mantidos por utils/contadores.py; recalcular_contadores reconstrói)
+    total_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    # Projeto novo nasce com os contadores certos (True); as linhas que já existiam quando a
+    # coluna foi criada recebem o db_default (False) e são preenchidas uma vez com COUNT
+    # (inicializar_contadores, chamado no post_migrate e nas leituras)
+    contadores_inicializados = models.BooleanField(default=True, db_default=False)
+    # Sobe a cada escrita em tarefas, responsáveis ou membros; base do ETag (utils/versionamento.py)
+    versao = models.PositiveBigIntegerField(default=1)
+
     def __str__(self):
         return self.name
 
@@ -68,12 +91,22 @@ class UserProject(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     role = models.CharField(max_length=10, choices=ProjectRole.choices)
 
+    class Meta:
+        indexes = [
+            # projetos do usuário em ordem de id (paginação por cursor, utils/paginacao.py)
+            models.Index(fields=['user', 'project'], name='userproject_user_project_idx'),
+            # listas "projetos em que lidero / sou membro"
+            models.Index(fields=['user', 'role'], name='userproject_user_role_idx'),
+            # líder de um projeto (creator_name, subconsulta lider_nome)
+            models.Index(fields=['project', 'role'], name='userproject_project_role_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.full_name} - {self.project.name} ({self.role})"
 
 class Phase(models.Model):
     id = models.BigAutoField(primary_key=True)
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)  # único: ver utils/catalogo_fases.py
     description = models.TextField()
     parent_phase = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL)
 
@@ -85,9 +118,18 @@ class ProjectPhase(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     phase = models.ForeignKey(Phase, on_delete=models.CASCADE)
 
+    # Contadores desnormalizados (mantidos por utils/contadores.py; recalcular_contadores reconstrói)
+    total_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.project.name} - {self.phase.name}"
 
+    @property
+    def progresso(self):
+        """Percentual de tarefas concluídas da fase, lido dos contadores"""
+        return int((self.completed_tasks / self.total_tasks) * 100) if self.total_tasks > 0 else 0
+
 class Task(models.Model):
     id = models.BigAutoField(primary_key=True)
     title = models.CharField(max_length=255)
@@ -98,6 +140,7 @@ class Task(models.Model):
     due_date = models.DateTimeField()                     # 🔹 fim da tarefa
     project_phase = models.ForeignKey(ProjectPhase, on_delete=models.CASCADE)
     complexidade = models.FloatField(default=3.0)
+    priority = models.PositiveSmallIntegerField(choices=TaskPriority.choices, default=TaskPriority.MEDIA)
 
     parent_task = models.ForeignKey(
         "self",
@@ -106,10 +149,37 @@ class Task(models.Model):
         on_delete=models.CASCADE,
         related_name="subtasks"
     )
+    # cadeia de ancestrais ("/", "/12/", "/12/40/"), ver utils/hierarquia_tarefas.py
+    path = models.CharField(max_length=255, default='/', db_index=True)
+    # caminho crítico em cache (ver analytics/caminho_critico.py); None = ainda não calculado
+    inicio_mais_cedo = models.DateTimeField(null=True, blank=True)
+    inicio_mais_tarde = models.DateTimeField(null=True, blank=True)
+    folga_dias = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # listagens de tarefas por fase: mais prioritárias primeiro, depois por prazo
+            models.Index(fields=['project_phase', '-priority', 'due_date'], name='task_phase_priority_idx'),
+            # paginação por cursor das tarefas: (prazo, id) dentro de cada fase
+            models.Index(fields=['project_phase', 'due_date', 'id'], name='task_phase_due_idx'),
+            # métricas e atrasadas: pendentes com prazo vencido por fase. Parcial porque o Django
+            # escreve is_completed=False como "NOT is_completed", que o SQLite não casa com
+            # uma coluna do índice (só com a condição do índice parcial)
+            models.Index(
+                fields=['project_phase', 'due_date'], condition=models.Q(is_completed=False),
+                name='task_pendentes_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # subtarefa nova herda o caminho do pai (bulk_create não passa aqui: preencher path antes)
+        if self._state.adding and self.parent_task_id and self.path == '/':
+            self.path = f"{self.parent_task.path}{self.parent_task_id}/"
+        super().save(*args, **kwargs)
+
     @property
     def duration(self):
         """Duração em dias"""
@@ -121,9 +191,47 @@ class TaskAssignee(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # "esta tarefa já é desse usuário?" (atribuição, balanceamento de carga)
+            models.Index(fields=['task', 'user'], name='taskassignee_task_user_idx'),
+        ]
+
     def __str__(self):
         return f"{self.task.title} - {self.user.full_name}"
 
+class TaskDependency(models.Model):
+    """`task` só pode começar depois que `depends_on` termina"""
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependencias')
+    depends_on = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependentes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'depends_on'], name='unique_task_dependency'),
+        ]
+
+    def __str__(self):
+        return f"{self.depends_on_id} -> {self.task_id}"
+
+class ProjectInvite(models.Model):
+    """Convite pendente para um email ainda sem conta; vira UserProject no cadastro"""
+    id = models.BigAutoField(primary_key=True)
+    email = models.EmailField()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    invited_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # o índice único começa por email, então também atende a busca por email no cadastro
+            models.UniqueConstraint(fields=['email', 'project'], name='unique_invite_email_project'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} -> {self.project.name}"
+
 class Chat(models.Model):
     id = models.BigAutoField(primary_key=True)
     content = models.TextField()
@@ -154,4 +262,26 @@ class AnaliseProjeto(models.Model):
     projeto = models.ForeignKey(Project, on_delete=models.CASCADE)
     data_analise = models.DateTimeField(auto_now_add=True)
     probabilidade_atraso = models.FloatField()
-    sugestoes_geradas = models.JSONField()
\ No newline at end of file
+    sugestoes_geradas = models.JSONField()
+
+# FILA DE JOBS EM SEGUNDO PLANO (ver utils/jobs.py e o comando runworker)
+class Job(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=100)  # chave em utils/jobs.py:HANDLERS
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # o worker procura por status + run_at
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
@@ -1,6 +1,8 @@
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import BasePermission
 
-from api.models import SystemRole
+from api.models import ProjectRole, SystemRole, Task
+from api.utils.membros import papel_no_projeto
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
@@ -11,4 +13,37 @@ class IsRegularUser(BasePermission):
         return request.user.is_authenticated and request.user.role == "user"
 
 
-#Trata logicamente as permissões que o usuário pode ter no sistema
\ No newline at end of file
+def projeto_da_view(request, view):
+    """
+    project_id da URL (project_id) ou da tarefa da URL (task_id / pk), memorizado no
+    request; tarefa inexistente vira 404
+    """
+    if not hasattr(request, '_project_id'):
+        if 'project_id' in view.kwargs:
+            project_id = int(view.kwargs['project_id'])
+        else:
+            task_id = view.kwargs.get('task_id', view.kwargs.get('pk'))
+            project_id = Task.objects.filter(id=task_id).values_list('project_phase__project_id', flat=True).first()
+            if project_id is None:
+                raise NotFound("Tarefa não encontrada.")
+        request._project_id = project_id
+    return request._project_id
+
+class IsProjectMember(BasePermission):
+    """Usuário vinculado ao projeto da URL (líder ou membro)"""
+    message = "Você não tem acesso a este projeto."
+
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        return papel_no_projeto(request, projeto_da_view(request, view)) is not None
+
+class IsProjectLeader(IsProjectMember):
+    message = "Apenas o líder do projeto pode fazer isso."
+
+    def has_permission(self, request, view):
+        if not request.user.is_authenticated:
+            return False
+        return papel_no_projeto(request, projeto_da_view(request, view)) == ProjectRole.LEADER
+
+#Trata logicamente as permissões que o usuário pode ter no sistema
@@ -2,11 +2,85 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
 import re 
 from datetime import timedelta
+from django.db import transaction
 from django.utils import timezone
+from django.db.models import Prefetch
 from .models import (
     User, Project, UserProject, Phase, ProjectPhase,
     Task, TaskAssignee, Chat
 )
+from .utils.bootstrap_projeto import criar_estrutura_projeto
+from .utils.hierarquia_tarefas import agrupar_filhos, subarvore_queryset
+
+def _lista_parametro(valor):
+    return [campo.strip() for campo in valor.split(',') if campo.strip()] if valor is not None else None
+
+def campos_da_requisicao(request):
+    """(fields, expand) de ?fields=a,b&expand=c; None para o parâmetro que não veio"""
+    return _lista_parametro(request.query_params.get('fields')), _lista_parametro(request.query_params.get('expand'))
+
+class CamposDinamicosMixin:
+    """
+    Sparse fieldsets: fields=[...] (ou ?fields=a,b) limita a resposta a esses campos e
+    expand=[...] (ou ?expand=c) acrescenta os de `campos_expansiveis` (relações caras).
+    Sem fields, a saída é a de sempre. Campos não pedidos saem de self.fields, então os
+    SerializerMethodFields deles nem rodam; colunas()/preparar_queryset() podam a
+    consulta na mesma medida (`colunas_por_campo` e `prefetch_por_campo` dizem do
+    que cada campo calculado precisa)
+    """
+    campos_expansiveis = ()
+    colunas_por_campo = {}
+    prefetch_por_campo = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and expand is None and request is not None:
+            fields, expand = campos_da_requisicao(request)
+
+        selecionados = self.campos_selecionados(fields, expand)
+        if selecionados is None:
+            return
+        for nome in list(self.fields):
+            # campos só de escrita continuam: a validação de entrada não muda
+            if nome not in selecionados and not self.fields[nome].write_only:
+                self.fields.pop(nome)
+
+    @classmethod
+    def campos_selecionados(cls, fields=None, expand=None):
+        """Nomes que vão na resposta, ou None para todos"""
+        if fields is None:
+            return None
+        pedidos = set(fields) | (set(expand or ()) & set(cls.campos_expansiveis))
+        return pedidos & set(cls.Meta.fields)
+
+    @classmethod
+    def colunas(cls, campos=None):
+        """Colunas do model que os campos pedidos (None = todos) leem, para o only()"""
+        declarados = cls().fields
+        colunas = {'id'}
+        for nome in declarados if campos is None else campos:
+            campo = declarados.get(nome)
+            if campo is None or campo.write_only:
+                continue
+            if isinstance(campo, serializers.SerializerMethodField):
+                colunas.update(cls.colunas_por_campo.get(nome, ()))
+            else:
+                colunas.add(campo.source.split('.')[0])
+        return sorted(colunas)
+
+    @classmethod
+    def preparar_queryset(cls, queryset, campos=None):
+        """only() nas colunas usadas + prefetches só dos campos de relação pedidos"""
+        queryset = queryset.only(*cls.colunas(campos))
+        prefetches = []
+        for nome in cls.Meta.fields if campos is None else campos:
+            for prefetch in cls.prefetch_por_campo.get(nome, ()):
+                if prefetch not in prefetches:
+                    prefetches.append(prefetch)
+        return queryset.prefetch_related(*prefetches) if prefetches else queryset
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -41,7 +115,17 @@ class UserSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class ProjectSerializer(serializers.ModelSerializer):
+def _membros_prefetch():
+    return Prefetch('userproject_set', queryset=UserProject.objects.select_related('user').order_by('id'), to_attr='membros')
+
+class ProjectSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    campos_expansiveis = ('collaborators_info', 'collaborators_with_ids')
+    # os quatro campos de colaboradores saem da mesma lista de vínculos
+    prefetch_por_campo = {
+        nome: (_membros_prefetch(),)
+        for nome in ('creator_name', 'collaborators_info', 'collaborators_with_ids', 'collaborator_count')
+    }
+
     creator_name = serializers.SerializerMethodField()
     collaborators_info = serializers.SerializerMethodField()
     collaborator_count = serializers.SerializerMethodField()
@@ -64,18 +148,23 @@ class ProjectSerializer(serializers.ModelSerializer):
         ]
     
 
+    def _membros(self, obj):
+        # prefetch `membros` (preparar_queryset) ou uma consulta por projeto, reaproveitada
+        # pelos quatro campos de colaboradores
+        if not hasattr(obj, 'membros'):
+            obj.membros = list(UserProject.objects.filter(project=obj).select_related('user').order_by('id'))
+        return obj.membros
+
     def get_creator_name(self, obj):
-        leader_relation = UserProject.objects.filter(project=obj, role='leader').select_related('user').first()
+        leader_relation = next((up for up in self._membros(obj) if up.role == 'leader'), None)
         return leader_relation.user.full_name if leader_relation else None
 
     def get_collaborators_info(self, obj):
-        user_projects = UserProject.objects.filter(project=obj).select_related('user')
-        return [{'id': up.user.id, 'full_name': up.user.full_name, 'email': up.user.email} for up in user_projects]
+        return [{'id': up.user.id, 'full_name': up.user.full_name, 'email': up.user.email} for up in self._membros(obj)]
 
     collaborators_with_ids = serializers.SerializerMethodField()
     
     def get_collaborators_with_ids(self, obj):
-        user_projects = UserProject.objects.filter(project=obj).select_related('user')
         return [
             {
                 'id': up.user.id,
@@ -83,11 +172,11 @@ class ProjectSerializer(serializers.ModelSerializer):
                 'email': up.user.email,
                 'role': up.role
             } 
-            for up in user_projects
+            for up in self._membros(obj)
         ]
 
     def get_collaborator_count(self, obj):
-        return UserProject.objects.filter(project=obj).count()
+        return len(self._membros(obj))
 
     def validate_phases(self, value):
         if not value:
@@ -130,20 +219,11 @@ class ProjectSerializer(serializers.ModelSerializer):
         phases_data = validated_data.pop('phases', [])
         validated_data.pop('collaborators', []) # Removido pois a lógica está na view
 
-        project = Project.objects.create(**validated_data)
-        
-        # A lógica de associar o criador e colaboradores permanece na view,
-        # mas a criação das fases e tarefas pode ser feita aqui.
-        for phase_name in phases_data:
-            phase_obj, _ = Phase.objects.get_or_create(name=phase_name)
-            project_phase = ProjectPhase.objects.create(project=project, phase=phase_obj)
-            Task.objects.create(
-                project_phase=project_phase,
-                title=phase_name,
-                description=f"Fase inicial do projeto: {phase_name}",
-                is_completed=False,
-                due_date=project.end_date
-            )
+        # A lógica de associar o criador e colaboradores permanece na view;
+        # fases, tarefas principais e subtarefas são criadas em lote pelo bootstrap.
+        with transaction.atomic():
+            project = Project.objects.create(phases=phases_data, **validated_data)
+            criar_estrutura_projeto(project, phases_data)
         return project
     
 class SharedTaskSerializer(serializers.ModelSerializer):
@@ -164,7 +244,14 @@ class SharedTaskSerializer(serializers.ModelSerializer):
         assignee = TaskAssignee.objects.filter(task=obj).select_related('user').first()
         return assignee.user.full_name if assignee else None
     
-class SharedProjectSerializer(serializers.ModelSerializer):
+class SharedProjectSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Usa as anotações/prefetches de projetos_compartilhados_queryset quando presentes
+    (lider_nome, total_colaboradores, membros) e as tarefas agrupadas do contexto;
+    sem elas cai nas consultas por projeto.
+    """
+    campos_expansiveis = ('collaborators', 'tasks')
+
     creator_name = serializers.SerializerMethodField()
     collaborator_count = serializers.SerializerMethodField()
     collaborators = serializers.SerializerMethodField()
@@ -175,14 +262,20 @@ class SharedProjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'creator_name', 'collaborator_count', 'collaborators', 'tasks']
 
     def get_creator_name(self, obj):
+        if hasattr(obj, 'lider_nome'):
+            return obj.lider_nome
         leader_relation = UserProject.objects.filter(project=obj, role='leader').select_related('user').first()
         return leader_relation.user.full_name if leader_relation else None
 
     def get_collaborator_count(self, obj):
+        if hasattr(obj, 'total_colaboradores'):
+            return obj.total_colaboradores
         return UserProject.objects.filter(project=obj).count()
 
     def get_collaborators(self, obj):
-        user_projects = UserProject.objects.filter(project=obj).select_related('user')
+        user_projects = getattr(obj, 'membros', None)
+        if user_projects is None:
+            user_projects = UserProject.objects.filter(project=obj).select_related('user')
         return [{
             'id': up.user.id,
             'full_name': up.user.full_name,
@@ -191,16 +284,22 @@ class SharedProjectSerializer(serializers.ModelSerializer):
         } for up in user_projects]
     
     def get_tasks(self, project):
-        fase_ids = ProjectPhase.objects.filter(project=project).values_list('id', flat=True)
-        tarefas = Task.objects.filter(project_phase_id__in=fase_ids).order_by('due_date')
+        tarefas_por_projeto = self.context.get('tarefas_por_projeto')
+        if tarefas_por_projeto is not None:
+            tarefas = tarefas_por_projeto.get(project.id, [])
+        else:
+            fase_ids = ProjectPhase.objects.filter(project=project).values_list('id', flat=True)
+            tarefas = Task.objects.filter(project_phase_id__in=fase_ids).order_by('-priority', 'due_date').values(
+                'id', 'title', 'is_completed'
+            )
         
         # CONVERTE para o formato que o ViewProject espera
         tarefas_formatadas = []
         for tarefa in tarefas:
             tarefas_formatadas.append({
-                "id": tarefa.id,
-                "nomeTarefa": tarefa.title,  # ← Converte title para nomeTarefa
-                "progresso": 100 if tarefa.is_completed else 0,  # ← Calcula progresso
+                "id": tarefa['id'],
+                "nomeTarefa": tarefa['title'],  # ← Converte title para nomeTarefa
+                "progresso": 100 if tarefa['is_completed'] else 0,  # ← Calcula progresso
                 "subTarefas": []  # ← Pode buscar subtarefas se precisar
             })
         return tarefas_formatadas
@@ -221,7 +320,12 @@ class ProjectPhaseSerializer(serializers.ModelSerializer):
         fields = ['id', 'project', 'phase']
 
 # alterado pra alinhar com o front
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    colunas_por_campo = {'status': ('is_completed',)}
+    prefetch_por_campo = {
+        'responsavel': (Prefetch('taskassignee_set', queryset=TaskAssignee.objects.select_related('user').order_by('id')),),
+    }
+
     nome = serializers.CharField(source='title')
     prazo = serializers.DateTimeField(source='due_date')
     responsavel = serializers.SerializerMethodField()
@@ -232,6 +336,9 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome', 'responsavel', 'prazo', 'status']
 
     def get_responsavel(self, obj):
+        if 'taskassignee_set' in getattr(obj, '_prefetched_objects_cache', {}):
+            atribuicoes = obj.taskassignee_set.all()
+            return atribuicoes[0].user.full_name if atribuicoes else None
         assignee = TaskAssignee.objects.filter(task=obj).select_related('user').first()
         return assignee.user.full_name if assignee else None
 
@@ -270,7 +377,9 @@ class SimpleTaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['title', 'is_completed']
 
-class ProjectWithTasksSerializer(serializers.ModelSerializer):
+class ProjectWithTasksSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    campos_expansiveis = ('tasks',)
+
     tasks = serializers.SerializerMethodField()
 
     class Meta:
@@ -278,10 +387,32 @@ class ProjectWithTasksSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'tasks']
 
     def get_tasks(self, project):
+        # Caminho rápido: a view já buscou as tarefas de todos os projetos numa consulta só
+        tarefas_por_projeto = self.context.get('tarefas_por_projeto')
+        if tarefas_por_projeto is not None:
+            return [
+                {'title': tarefa['title'], 'is_completed': tarefa['is_completed']}
+                for tarefa in tarefas_por_projeto.get(project.id, [])
+            ]
+
         fase_ids = ProjectPhase.objects.filter(project=project).values_list('id', flat=True)
-        tarefas = Task.objects.filter(project_phase__id__in=fase_ids).order_by('due_date')
+        tarefas = Task.objects.filter(project_phase__id__in=fase_ids).order_by('-priority', 'due_date')
         return SimpleTaskSerializer(tarefas, many=True).data
 
+    def to_representation(self, project):
+        data = super().to_representation(project)
+        # Contagens opcionais, calculadas sobre as tarefas já carregadas (sem consulta extra);
+        # sem o campo tasks (?fields=), lidas dos contadores do projeto
+        if self.context.get('incluir_contagens'):
+            tarefas = data.get('tasks')
+            if tarefas is None:
+                data['total_tasks'] = project.total_tasks
+                data['completed_tasks'] = project.completed_tasks
+            else:
+                data['total_tasks'] = len(tarefas)
+                data['completed_tasks'] = sum(1 for tarefa in tarefas if tarefa['is_completed'])
+        return data
+
 class CollaboratorSerializer(serializers.ModelSerializer):
     nome = serializers.CharField(source='user.username')
     email = serializers.EmailField(source='user.email')
@@ -295,10 +426,10 @@ class CollaboratorSerializer(serializers.ModelSerializer):
 class TaskFullInfoSerializer(serializers.ModelSerializer):
     nomeTarefa = serializers.CharField(source='title')
     descricao = serializers.CharField(source='description')
-    prazo = serializers.DateField(source='due_date')
+    prazo = serializers.SerializerMethodField()
     data_inicio = serializers.DateTimeField(source='start_date')
     data_fim = serializers.DateTimeField(source='due_date')
-    status = serializers.CharField(source='status')
+    status = serializers.SerializerMethodField()
     responsavel = serializers.SerializerMethodField()
     subTarefas = serializers.SerializerMethodField()
 
@@ -306,12 +437,27 @@ class TaskFullInfoSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['id', 'nomeTarefa', 'descricao', 'prazo','data_inicio', 'data_fim', 'status', 'responsavel', 'subTarefas']
 
+    def get_prazo(self, obj):
+        return obj.due_date.date().isoformat() if obj.due_date else None
+
+    def get_status(self, obj):
+        return "concluído" if obj.is_completed else "pendente"
+
     def get_responsavel(self, obj):
-        return obj.assignee.username if obj.assignee else None
+        # usa o prefetch de taskassignee_set__user quando houver
+        atribuicoes = obj.taskassignee_set.all()
+        return atribuicoes[0].user.username if atribuicoes else None
 
     def get_subTarefas(self, obj):
-        subtasks = Task.objects.filter(parent_task=obj)
-        return TaskFullInfoSerializer(subtasks, many=True).data
+        # A árvore é montada em memória: os filhos de cada tarefa vêm de uma única
+        # consulta (a subárvore inteira pelo path), compartilhada pelos níveis abaixo
+        filhos = self.context.get('filhos_por_tarefa')
+        contexto = self.context
+        if filhos is None:
+            subarvore = subarvore_queryset(obj).exclude(id=obj.id).order_by('path', '-priority', 'due_date')
+            filhos = agrupar_filhos(subarvore.prefetch_related('taskassignee_set__user'))
+            contexto = {**self.context, 'filhos_por_tarefa': filhos}
+        return TaskFullInfoSerializer(filhos.get(obj.id, []), many=True, context=contexto).data
 
 
 class ProjectWithCollaboratorsAndTasksSerializer(ProjectSerializer):
@@ -327,5 +473,10 @@ class ProjectWithCollaboratorsAndTasksSerializer(ProjectSerializer):
 
     def get_tarefasProjeto(self, project):
         fase_ids = ProjectPhase.objects.filter(project=project).values_list('id', flat=True)
-        tarefas = Task.objects.filter(project_phase_id__in=fase_ids).order_by('due_date')
-        return TaskFullInfoSerializer(tarefas, many=True).data
+        tarefas = list(
+            Task.objects.filter(project_phase_id__in=fase_ids)
+            .order_by('-priority', 'due_date')
+            .prefetch_related('taskassignee_set__user')
+        )
+        contexto = {**self.context, 'filhos_por_tarefa': agrupar_filhos(tarefas)}
+        return TaskFullInfoSerializer(tarefas, many=True, context=contexto).data
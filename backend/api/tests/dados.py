@@ -0,0 +1,14 @@
+from ..benchmarks.massa import gerar_massa
+
+def popular(projetos=10, fases=3, raizes_por_fase=5, subtarefas_por_raiz=3, membros=4, semente=42):
+    """
+    Massa de dados para os testes (o mesmo gerador do comando seed_load): projetos com líder
+    e membros, `raizes_por_fase` tarefas raiz por fase com `subtarefas_por_raiz` subtarefas
+    cada, prazos vencidos e futuros, responsáveis e contadores coerentes.
+    Retorna (usuarios, projetos)
+    """
+    return gerar_massa(
+        usuarios=membros * 2, projetos=projetos, fases=fases,
+        tarefas=projetos * fases * raizes_por_fase * (1 + subtarefas_por_raiz),
+        membros_por_projeto=membros, subtarefas_por_raiz=subtarefas_por_raiz, semente=semente,
+    )
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from ..analytics.analisador_desempenho import AnalisadorDesempenho
+from ..analytics.analise_lote import analisar_projetos
+from ..models import Project, ProjectPhase, Task
+from ..utils.metricas_projeto import contar_atrasadas, montar_metricas
+from .dados import popular
+
+# (início, fim) em dias relativos a agora: prazo vencido, adiantado, no fim, recém-começado...
+DATAS = [(-30, 60), (-90, -10), (-60, 2), (-5, 120), (-45, 10), (-20, 5), (-100, 1), (-10, 300)]
+
+class AnaliseLoteEquivalenteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agora = timezone.now()
+        _, cls.projetos = popular(projetos=len(DATAS) + 1, fases=2, raizes_por_fase=3, subtarefas_por_raiz=2)
+        for projeto, (inicio, fim) in zip(cls.projetos, DATAS):
+            Project.objects.filter(id=projeto.id).update(
+                start_date=cls.agora + timedelta(days=inicio), end_date=cls.agora + timedelta(days=fim),
+            )
+        # o último projeto fica concluído (contadores refeitos na primeira leitura)
+        concluido = cls.projetos[-1]
+        Task.objects.filter(project_phase__project=concluido).update(is_completed=True)
+        Project.objects.filter(id=concluido.id).update(contadores_inicializados=False)
+        ProjectPhase.objects.filter(project=concluido).update(total_tasks=0, completed_tasks=0)
+
+    def test_lote_igual_ao_calculo_individual(self):
+        ids = [projeto.id for projeto in self.projetos]
+        _, metricas_lote, analises_lote = analisar_projetos(ids, self.agora)
+
+        analisador = AnalisadorDesempenho()
+        status = set()
+        for projeto in Project.objects.filter(id__in=ids):
+            with self.subTest(projeto=projeto.id):
+                with mock.patch('api.utils.metricas_projeto.timezone.now', return_value=self.agora):
+                    analise = analisador.analisar_situacao_projeto(projeto.id)
+                projeto.refresh_from_db()
+                metricas = montar_metricas(
+                    projeto.start_date, projeto.end_date, projeto.total_tasks, projeto.completed_tasks,
+                    contar_atrasadas(projeto.id, self.agora), self.agora,
+                )
+                self.assertEqual(metricas_lote[projeto.id], metricas)
+
+                analise['probabilidade_atraso'] = analisador.calcular_probabilidade_atraso(analise)
+                self.assertEqual(analises_lote[projeto.id], analise)
+                status.add(analise['status'])
+        # a massa cobre várias faixas, não só o caso comum
+        self.assertGreaterEqual(len(status), 3, status)
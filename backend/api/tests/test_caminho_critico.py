@@ -0,0 +1,31 @@
+from django.test import TestCase
+from ..analytics.caminho_critico import calcular_caminho_critico
+from ..models import Task, TaskDependency
+from ..utils.contadores import excluir_tarefa
+from .dados import popular
+
+class ExcluirTarefaCaminhoCriticoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, projetos = popular(projetos=1, fases=2, raizes_por_fase=4, subtarefas_por_raiz=2)
+        cls.projeto = projetos[0]
+        tarefas = Task.objects.filter(project_phase__project=cls.projeto)
+        cls.raizes = list(tarefas.filter(parent_task__isnull=True).order_by('id'))
+        # cadeia entre as raízes, mais arestas entrando e saindo das subtarefas da raiz do meio
+        TaskDependency.objects.bulk_create(
+            TaskDependency(task=depois, depends_on=antes)
+            for antes, depois in zip(cls.raizes, cls.raizes[1:])
+        )
+        cls.meio = cls.raizes[3]
+        subtarefa = tarefas.filter(parent_task=cls.meio).first()
+        TaskDependency.objects.bulk_create([
+            TaskDependency(task=subtarefa, depends_on=cls.raizes[0]),
+            TaskDependency(task=cls.raizes[6], depends_on=subtarefa),
+        ])
+        calcular_caminho_critico(cls.projeto.id)
+
+    def test_atualizacao_incremental_igual_ao_recalculo_completo(self):
+        excluir_tarefa(self.meio, self.projeto.id)
+        self.assertFalse(Task.objects.filter(id=self.meio.id).exists())
+        # o recálculo completo não encontra nada para corrigir no que a exclusão deixou em cache
+        self.assertEqual(calcular_caminho_critico(self.projeto.id), [])
@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.utils import timezone
+from ..analytics.analise_lote import buscar_dados_projetos
+from ..models import Project, ProjectPhase, Task
+from ..utils.contadores import alterar_status, inicializar_contadores
+from ..utils.metricas_projeto import calcular_metricas_projeto
+from .dados import popular
+
+def _legado(projeto):
+    """Projeto como ficou logo após a migração: contadores zerados e não inicializados"""
+    Project.objects.filter(id=projeto.id).update(total_tasks=0, completed_tasks=0, contadores_inicializados=False)
+    ProjectPhase.objects.filter(project=projeto).update(total_tasks=0, completed_tasks=0)
+
+class ContadoresNaoInicializadosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, projetos = popular(projetos=2, fases=2, raizes_por_fase=2, subtarefas_por_raiz=2)
+        cls.projeto, cls.outro = projetos
+        cls.tarefas = Task.objects.filter(project_phase__project=cls.projeto)
+        cls.total = cls.tarefas.count()
+        cls.concluidas = cls.tarefas.filter(is_completed=True).count()
+
+    def setUp(self):
+        _legado(self.projeto)
+
+    def assertContadoresCorretos(self):
+        projeto = Project.objects.get(id=self.projeto.id)
+        self.assertTrue(projeto.contadores_inicializados)
+        self.assertEqual((projeto.total_tasks, projeto.completed_tasks), (self.total, self.concluidas))
+        for pp in ProjectPhase.objects.filter(project=self.projeto):
+            tarefas = self.tarefas.filter(project_phase=pp)
+            self.assertEqual(
+                (pp.total_tasks, pp.completed_tasks),
+                (tarefas.count(), tarefas.filter(is_completed=True).count()),
+            )
+
+    def test_inicializar_preenche_so_os_pendentes(self):
+        versao_outro = Project.objects.get(id=self.outro.id).versao
+        self.assertEqual(inicializar_contadores(), 1)
+        self.assertContadoresCorretos()
+        self.assertEqual(Project.objects.get(id=self.outro.id).versao, versao_outro)
+        self.assertEqual(inicializar_contadores(), 0)
+
+    def test_variacao_antes_da_inicializacao_nao_deriva(self):
+        concluida = self.tarefas.filter(is_completed=True).first()
+        alterar_status(concluida, False, self.projeto.id)
+        projeto = Project.objects.get(id=self.projeto.id)
+        # nada de completed_tasks = -1 sobre o 0 da migração
+        self.assertEqual((projeto.total_tasks, projeto.completed_tasks), (0, 0))
+
+        self.concluidas -= 1
+        inicializar_contadores([self.projeto.id])
+        self.assertContadoresCorretos()
+
+    def test_leituras_inicializam_sob_demanda(self):
+        metricas = calcular_metricas_projeto(self.projeto.id)
+        self.assertIsNotNone(metricas)
+        self.assertEqual(metricas['total_tarefas'], self.total)
+        self.assertContadoresCorretos()
+
+        _legado(self.projeto)
+        linhas = buscar_dados_projetos([self.projeto.id], timezone.now())
+        self.assertEqual(linhas[0]['total_tasks'], self.total)
+        self.assertContadoresCorretos()
@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+from ..utils.emails import ClienteEmail, create_invite_email_html, montar_mensagem
+
+class _StubResend(BaseHTTPRequestHandler):
+    """Responde como a API do Resend e anota cada requisição (caminho, porta do cliente, corpo)"""
+    protocol_version = 'HTTP/1.1'  # keep-alive: a mesma conexão atende várias requisições
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requisicoes.append((self.path, self.client_address[1], self.headers['Authorization'], corpo))
+        resposta = json.dumps({'data': [{'id': str(i)} for i in range(len(corpo))]} if isinstance(corpo, list) else {'id': '1'})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta.encode())
+
+    def log_message(self, *args):
+        pass
+
+class ClienteEmailTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _StubResend)
+        cls.servidor.requisicoes = []
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.servidor.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.servidor.requisicoes.clear()
+        self.cliente = ClienteEmail(api_key='chave-teste', api_url=f'{self.url}/emails', max_workers=2)
+        self.addCleanup(self.cliente.fechar)
+
+    def test_lote_em_blocos_de_100_na_url_de_lote_e_mesma_conexao(self):
+        html = create_invite_email_html('Projeto <script>alert(1)</script>', 'Ana & "Bia"')
+        self.assertIsNotNone(self.cliente.enviar('Convite', html, 'noreply@byp.local', ['um@byp.local']))
+        mensagens = [
+            montar_mensagem('Convite', html, 'noreply@byp.local', [f'{i}@byp.local']) for i in range(250)
+        ]
+        respostas = self.cliente.enviar_lote_async(mensagens).result(timeout=10)
+
+        self.assertEqual([len(resposta['data']) for resposta in respostas], [100, 100, 50])
+        caminhos = [caminho for caminho, *_ in self.servidor.requisicoes]
+        self.assertEqual(caminhos, ['/emails', '/emails/batch', '/emails/batch', '/emails/batch'])
+        corpos = [corpo for *_, corpo in self.servidor.requisicoes[1:]]
+        self.assertEqual([corpo[0]['to'] for corpo in corpos], [['0@byp.local'], ['100@byp.local'], ['200@byp.local']])
+        # uma Session, uma conexão keep-alive: todas as requisições saem da mesma porta
+        self.assertEqual(len({porta for _, porta, _, _ in self.servidor.requisicoes}), 1)
+        self.assertEqual({auth for _, _, auth, _ in self.servidor.requisicoes}, {'Bearer chave-teste'})
+
+        enviado = self.servidor.requisicoes[0][3]['html']
+        self.assertIn('Projeto &lt;script&gt;alert(1)&lt;/script&gt;', enviado)
+        self.assertIn('Ana &amp; &quot;Bia&quot;', enviado)
+        self.assertNotIn('<script>', enviado)
+
+    def test_sem_chave_nao_chama_a_api(self):
+        cliente = ClienteEmail(api_key='', api_url=f'{self.url}/emails')
+        self.addCleanup(cliente.fechar)
+        self.assertIsNone(cliente.enviar('Assunto', '<p>oi</p>', 'noreply@byp.local', ['um@byp.local']))
+        self.assertEqual(self.servidor.requisicoes, [])
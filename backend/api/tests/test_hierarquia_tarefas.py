@@ -0,0 +1,34 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from ..models import ProjectRole, Task, UserProject
+from .dados import popular
+
+class MoverTarefaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, (cls.projeto,) = popular(projetos=1, fases=2, raizes_por_fase=2, subtarefas_por_raiz=2)
+        cls.lider = UserProject.objects.get(project=cls.projeto, role=ProjectRole.LEADER).user
+        raizes = Task.objects.filter(project_phase__project=cls.projeto, parent_task=None).order_by('project_phase_id', 'id')
+        cls.tarefa, cls.mesma_fase = raizes[0], raizes[1]
+        cls.outra_fase = raizes.exclude(project_phase_id=cls.tarefa.project_phase_id).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.lider)
+
+    def mover(self, parent_id):
+        return self.client.patch(f'/api/tasks/{self.tarefa.id}/subarvore/', {'parent_id': parent_id}, format='json')
+
+    def test_pai_de_outra_fase_e_recusado(self):
+        resposta = self.mover(self.outra_fase.id)
+        self.assertEqual(resposta.status_code, 400)
+        self.tarefa.refresh_from_db()
+        self.assertEqual((self.tarefa.parent_task_id, self.tarefa.path), (None, '/'))
+
+    def test_move_a_subarvore_dentro_da_fase(self):
+        resposta = self.mover(self.mesma_fase.id)
+        self.assertEqual(resposta.status_code, 200)
+        prefixo = f'/{self.mesma_fase.id}/{self.tarefa.id}/'
+        subtarefas = Task.objects.filter(parent_task=self.tarefa)
+        self.assertTrue(subtarefas.exists())
+        self.assertTrue(all(path == prefixo for path in subtarefas.values_list('path', flat=True)))
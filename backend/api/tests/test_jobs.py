@@ -0,0 +1,53 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Job, JobStatus, User
+from ..utils.jobs import executar_job, purgar_jobs, reivindicar_jobs
+
+class CodigoResetNaFilaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='reset@exemplo.com', username='reset', password='Senha@123')
+
+    def test_codigo_nao_fica_no_banco_depois_do_envio(self):
+        resposta = APIClient().post('/api/auth/send-reset-code/', {'email': self.user.email}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        codigo = cache.get(f"reset_code_{self.user.email}")
+
+        with mock.patch('api.utils.emails.job_enviar_email') as enviar:
+            for job in reivindicar_jobs(limite=10):
+                self.assertTrue(executar_job(job))
+        self.assertIn(codigo, enviar.call_args.kwargs['html_content'])
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.payload, {})
+
+    def test_falha_definitiva_tambem_limpa_o_payload(self):
+        job = Job.objects.create(name='emails.enviar', payload={'html_content': '123456'}, max_attempts=1)
+        with mock.patch('api.utils.emails.job_enviar_email', side_effect=RuntimeError('smtp fora')):
+            executar_job(reivindicar_jobs()[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.payload, {})
+
+class PurgarJobsTests(TestCase):
+    def test_apaga_so_finalizados_antigos(self):
+        antigo = timezone.now() - timedelta(days=30)
+        mantidos = [
+            Job.objects.create(name='emails.enviar', status=JobStatus.PENDING),
+            Job.objects.create(name='emails.enviar', status=JobStatus.DONE),
+            Job.objects.create(name='emails.enviar', status=JobStatus.RUNNING),
+        ]
+        for status in (JobStatus.DONE, JobStatus.FAILED, JobStatus.PENDING):
+            job = Job.objects.create(name='emails.enviar', status=status)
+            Job.objects.filter(id=job.id).update(created_at=antigo)
+            if status == JobStatus.PENDING:
+                mantidos.append(job)
+
+        self.assertEqual(purgar_jobs(timedelta(days=7)), 2)
+        self.assertEqual(set(Job.objects.values_list('id', flat=True)), {job.id for job in mantidos})
@@ -0,0 +1,35 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from ..models import ProjectRole, UserProject
+from ..utils.membros import cache_compartilhado, membro_do_projeto, papeis_do_usuario
+from .dados import popular
+
+class PapeisDoUsuarioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, (cls.projeto,) = popular(projetos=1, fases=1, raizes_por_fase=1, subtarefas_por_raiz=0)
+        cls.vinculo = UserProject.objects.filter(project=cls.projeto, role=ProjectRole.MEMBER).first()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_local_nao_guarda_entre_requisicoes(self):
+        self.assertFalse(cache_compartilhado())
+        self.assertIn(self.projeto.id, papeis_do_usuario(self.vinculo.user_id))
+        # update() não dispara sinal: outro processo também não seria avisado
+        UserProject.objects.filter(id=self.vinculo.id).update(role=ProjectRole.LEADER)
+        self.assertEqual(papeis_do_usuario(self.vinculo.user_id)[self.projeto.id], ProjectRole.LEADER)
+        self.assertIsNone(cache.get(f"membros:{self.vinculo.user_id}"))
+
+    def test_cache_compartilhado_guarda_e_invalida_pelos_sinais(self):
+        with tempfile.TemporaryDirectory() as pasta, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pasta},
+        }):
+            self.assertTrue(cache_compartilhado())
+            with self.assertNumQueries(1):
+                papeis_do_usuario(self.vinculo.user_id)
+                self.assertTrue(membro_do_projeto(self.vinculo.user_id, self.projeto.id))
+            self.vinculo.delete()
+            self.assertFalse(membro_do_projeto(self.vinculo.user_id, self.projeto.id))
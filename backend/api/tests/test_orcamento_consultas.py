@@ -0,0 +1,233 @@
+import time
+from collections import namedtuple
+from datetime import timedelta
+from math import ceil
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .. import urls
+from ..analytics.caminho_critico import calcular_caminho_critico
+from ..models import ProjectPhase, ProjectRole, Task, TaskAssignee, TaskDependency, UserProject
+from ..utils.cache_respostas import cache_respostas
+from .dados import popular
+
+# Orçamento de consultas por rota: o mesmo número exato com 10 e com 500 tarefas por
+# projeto. Um N+1 que volte a aparecer estoura o orçamento na massa grande. Cada chamada
+# roda com os caches limpos (custo frio) e dentro de um savepoint desfeito no fim, para
+# que uma escrita (da rota ou do `preparar` do cenário) não mude o que a próxima encontra.
+# O orçamento pode ser uma função do teste: rotas que fazem, de propósito, uma consulta por
+# fase do projeto, e a exclusão do projeto, que apaga as tarefas em lotes (_lotes_exclusao).
+
+Cenario = namedtuple('Cenario', ['metodo', 'caminho', 'corpo', 'status', 'orcamento', 'preparar'], defaults=[None])
+
+SENHA = 'Senha@123'
+
+def _codigo_reset(teste):
+    cache.set(f"reset_code_{teste.lider.email}", '123456', 600)
+
+def _tarefa_atrasada(teste):
+    Task.objects.filter(id=teste.tarefa.id).update(
+        is_completed=False, due_date=teste.agora - timedelta(days=1), priority=0,
+    )
+
+def _lotes_exclusao(teste):
+    """
+    Consultas do delete() das tarefas que crescem com o projeto: o Collector percorre cada
+    relação (subtarefas, responsáveis, dependências) em lotes do tamanho que o banco aceita
+    e apaga as tarefas de GET_ITERATOR_CHUNK_SIZE em GET_ITERATOR_CHUNK_SIZE ids
+    """
+    total = teste.tarefas_projeto
+    lotes = lambda *campos: ceil(total / max(connection.ops.bulk_batch_size(campos, range(total)), 1))
+    return (
+        lotes(Task._meta.get_field('parent_task'))
+        + lotes(TaskAssignee._meta.get_field('task'))
+        + lotes(TaskDependency._meta.get_field('task'), TaskDependency._meta.get_field('depends_on'))
+        + ceil(total / GET_ITERATOR_CHUNK_SIZE)
+    )
+
+ROTAS = {
+    'register': [Cenario('post', lambda t: '/api/register/', lambda t: {
+        'username': 'novo', 'email': 'novo@exemplo.com', 'password': SENHA, 'full_name': 'Novo',
+    }, 201, 6)],
+    'login': [Cenario('post', lambda t: '/api/login/', lambda t: {'email': t.lider.email, 'password': SENHA}, 200, 1)],
+    'home': [Cenario('get', lambda t: '/api/home/', None, 200, 0)],
+    'projetos': [
+        Cenario('get', lambda t: '/api/projetos/', None, 200, 3),
+        Cenario('get', lambda t: '/api/projetos/?incluir=compartilhados&contagens=1', None, 200, 3),
+        Cenario('get', lambda t: '/api/projetos/?limite=2', None, 200, 4),
+        Cenario('get', lambda t: '/api/projetos/?fields=id,name', None, 200, 2),
+        Cenario('post', lambda t: '/api/projetos/', lambda t: {
+            'name': 'Novo projeto', 'description': 'Carga', 'startDate': t.agora.isoformat(),
+            'endDate': (t.agora + timedelta(days=90)).isoformat(), 'phases': ['Planejamento', 'Execução'],
+            'collaborators': [t.membro.email, 'convidado@exemplo.com'],
+        }, 201, 19),
+    ],
+    'use_terms': [Cenario('get', lambda t: '/api/use_terms/', None, 200, 0)],
+    'politics': [Cenario('get', lambda t: '/api/politics/', None, 200, 0)],
+    'cache-estatisticas': [Cenario('get', lambda t: '/api/cache/estatisticas/', None, 403, 0)],
+    'project-share-with-me': [
+        Cenario('get', lambda t: '/api/projetos/sharewithme/', None, 200, 4),
+        Cenario('get', lambda t: '/api/projetos/sharewithme/?limite=2', None, 200, 4),
+    ],
+    'analisar-projetos-lote': [Cenario('post', lambda t: '/api/projetos/analisar-lote/', lambda t: {}, 200, 2)],
+    'project-collaborators': [
+        Cenario('get', lambda t: f'/api/projetos/{t.projeto.id}/collaborators/', None, 200, 3),
+    ],
+    'project-tasks': [
+        Cenario('get', lambda t: f'/api/projetos/{t.projeto.id}/tasks/', None, 200, 7),
+        Cenario('get', lambda t: f'/api/projetos/{t.projeto.id}/tasks/?limite=20', None, 200, lambda t: 4 + t.fases),
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/tasks/', lambda t: {
+            'title': 'Nova', 'phase_id': t.fase.id, 'assignee_ids': [t.membro.id],
+        }, 201, 10),
+    ],
+    'task-update-status': [
+        Cenario('patch', lambda t: f'/api/tasks/{t.tarefa.id}/', lambda t: {'is_completed': True}, 200, 6),
+        Cenario('patch', lambda t: f'/api/tasks/{t.tarefa.id}/', lambda t: {
+            'prazo': (t.tarefa.due_date + timedelta(days=3)).isoformat(),
+        }, 200, 17),
+    ],
+    'user-config': [
+        Cenario('get', lambda t: '/api/user/', None, 200, 0),
+        Cenario('patch', lambda t: '/api/user/', lambda t: {'full_name': 'Outro nome'}, 200, 3),
+    ],
+    'create-task': [
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/tarefas-novas/', lambda t: {
+            'nome': 'Fase extra', 'responsavel': t.membro.id,
+        }, 201, 13),
+    ],
+    'task-subtree': [
+        Cenario('get', lambda t: f'/api/tasks/{t.tarefa.id}/subarvore/', None, 200, 4),
+        Cenario('patch', lambda t: f'/api/tasks/{t.subtarefa.id}/subarvore/', lambda t: {'parent_id': t.irma.id}, 200, 9),
+    ],
+    'task-dependencies': [
+        Cenario('get', lambda t: f'/api/tasks/{t.tarefa.id}/dependencias/', None, 200, 5),
+        Cenario('post', lambda t: f'/api/tasks/{t.outra_tarefa.id}/dependencias/', lambda t: {'depends_on': t.tarefa.id}, 201, 17),
+        Cenario('delete', lambda t: f'/api/tasks/{t.tarefa.id}/dependencias/', lambda t: {'depends_on': t.tarefa.id}, 404, 6),
+    ],
+    'task-reschedule': [Cenario('post', lambda t: f'/api/tasks/{t.tarefa.id}/reagendar/', None, 200, 14)],
+    'phase-reschedule': [
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/fases/{t.fase.id}/reagendar/', None, 200, 13),
+    ],
+    'task-assign': [Cenario('put', lambda t: f'/api/tasks/{t.tarefa.id}/assign/', lambda t: {'user_id': t.membro.id}, 200, 8)],
+    'create-subtask': [
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/tarefas/{t.tarefa.id}/subtasks/', lambda t: {
+            'nome': 'Nova subtarefa', 'user': t.membro.email,
+        }, 201, 24),
+    ],
+    'send-reset-code': [Cenario('post', lambda t: '/api/auth/send-reset-code/', lambda t: {'email': t.lider.email}, 200, 2)],
+    'verify-reset-code': [
+        Cenario('post', lambda t: '/api/auth/verify-reset-code/', lambda t: {'email': t.lider.email, 'code': '123456'}, 200, 0, _codigo_reset),
+    ],
+    'reset-password': [
+        Cenario('post', lambda t: '/api/auth/reset-password/', lambda t: {
+            'email': t.lider.email, 'code': '123456', 'new_password': SENHA,
+        }, 200, 2, _codigo_reset),
+    ],
+    'project-delete': [Cenario('delete', lambda t: f'/api/projetos/{t.projeto.id}/delete/', None, 200, lambda t: 16 + _lotes_exclusao(t))],
+    'token_refresh': [
+        Cenario('post', lambda t: '/api/token/refresh/', lambda t: {'refresh': str(RefreshToken.for_user(t.lider))}, 200, 1),
+    ],
+    'analisar-projeto': [Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/analisar/', None, 200, 6)],
+    'aplicar-sugestao': [
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/aplicar-sugestao/', lambda t: {'acao': 'priorizar_atrasadas'}, 200, 4,
+                _tarefa_atrasada),
+        Cenario('post', lambda t: f'/api/projetos/{t.projeto.id}/aplicar-sugestao/', lambda t: {'acao': 'balancear_carga'}, 200, 8),
+    ],
+}
+
+# Rotas que dependem de serviço externo (Google) e ficam fora do orçamento
+ROTAS_EXTERNAS = {
+    'google_login': "verifica o token na API do Google",
+    'google_calendar_sync': "chama a API do Google Calendar",
+}
+
+class OrcamentoConsultasMixin:
+    """Roda todos os cenários de ROTAS sobre a massa de `tamanho` (kwargs de popular)"""
+    tamanho = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.agora = timezone.now()
+        _, projetos = popular(**cls.tamanho)
+        # estado de regime: a primeira análise preenche o cache do caminho crítico em lotes
+        calcular_caminho_critico(projetos[0].id)
+        cls.projeto = projetos[0]
+        cls.lider = UserProject.objects.get(project=cls.projeto, role=ProjectRole.LEADER).user
+        cls.lider.set_password(SENHA)
+        cls.lider.save()
+        cls.membro = UserProject.objects.filter(project=cls.projeto, role=ProjectRole.MEMBER).first().user
+        raizes = list(Task.objects.filter(project_phase__project=cls.projeto, parent_task=None).order_by('id'))
+        cls.tarefa, cls.outra_tarefa = raizes[0], raizes[-1]
+        cls.subtarefa = Task.objects.filter(parent_task=cls.tarefa).first()
+        # outra subtarefa da mesma raiz: destino de movimentação na mesma fase
+        cls.irma = Task.objects.filter(parent_task=cls.tarefa).exclude(id=cls.subtarefa.id).first()
+        cls.fase = ProjectPhase.objects.get(id=cls.tarefa.project_phase_id)
+        cls.fases = ProjectPhase.objects.filter(project=cls.projeto).count()
+        cls.tarefas_projeto = Task.objects.filter(project_phase__project=cls.projeto).count()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.medicoes = []
+
+    @classmethod
+    def tearDownClass(cls):
+        print(f"\n{cls.__name__}: consultas e tempo por rota")
+        for nome, metodo, caminho, consultas, ms in cls.medicoes:
+            print(f"  {nome:<26} {metodo.upper():<6} {consultas:>4} consultas {ms:>8.1f} ms  {caminho}")
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.lider)
+
+    def executar(self, nome, cenario):
+        ponto = transaction.savepoint()
+        try:
+            cache.clear()
+            cache_respostas().clear()
+            if cenario.preparar:
+                cenario.preparar(self)
+            caminho = cenario.caminho(self)
+            corpo = cenario.corpo(self) if cenario.corpo else None
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                resposta = getattr(self.client, cenario.metodo)(caminho, corpo, format='json')
+                ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            transaction.savepoint_rollback(ponto)
+
+        self.medicoes.append((nome, cenario.metodo, caminho, len(consultas), ms))
+        return resposta, consultas
+
+    def test_orcamento_por_rota(self):
+        for nome, cenarios in ROTAS.items():
+            for cenario in cenarios:
+                with self.subTest(rota=nome, metodo=cenario.metodo, caminho=cenario.caminho(self)):
+                    resposta, consultas = self.executar(nome, cenario)
+                    self.assertEqual(resposta.status_code, cenario.status, getattr(resposta, 'data', resposta.content))
+                    orcamento = cenario.orcamento(self) if callable(cenario.orcamento) else cenario.orcamento
+                    self.assertEqual(
+                        len(consultas), orcamento,
+                        "orçamento de consultas estourado:\n" + "\n".join(q['sql'] for q in consultas),
+                    )
+
+class RotasDeclaradasTests(TestCase):
+    def test_toda_rota_tem_orcamento(self):
+        nomes = {padrao.name for padrao in urls.urlpatterns}
+        self.assertEqual(nomes - set(ROTAS) - set(ROTAS_EXTERNAS), set(), "rotas sem orçamento declarado")
+        self.assertEqual(set(ROTAS) - nomes, set(), "orçamento para rota que não existe")
+
+class OrcamentoPequenoTests(OrcamentoConsultasMixin, TestCase):
+    # 10 tarefas por projeto
+    tamanho = {'projetos': 3, 'fases': 2, 'raizes_por_fase': 1, 'subtarefas_por_raiz': 4}
+
+class OrcamentoGrandeTests(OrcamentoConsultasMixin, TestCase):
+    # 500 tarefas por projeto
+    tamanho = {'projetos': 3, 'fases': 5, 'raizes_por_fase': 20, 'subtarefas_por_raiz': 4}
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from ..models import ProjectRole, Task, UserProject
+from ..utils.cache_respostas import cache_respostas
+from ..utils.paginacao import codificar_cursor
+from .dados import popular
+
+class PaginaTarefasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, (cls.projeto,) = popular(projetos=1, fases=3, raizes_por_fase=3, subtarefas_por_raiz=2)
+        cls.lider = UserProject.objects.get(project=cls.projeto, role=ProjectRole.LEADER).user
+        cls.url = f'/api/projetos/{cls.projeto.id}/tasks/'
+
+    def setUp(self):
+        cache_respostas().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.lider)
+
+    def test_paginas_intercalam_as_fases_na_ordem_de_prazo(self):
+        vistos, cursor = [], None
+        while True:
+            resposta = self.client.get(self.url, {'limite': 4, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(resposta.status_code, 200)
+            vistos += [tarefa['id'] for tarefa in resposta.data['resultados']]
+            cursor = resposta.data['proximo_cursor']
+            if cursor is None:
+                break
+        esperado = Task.objects.filter(project_phase__project=self.projeto).order_by('due_date', 'id')
+        self.assertEqual(vistos, list(esperado.values_list('id', flat=True)))
+
+    def test_cursor_invalido_responde_400_sem_etag(self):
+        for cursor in ('lixo', codificar_cursor(['ontem', 1]), codificar_cursor([1]), codificar_cursor([None, 1])):
+            with self.subTest(cursor=cursor):
+                resposta = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(resposta.status_code, 400)
+                self.assertFalse(resposta.has_header('ETag'))
+                self.assertFalse(resposta.has_header('Cache-Control'))
@@ -0,0 +1,92 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+from ..models import ProjectRole, Task, TaskAssignee, UserProject
+from .dados import popular
+
+# Cada consulta quente tem de ser resolvida por índice. Com poucas linhas o Postgres
+# preferiria varrer a tabela de qualquer jeito, então enable_seqscan fica desligado:
+# se mesmo assim aparecer "Seq Scan", é porque não há índice que sirva.
+
+VARREDURA_COMPLETA = {
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!\s+USING)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+# ORDER BY que o índice não entrega pronto: o banco junta as linhas e ordena antes do LIMIT
+ORDENACAO_EXTRA = {
+    'sqlite': re.compile(r'USE TEMP B-TREE'),
+    'postgresql': re.compile(r'\bSort\b'),
+}
+
+@skipUnless(connection.vendor in VARREDURA_COMPLETA, "EXPLAIN só é interpretado em SQLite e Postgres")
+class PlanosConsultaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios, cls.projetos = popular(projetos=20)
+        cls.projeto = cls.projetos[0]
+        cls.tarefa = Task.objects.filter(project_phase__project=cls.projeto, parent_task=None).first()
+        cls.usuario = UserProject.objects.filter(project=cls.projeto).first().user
+
+    def plano(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertSemVarreduraCompleta(self, queryset, indice=None):
+        plano = self.plano(queryset)
+        varridas = VARREDURA_COMPLETA[connection.vendor].findall(plano)
+        self.assertEqual(varridas, [], f"varredura completa em {varridas}:\n{plano}")
+        if indice:
+            self.assertIn(indice, plano)
+
+    def test_tarefas_atrasadas_do_projeto(self):
+        # contar_atrasadas / métricas: pendentes com prazo vencido
+        self.assertSemVarreduraCompleta(
+            Task.objects.filter(
+                project_phase__project_id=self.projeto.id, is_completed=False, due_date__lt=timezone.now()
+            ),
+            'task_pendentes_due_idx',
+        )
+
+    def test_projetos_do_usuario_por_papel(self):
+        self.assertSemVarreduraCompleta(
+            UserProject.objects.filter(user=self.usuario, role=ProjectRole.LEADER), 'userproject_user_role_idx'
+        )
+
+    def test_lider_do_projeto(self):
+        self.assertSemVarreduraCompleta(
+            UserProject.objects.filter(project=self.projeto, role=ProjectRole.LEADER), 'userproject_project_role_idx'
+        )
+
+    def test_subtarefas(self):
+        # o índice da própria FK parent_task atende
+        self.assertSemVarreduraCompleta(Task.objects.filter(parent_task=self.tarefa))
+
+    def test_atribuicao_da_tarefa(self):
+        self.assertSemVarreduraCompleta(
+            TaskAssignee.objects.filter(task=self.tarefa, user=self.usuario), 'taskassignee_task_user_idx'
+        )
+
+    def test_pagina_de_tarefas_da_fase(self):
+        # ProjectTasksView com ?limite/?cursor: uma consulta por fase, depois do cursor (prazo, id)
+        tarefa = Task.objects.filter(project_phase__project=self.projeto).order_by('due_date', 'id')[5]
+        queryset = (
+            Task.objects
+            .filter(project_phase_id=tarefa.project_phase_id)
+            .filter(Q(due_date__gt=tarefa.due_date) | Q(due_date=tarefa.due_date, id__gt=tarefa.id))
+            .order_by('due_date', 'id')[:21]
+        )
+        self.assertSemVarreduraCompleta(queryset, 'task_phase_due_idx')
+        plano = self.plano(queryset)
+        self.assertIsNone(ORDENACAO_EXTRA[connection.vendor].search(plano), plano)
+
+    def test_quadro_por_fase(self):
+        # ProjectTasksView: tarefas das fases do projeto, mais prioritárias primeiro
+        self.assertSemVarreduraCompleta(
+            Task.objects.filter(project_phase__project_id=self.projeto.id).order_by('-priority', 'due_date')
+        )
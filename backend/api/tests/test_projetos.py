@@ -0,0 +1,36 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from ..models import Project, ProjectPhase, ProjectRole, Task, TaskAssignee, TaskDependency, UserProject
+from .dados import popular
+
+class ExcluirProjetoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        _, (cls.projeto, cls.outro) = popular(projetos=2, fases=2, raizes_por_fase=3, subtarefas_por_raiz=2)
+        cls.lider = UserProject.objects.get(project=cls.projeto, role=ProjectRole.LEADER).user
+        tarefas = list(Task.objects.filter(project_phase__project=cls.projeto).order_by('id')[:2])
+        externa = Task.objects.filter(project_phase__project=cls.outro).first()
+        TaskDependency.objects.bulk_create([
+            TaskDependency(task=tarefas[1], depends_on=tarefas[0]),
+            # arestas entre projetos também saem junto com o projeto excluído
+            TaskDependency(task=externa, depends_on=tarefas[0]),
+            TaskDependency(task=tarefas[0], depends_on=externa),
+        ])
+
+    def test_exclui_tarefas_responsaveis_e_dependencias(self):
+        tarefas = Task.objects.filter(project_phase__project=self.projeto)
+        ids = list(tarefas.values_list('id', flat=True))
+        self.assertTrue(TaskAssignee.objects.filter(task_id__in=ids).exists())
+        tarefas_outro = Task.objects.filter(project_phase__project=self.outro).count()
+
+        client = APIClient()
+        client.force_authenticate(self.lider)
+        resposta = client.delete(f'/api/projetos/{self.projeto.id}/delete/')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(Project.objects.filter(id=self.projeto.id).exists())
+        self.assertFalse(ProjectPhase.objects.filter(project_id=self.projeto.id).exists())
+        self.assertFalse(Task.objects.filter(id__in=ids).exists())
+        self.assertFalse(TaskAssignee.objects.filter(task_id__in=ids).exists())
+        self.assertFalse(TaskDependency.objects.exists())
+        self.assertEqual(Task.objects.filter(project_phase__project=self.outro).count(), tarefas_outro)
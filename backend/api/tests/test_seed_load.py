@@ -0,0 +1,19 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from ..models import Project, User
+
+class SeedLoadTests(TestCase):
+    def test_projeto_sem_membros_e_recusado(self):
+        with self.assertRaisesMessage(CommandError, '--membros'):
+            call_command('seed_load', users=3, projects=1, tasks=4, membros=0, prefixo='semlider')
+        self.assertFalse(User.objects.filter(email__startswith='semlider').exists())
+
+    def test_gera_a_massa_pedida(self):
+        call_command(
+            'seed_load', users=4, projects=2, phases=2, tasks=12, membros=2, subtarefas=2,
+            prefixo='pequena', stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.filter(email__startswith='pequena').count(), 4)
+        self.assertEqual(sum(Project.objects.values_list('total_tasks', flat=True)), 12)
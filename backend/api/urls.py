@@ -20,6 +20,9 @@ from api.views.task_views import (
     TaskUpdateStatusView,
     CreateTaskView,
     CreateSubtaskView,
+    TaskSubtreeView,
+    ReagendarTarefasView,
+    TaskDependenciesView,
 )
 from api.views.google_views import GoogleCalendarSyncView
 from api.views.utility_views import (
@@ -27,9 +30,11 @@ from api.views.utility_views import (
     UserConfigurationView, 
     TermsView, 
     PoliticsView,
+    CacheEstatisticasView,
 )
 from api.views.analise_inteligente_views import (
     AnalisarProjetoView,
+    AnalisarProjetosLoteView,
     AplicarSugestaoView
 )
 
@@ -41,14 +46,21 @@ urlpatterns = [
     path('projetos/', ProjectView.as_view(), name='projetos'),
     path('use_terms/', TermsView.as_view(), name='use_terms'),
     path('politics/', PoliticsView.as_view(), name='politics'),
+    path('cache/estatisticas/', CacheEstatisticasView.as_view(), name='cache-estatisticas'),
     path('projetos/sharewithme/', ProjectShareWithMeView.as_view(), name='project-share-with-me'),
 
+    path('projetos/analisar-lote/', AnalisarProjetosLoteView.as_view(), name='analisar-projetos-lote'),
+
     # Rotas dinâmicas
     path('projetos/<int:project_id>/collaborators/', ProjectCollaboratorsView.as_view(), name='project-collaborators'),
     path('projetos/<int:project_id>/tasks/', ProjectTasksView.as_view(), name='project-tasks'),
     path('tasks/<int:pk>/', TaskUpdateStatusView.as_view(), name='task-update-status'),
     path('user/', UserConfigurationView.as_view(), name='user-config'),
     path('projetos/<int:project_id>/tarefas-novas/', CreateTaskView.as_view(), name='create-task'),
+    path('tasks/<int:task_id>/subarvore/', TaskSubtreeView.as_view(), name='task-subtree'),
+    path('tasks/<int:task_id>/dependencias/', TaskDependenciesView.as_view(), name='task-dependencies'),
+    path('tasks/<int:task_id>/reagendar/', ReagendarTarefasView.as_view(), name='task-reschedule'),
+    path('projetos/<int:project_id>/fases/<int:phase_id>/reagendar/', ReagendarTarefasView.as_view(), name='phase-reschedule'),
     path('tasks/<int:task_id>/assign/', TaskAssignView.as_view(), name='task-assign'),
     path('projetos/<int:project_id>/tarefas/<int:task_id>/subtasks/', CreateSubtaskView.as_view(), name='create-subtask'),
 
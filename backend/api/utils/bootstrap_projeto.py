@@ -0,0 +1,77 @@
+from datetime import timedelta
+from django.db import transaction
+from ..models import ProjectPhase, Task
+from .catalogo_fases import resolver_ids_fases
+from .contadores import ajustar_contadores
+
+# Subtarefas criadas automaticamente dentro da tarefa principal de cada fase
+SUBTAREFAS_PADRAO = (
+    "Planejar {fase}",
+    "Executar {fase}",
+    "Revisar {fase}",
+    "Finalizar {fase}",
+)
+
+def distribuir_periodo(inicio, fim, quantidade):
+    """Divide o período [inicio, fim] em `quantidade` janelas de mesma duração (em dias)"""
+    if quantidade <= 0:
+        return []
+    dias_por_janela = (fim - inicio).days / quantidade
+    return [
+        (inicio + timedelta(days=i * dias_por_janela), inicio + timedelta(days=(i + 1) * dias_por_janela))
+        for i in range(quantidade)
+    ]
+
+@transaction.atomic
+def criar_estrutura_projeto(project, fases):
+    """
+    Monta em memória a árvore fase -> tarefa principal -> subtarefas do projeto
+    e grava com um bulk_create por nível, tudo na mesma transação.
+    Retorna as tarefas principais criadas (uma por fase).
+    """
+    if not fases:
+        return []
+
+    ids_fases = resolver_ids_fases(fases)
+
+    # 1 dia de antecedência em relação ao fim do projeto
+    janelas = distribuir_periodo(project.start_date, project.end_date - timedelta(days=1), len(fases))
+
+    project_phases = ProjectPhase.objects.bulk_create([
+        # contadores já nascem preenchidos: tarefa principal + subtarefas padrão
+        ProjectPhase(project=project, phase_id=ids_fases[nome], total_tasks=1 + len(SUBTAREFAS_PADRAO))
+        for nome in fases
+    ])
+
+    principais = Task.objects.bulk_create([
+        Task(
+            project_phase=project_phase,
+            title=nome,
+            description=f"Fase: {nome}",
+            is_completed=False,
+            start_date=inicio,
+            due_date=fim,
+            complexidade=3.0,
+        )
+        for project_phase, nome, (inicio, fim) in zip(project_phases, fases, janelas)
+    ])
+
+    subtarefas = []
+    for principal, nome in zip(principais, fases):
+        titulos = [modelo.format(fase=nome) for modelo in SUBTAREFAS_PADRAO]
+        for titulo, (inicio, fim) in zip(titulos, distribuir_periodo(principal.start_date, principal.due_date, len(titulos))):
+            subtarefas.append(Task(
+                project_phase_id=principal.project_phase_id,
+                parent_task=principal,
+                path=f"/{principal.id}/",
+                title=titulo,
+                description=f"Subtarefa: {titulo}",
+                is_completed=False,
+                start_date=inicio,
+                due_date=fim,
+                complexidade=2.0,
+            ))
+    Task.objects.bulk_create(subtarefas)
+    ajustar_contadores(project.id, total=len(principais) + len(subtarefas))
+
+    return principais
@@ -0,0 +1,118 @@
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import status
+from rest_framework.response import Response
+
+# Cache dos payloads já serializados das leituras mais repetidas (quadro do projeto,
+# colaboradores, listas de projetos). A chave leva a `versao` do projeto: quem escreve
+# só incrementa a versão (incrementar_versao) e as chaves antigas nunca mais são lidas;
+# saem pelo LRU quando o limite de memória aperta.
+
+ALIAS = 'respostas'
+
+# Estado compartilhado por nome de cache, como o _caches do LocMemCache
+# (o Django cria uma instância do backend por thread)
+_estados = {}
+
+def _novo_estado():
+    return {'hits': 0, 'misses': 0, 'bytes': 0, 'tamanhos': {}}
+
+class CacheLRULimitado(LocMemCache):
+    """
+    LocMemCache com limite em bytes (OPTIONS['MAX_BYTES']) além do MAX_ENTRIES:
+    ao passar do limite, descarta as entradas usadas há mais tempo, uma a uma.
+    Conta hits e misses para estatisticas()
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        opcoes = params.get('OPTIONS') or {}
+        self._max_bytes = int(opcoes.get('MAX_BYTES', 32 * 1024 * 1024))
+        self._estado = _estados.setdefault(name, _novo_estado())
+
+    def get(self, key, default=None, version=None):
+        ausente = object()
+        valor = super().get(key, ausente, version)
+        with self._lock:
+            self._estado['misses' if valor is ausente else 'hits'] += 1
+        return default if valor is ausente else valor
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._delete(key)
+        # valor maior que o cache inteiro: não guarda (só expulsaria todo o resto)
+        if len(value) > self._max_bytes:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key, last=False)
+        self._expire_info[key] = self.get_backend_timeout(timeout)
+        self._registrar_tamanho(key, len(value))
+        self._despejar()
+
+    def _registrar_tamanho(self, key, tamanho):
+        tamanhos = self._estado['tamanhos']
+        self._estado['bytes'] += tamanho - tamanhos.get(key, 0)
+        tamanhos[key] = tamanho
+
+    def _despejar(self):
+        # o LocMemCache deixa as mais recentes no início: as do fim são as menos usadas
+        while self._cache and (
+            len(self._cache) > self._max_entries or self._estado['bytes'] > self._max_bytes
+        ):
+            self._delete(next(reversed(self._cache)))
+
+    def _cull(self):
+        self._despejar()
+
+    def _delete(self, key):
+        self._estado['bytes'] -= self._estado['tamanhos'].pop(key, 0)
+        return super()._delete(key)
+
+    def incr(self, key, delta=1, version=None):
+        valor = super().incr(key, delta, version)
+        chave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if chave in self._cache:
+                self._registrar_tamanho(chave, len(self._cache[chave]))
+        return valor
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self._estado['tamanhos'].clear()
+            self._estado['bytes'] = 0
+
+    def estatisticas(self):
+        with self._lock:
+            hits, misses = self._estado['hits'], self._estado['misses']
+            return {
+                'hits': hits,
+                'misses': misses,
+                'taxa_acerto': round(hits / (hits + misses), 4) if hits + misses else None,
+                'entradas': len(self._cache),
+                'bytes': self._estado['bytes'],
+                'max_bytes': self._max_bytes,
+            }
+
+    def zerar_estatisticas(self):
+        with self._lock:
+            self._estado.update(hits=0, misses=0)
+
+def cache_respostas():
+    return caches[ALIAS]
+
+def resposta_em_cache(chave, montar_resposta):
+    """
+    Devolve o payload guardado em `chave` ou monta a resposta e guarda o `data`
+    (só respostas 200; erros sempre são montados de novo)
+    """
+    cache = cache_respostas()
+    ausente = object()
+    dados = cache.get(chave, ausente)
+    if dados is not ausente:
+        return Response(dados, status=status.HTTP_200_OK)
+
+    response = montar_resposta()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(chave, response.data)
+    return response
@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from django.db import transaction
+from ..models import Phase
+
+# Cache por processo de nome -> id (Phase.name é único, então o id de um nome nunca muda)
+TAMANHO_MAXIMO_CACHE = 1024
+
+_cache_ids = OrderedDict()
+_lock = threading.Lock()
+
+def _lembrar(ids_por_nome):
+    with _lock:
+        for nome, phase_id in ids_por_nome.items():
+            _cache_ids[nome] = phase_id
+            _cache_ids.move_to_end(nome)
+        while len(_cache_ids) > TAMANHO_MAXIMO_CACHE:
+            _cache_ids.popitem(last=False)  # descarta o menos usado recentemente
+
+def resolver_ids_fases(nomes):
+    """
+    Devolve {nome: phase_id} para todos os nomes, criando as fases que não existem.
+    Nomes já vistos pelo processo saem do cache LRU; os demais custam um SELECT e,
+    se algum faltar, um bulk_create(ignore_conflicts=True) seguido da leitura dos ids
+    (a constraint única resolve a corrida entre requisições concorrentes).
+    """
+    resultado = {}
+    faltando = []
+    with _lock:
+        for nome in dict.fromkeys(nomes):
+            if nome in _cache_ids:
+                _cache_ids.move_to_end(nome)
+                resultado[nome] = _cache_ids[nome]
+            else:
+                faltando.append(nome)
+
+    if faltando:
+        encontrados = dict(Phase.objects.filter(name__in=faltando).values_list('name', 'id'))
+        novos = [nome for nome in faltando if nome not in encontrados]
+        if novos:
+            Phase.objects.bulk_create([Phase(name=nome, description='') for nome in novos], ignore_conflicts=True)
+            encontrados.update(Phase.objects.filter(name__in=novos).values_list('name', 'id'))
+        # Só entra no cache depois do commit: se a transação for desfeita, as fases
+        # criadas nela deixam de existir e o cache não pode guardar esses ids
+        transaction.on_commit(lambda: _lembrar(encontrados))
+        resultado.update(encontrados)
+
+    return resultado
+
+def obter_id_fase(nome):
+    """Atalho para resolver um único nome de fase"""
+    return resolver_ids_fases([nome])[nome]
+
+def limpar_cache():
+    """Esvazia o cache do processo (necessário se fases forem apagadas ou mescladas)"""
+    with _lock:
+        _cache_ids.clear()
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from ..models import Project, ProjectRole, Task, UserProject
+
+def agrupar_tarefas_por_projeto(project_ids):
+    """
+    Busca as tarefas de vários projetos em uma única consulta, já agrupadas por projeto
+    """
+    tarefas_por_projeto = defaultdict(list)
+    if not project_ids:
+        return tarefas_por_projeto
+
+    tarefas = (
+        Task.objects
+        .filter(project_phase__project_id__in=project_ids)
+        .order_by('-priority', 'due_date')
+        .values('id', 'title', 'is_completed', 'project_phase__project_id')
+    )
+    for tarefa in tarefas:
+        tarefas_por_projeto[tarefa.pop('project_phase__project_id')].append(tarefa)
+    return tarefas_por_projeto
+
+def projetos_compartilhados_queryset(user, campos=None):
+    """
+    Projetos em que o usuário é membro, já com o nome do líder e o nº de colaboradores
+    anotados e os colaboradores pré-carregados (para o SharedProjectSerializer).
+    Com `campos` (?fields=), só entram as anotações/prefetches desses campos
+    """
+    def pedido(nome):
+        return campos is None or nome in campos
+
+    projetos = (
+        Project.objects
+        .filter(id__in=UserProject.objects.filter(user=user, role=ProjectRole.MEMBER).values('project_id'))
+        .only('id', 'name')
+        .order_by('id')
+    )
+    if pedido('creator_name'):
+        lider = (
+            UserProject.objects
+            .filter(project=OuterRef('pk'), role=ProjectRole.LEADER)
+            .order_by('id')
+            .values('user__full_name')[:1]
+        )
+        projetos = projetos.annotate(lider_nome=Subquery(lider))
+    if pedido('collaborator_count'):
+        projetos = projetos.annotate(total_colaboradores=Count('userproject'))
+    if pedido('collaborators'):
+        projetos = projetos.prefetch_related(
+            Prefetch('userproject_set', queryset=UserProject.objects.select_related('user'), to_attr='membros')
+        )
+    return projetos
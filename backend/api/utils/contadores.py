@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from ..analytics.caminho_critico import atualizar_caminho_critico
+from ..models import Project, ProjectPhase, Task, TaskDependency
+from .hierarquia_tarefas import subarvore_queryset
+
+def ajustar_contadores(project_id, project_phase_id=None, total=0, concluidas=0):
+    """
+    Soma a variação nos contadores do projeto (e da fase, se informada) com UPDATEs
+    atômicos via F(), sem ler o valor atual; requisições concorrentes não se sobrescrevem
+    """
+    if not total and not concluidas:
+        return
+    variacao = {
+        'total_tasks': F('total_tasks') + total,
+        'completed_tasks': F('completed_tasks') + concluidas,
+    }
+    # contador ainda não inicializado fica como está: a variação somada a um 0 de mentira
+    # daria contagens erradas (ou negativas), e inicializar_contadores conta tudo depois
+    if project_phase_id is not None:
+        ProjectPhase.objects.filter(id=project_phase_id, project__contadores_inicializados=True).update(**variacao)
+    # a versão do projeto (ETag) sobe no mesmo UPDATE dos contadores
+    Project.objects.filter(id=project_id).update(versao=F('versao') + 1, **{
+        campo: Case(When(contadores_inicializados=True, then=expressao), default=F(campo), output_field=IntegerField())
+        for campo, expressao in variacao.items()
+    })
+
+def _contagem(filtro, **condicao):
+    """Subconsulta COUNT das tarefas do projeto/fase da linha externa (0 quando não há)"""
+    return Coalesce(
+        Subquery(
+            Task.objects.filter(**{filtro: OuterRef('pk')}, **condicao).order_by()
+            .values(filtro).annotate(n=Count('id')).values('n'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+@transaction.atomic
+def inicializar_contadores(project_ids=None):
+    """
+    Preenche com COUNT os contadores dos projetos (e das fases) que ainda não foram
+    inicializados; None = todos. Cada projeto é preenchido uma vez só. Retorna quantos
+    """
+    pendentes = Project.objects.filter(contadores_inicializados=False)
+    if project_ids is not None:
+        pendentes = pendentes.filter(id__in=project_ids)
+    ids = list(pendentes.values_list('id', flat=True))
+    if not ids:
+        return 0
+    ProjectPhase.objects.filter(project_id__in=ids).update(
+        total_tasks=_contagem('project_phase'),
+        completed_tasks=_contagem('project_phase', is_completed=True),
+    )
+    return Project.objects.filter(id__in=ids, contadores_inicializados=False).update(
+        total_tasks=_contagem('project_phase__project'),
+        completed_tasks=_contagem('project_phase__project', is_completed=True),
+        contadores_inicializados=True,
+        versao=F('versao') + 1,
+    )
+
+def garantir_contadores(projetos):
+    """
+    Para leituras que já têm os Project carregados: inicializa os que faltam e recarrega
+    os contadores deles. Sem consulta quando todos já estão inicializados
+    """
+    faltando = {p.id: p for p in projetos if not p.contadores_inicializados}
+    if not faltando:
+        return
+    inicializar_contadores(list(faltando))
+    for linha in Project.objects.filter(id__in=faltando).values('id', 'total_tasks', 'completed_tasks', 'versao'):
+        projeto = faltando[linha['id']]
+        projeto.total_tasks, projeto.completed_tasks = linha['total_tasks'], linha['completed_tasks']
+        projeto.versao = linha['versao']
+        projeto.contadores_inicializados = True
+
+def registrar_criacao(task, project_id):
+    """Conta uma tarefa recém-criada na fase e no projeto"""
+    ajustar_contadores(project_id, task.project_phase_id, total=1, concluidas=1 if task.is_completed else 0)
+
+@transaction.atomic
+def alterar_status(task, is_completed, project_id):
+    """
+    Grava o novo status com um UPDATE condicional e só mexe nos contadores se a linha
+    realmente mudou (duas requisições marcando a mesma tarefa não contam em dobro)
+    """
+    alterou = Task.objects.filter(id=task.id, is_completed=not is_completed).update(is_completed=is_completed)
+    task.is_completed = is_completed
+    if alterou:
+        ajustar_contadores(project_id, task.project_phase_id, concluidas=1 if is_completed else -1)
+    return bool(alterou)
+
+@transaction.atomic
+def excluir_tarefa(task, project_id):
+    """
+    Exclui a tarefa (as subtarefas vão em cascata) descontando todas elas dos contadores.
+    As dependências da subárvore vão junto, então as tarefas que estavam do outro lado
+    dessas arestas têm o caminho crítico recalculado
+    """
+    subarvore = subarvore_queryset(task)
+    contagens = list(
+        subarvore
+        .values('project_phase_id')
+        .annotate(total=Count('id'), concluidas=Count('id', filter=Q(is_completed=True)))
+    )
+    removidas = set(subarvore.values_list('id', flat=True))
+    vizinhas = set()
+    for antes, depois in TaskDependency.objects.filter(
+        Q(task_id__in=removidas) | Q(depends_on_id__in=removidas)
+    ).values_list('depends_on_id', 'task_id'):
+        vizinhas.update((antes, depois))
+    task.delete()
+    atualizar_caminho_critico(project_id, vizinhas - removidas)
+    for contagem in contagens:
+        ajustar_contadores(
+            project_id, contagem['project_phase_id'],
+            total=-contagem['total'], concluidas=-contagem['concluidas'],
+        )
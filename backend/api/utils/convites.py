@@ -0,0 +1,43 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from ..models import ProjectInvite, ProjectRole, UserProject
+from .membros import invalidar_membros
+from .versionamento import incrementar_versao
+
+# Mesmo prazo que os convites tinham no cache
+VALIDADE_CONVITE = timedelta(days=7)
+
+def registrar_convites(project, emails, invited_by=None):
+    """Grava os convites do projeto em um único INSERT; reconvidar renova o prazo"""
+    if not emails:
+        return
+    ProjectInvite.objects.bulk_create(
+        [ProjectInvite(email=email, project=project, invited_by=invited_by) for email in dict.fromkeys(emails)],
+        update_conflicts=True,
+        unique_fields=['email', 'project'],
+        update_fields=['invited_by', 'created_at'],
+    )
+
+@transaction.atomic
+def aceitar_convites_pendentes(user):
+    """
+    Transforma os convites válidos do email do usuário em vínculos de membro
+    (um bulk_create) e apaga todos os convites desse email. Retorna quantos vínculos criou.
+    """
+    convites = ProjectInvite.objects.filter(email=user.email)
+    project_ids = set(
+        convites.filter(created_at__gte=timezone.now() - VALIDADE_CONVITE).values_list('project_id', flat=True)
+    )
+    project_ids -= set(
+        UserProject.objects.filter(user=user, project_id__in=project_ids).values_list('project_id', flat=True)
+    )
+
+    UserProject.objects.bulk_create([
+        UserProject(user=user, project_id=project_id, role=ProjectRole.MEMBER) for project_id in project_ids
+    ])
+    incrementar_versao(*project_ids)
+    if project_ids:
+        invalidar_membros(user.id)
+    convites.delete()
+    return len(project_ids)
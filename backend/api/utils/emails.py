@@ -0,0 +1,378 @@
+import html
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+class TemplateEmail:
+    """
+    Template HTML compilado uma única vez por processo: o texto é quebrado em partes fixas
+    e nomes de campos ($campo), então renderizar só junta as partes com os valores escapados
+    """
+    _CAMPO = re.compile(r'\$(\w+)')
+
+    def __init__(self, texto):
+        partes = self._CAMPO.split(texto)
+        self._fixas = partes[0::2]
+        self._campos = partes[1::2]
+
+    def renderizar(self, **valores):
+        saida = [self._fixas[0]]
+        for campo, fixa in zip(self._campos, self._fixas[1:]):
+            saida.append(html.escape(str(valores[campo])))
+            saida.append(fixa)
+        return ''.join(saida)
+
+TEMPLATE_CONVITE = TemplateEmail("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {
+            font-family: 'Arial', sans-serif;
+            background-color: #f4f4f4;
+            margin: 0;
+            padding: 20px;
+        }
+        .container {
+            max-width: 600px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 15px;
+            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .header {
+            background: linear-gradient(166deg, #8474a1 0%, #86b6a3 100%);
+            color: white;
+            padding: 40px 30px;
+            text-align: center;
+        }
+        .logo-container {
+            margin-bottom: 15px;
+        }
+        .logo {
+            font-size: 32px;
+            font-weight: bold;
+            margin-bottom: 10px;
+        }
+        .content {
+            padding: 40px 30px;
+            color: #383560;
+            line-height: 1.6;
+        }
+        .highlight {
+            background: #c1d5cd;
+            border: 2px dashed #58917a;
+            border-radius: 10px;
+            padding: 20px;
+            font-size: 20px;
+            font-weight: bold;
+            text-align: center;
+            color: #045a5c;
+            margin: 25px 0;
+        }
+        .cta-button {
+            background: linear-gradient(45deg, #86b6a3, #58917a);
+            color: white;
+            padding: 15px 30px;
+            text-decoration: none;
+            border-radius: 8px;
+            display: inline-block;
+            margin: 20px 0;
+            font-weight: bold;
+            font-size: 16px;
+        }
+        .footer {
+            background: #c8c1d4;
+            padding: 25px;
+            text-align: center;
+            color: #383560;
+            font-size: 14px;
+        }
+        .footer-image {
+            display: block;
+            margin: 15px auto;
+            max-width: 200px;
+            height: auto;
+        }
+        .brand-text {
+            font-size: 20px;
+            font-weight: bold;
+            color: #5b4584;
+            margin: 15px 0;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="logo-container">
+                <div class="logo">BuildYourProject</div>
+            </div>
+            <div style="font-size: 18px;">Convite para Colaboração</div>
+        </div>
+        
+        <div class="content">
+            <h2 style="color: #5b4584; margin-top: 0;">Olá!</h2>
+            <p>Você recebeu um convite especial para colaborar em um projeto!</p>
+            
+            <div class="highlight">
+                <strong>$inviter_name</strong> convidou você para colaborar no projeto:<br>
+                <strong style="font-size: 24px;">"$project_name"</strong>
+            </div>
+            
+            <p>Para aceitar este convite e começar a colaborar:</p>
+            
+            <div style="text-align: center;">
+                <a href="https://buildyourproject-front.onrender.com/" class="cta-button">
+                    🚀 Acessar a Plataforma
+                </a>
+            </div>
+            
+            <p style="color: #54969a; font-size: 14px; margin-top: 20px;">
+                <strong>💡 Dica:</strong> Se você ainda não tem uma conta, 
+                registre-se usando este e-mail para ter acesso imediato ao projeto.
+            </p>
+        </div>
+        
+        <div class="footer">
+            <p>Atenciosamente,<br>
+            <strong>Equipe BuildYourProject</strong></p>
+            <div class="brand-text">BuildYourProject</div>
+            
+            <p style="margin-top: 15px; font-size: 12px; color: #5b4584;">
+                © 2025 BuildYourProject. Todos os direitos reservados.
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+TEMPLATE_RESET_SENHA = TemplateEmail("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {
+            font-family: 'Arial', sans-serif;
+            background-color: #f4f4f4;
+            margin: 0;
+            padding: 20px;
+        }
+        .container {
+            max-width: 600px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 15px;
+            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .header {
+            background: linear-gradient(166deg, #8474a1 0%, #86b6a3 100%);
+            color: white;
+            padding: 40px 30px;
+            text-align: center;
+        }
+        .logo-container {
+            margin-bottom: 15px;
+        }
+        .logo {
+            font-size: 32px;
+            font-weight: bold;
+            margin-bottom: 10px;
+        }
+        .content {
+            padding: 40px 30px;
+            color: #383560;
+            line-height: 1.6;
+        }
+        .code {
+            background: #c1d5cd;
+            border: 2px dashed #58917a;
+            border-radius: 10px;
+            padding: 25px;
+            font-size: 36px;
+            font-weight: bold;
+            text-align: center;
+            color: #045a5c;
+            margin: 25px 0;
+            letter-spacing: 5px;
+        }
+        .footer {
+            background: #c8c1d4;
+            padding: 25px;
+            text-align: center;
+            color: #383560;
+            font-size: 14px;
+        }
+        .footer-image {
+            display: block;
+            margin: 15px auto;
+            max-width: 200px;
+            height: auto;
+        }
+        .info-text {
+            color: #54969a;
+            font-size: 14px;
+            margin-top: 10px;
+        }
+        .brand-text {
+            font-size: 20px;
+            font-weight: bold;
+            color: #5b4584;
+            margin: 15px 0;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="logo-container">
+                <div class="logo">BuildYourProject</div>
+            </div>
+            <div style="font-size: 18px;">Redefinição de Senha</div>
+        </div>
+        
+        <div class="content">
+            <h2 style="color: #5b4584; margin-top: 0;">Olá!</h2>
+            <p>Você solicitou a redefinição de sua senha no <strong style="color: #8474a1;">BuildYourProject</strong>.</p>
+            
+            <p>Seu código de verificação é:</p>
+            <div class="code">$code</div>
+            
+            <p class="info-text"><strong>⚠️ Este código expira em 10 minutos.</strong></p>
+            
+            <p>Se você não solicitou esta redefinição, ignore este email.</p>
+        </div>
+        
+        <div class="footer">
+            <p>Atenciosamente,<br>
+            <strong>Equipe BuildYourProject</strong></p>
+        
+            <img src="https://github.com/GreenBerries-BYP/BuildYourProject-front/blob/main/BYP_logo_slogan.png?raw=true" alt="BuildYourProject" class="footer-image"> 
+            
+            <p style="margin-top: 15px; font-size: 12px; color: #5b4584;">
+                © 2025 BuildYourProject. Todos os direitos reservados.
+            </p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+def create_invite_email_html(project_name, inviter_name):
+    """Cria o template HTML personalizado para o email de convite"""
+    return TEMPLATE_CONVITE.renderizar(project_name=project_name, inviter_name=inviter_name)
+
+def create_reset_email_html(code):
+    """Cria o template HTML personalizado para o email de reset"""
+    return TEMPLATE_RESET_SENHA.renderizar(code=code)
+
+def montar_mensagem(subject, html_content, from_email, recipient_list):
+    """Mensagem no formato da API do Resend"""
+    return {
+        "from": from_email,
+        "to": recipient_list,
+        "subject": subject,
+        "html": html_content,
+    }
+
+class ClienteEmail:
+    """
+    Cliente da API do Resend compartilhado pelo processo: uma requests.Session com
+    conexões keep-alive, um pool limitado de threads para envios em segundo plano e
+    envio em lote pelo endpoint /emails/batch. As URLs podem apontar para um stub local.
+    """
+    TAMANHO_MAXIMO_LOTE = 100  # limite do endpoint de lote do Resend
+
+    def __init__(self, api_key=None, api_url=None, batch_url=None, max_workers=4, timeout=10):
+        self.api_key = api_key if api_key is not None else os.environ.get('RESEND_API_KEY')
+        self.api_url = api_url or os.environ.get('RESEND_API_URL', 'https://api.resend.com/emails')
+        self.batch_url = batch_url or os.environ.get('RESEND_BATCH_URL', self.api_url.rstrip('/') + '/batch')
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='email')
+
+    def _post(self, url, payload):
+        if not self.api_key:
+            print("❌ RESEND_API_KEY não encontrada")
+            return None
+        try:
+            response = self.session.post(url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f" ERRO API: {str(e)}")
+            return None
+
+        if response.status_code == 200:
+            return response.json()
+        print(f"ERRO RESEND ({response.status_code}): {response.text}")
+        return None
+
+    def enviar(self, subject, html_content, from_email, recipient_list):
+        """Envia um email e devolve a resposta do Resend (ou None em caso de erro)"""
+        return self._post(self.api_url, montar_mensagem(subject, html_content, from_email, recipient_list))
+
+    def enviar_lote(self, mensagens):
+        """Envia várias mensagens com uma requisição por bloco de até 100; devolve as respostas"""
+        respostas = []
+        for inicio in range(0, len(mensagens), self.TAMANHO_MAXIMO_LOTE):
+            respostas.append(self._post(self.batch_url, mensagens[inicio:inicio + self.TAMANHO_MAXIMO_LOTE]))
+        return respostas
+
+    def enviar_async(self, *args):
+        return self._executor.submit(self.enviar, *args)
+
+    def enviar_lote_async(self, mensagens):
+        return self._executor.submit(self.enviar_lote, list(mensagens))
+
+    def fechar(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+def obter_cliente_email():
+    """Cliente único por processo (criado no primeiro uso)"""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            _cliente = ClienteEmail(max_workers=int(os.environ.get('EMAIL_WORKERS', 4)))
+        return _cliente
+
+def enviar_email_async(subject, html_content, from_email, recipient_list):
+    """Envia em segundo plano pelo pool do cliente compartilhado"""
+    return obter_cliente_email().enviar_async(subject, html_content, from_email, recipient_list)
+
+class FalhaEnvioEmail(Exception):
+    """Levantada pelos handlers de job para que o envio volte para a fila"""
+
+def job_enviar_email(subject, html_content, from_email, recipient_list):
+    """Handler do job 'emails.enviar' (executado pelo runworker)"""
+    if obter_cliente_email().enviar(subject, html_content, from_email, recipient_list) is None:
+        raise FalhaEnvioEmail(f"Falha ao enviar email para {recipient_list}")
+
+def job_enviar_lote(subject, html_content, from_email, destinatarios):
+    """
+    Handler do job 'emails.enviar_lote': a mesma mensagem, um email por destinatário.
+    Quem enfileira divide os destinatários em blocos de TAMANHO_MAXIMO_LOTE, então
+    cada job é uma única requisição de lote e uma nova tentativa não reenvia outros blocos.
+    """
+    mensagens = [montar_mensagem(subject, html_content, from_email, [email]) for email in destinatarios]
+    if any(resposta is None for resposta in obter_cliente_email().enviar_lote(mensagens)):
+        raise FalhaEnvioEmail(f"Falha ao enviar lote para {len(destinatarios)} destinatários")
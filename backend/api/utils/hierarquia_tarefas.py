@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Substr
+from ..models import Task
+from .versionamento import incrementar_versao
+
+# Task.path guarda a cadeia de ancestrais da tarefa: "/" para tarefas raiz,
+# "/12/" para filhas da 12, "/12/40/" para netas... A subárvore de uma tarefa é
+# ela mesma + todas as tarefas cujo path começa com o prefixo dos filhos dela.
+
+def caminho_filhos(task):
+    """Path que os filhos diretos da tarefa recebem"""
+    return f"{task.path}{task.id}/"
+
+def profundidade(path):
+    """0 para tarefas raiz, 1 para subtarefas, ..."""
+    return path.count('/') - 1
+
+def subarvore_queryset(task):
+    """A tarefa e todos os descendentes, em uma consulta (busca por prefixo no índice de path)"""
+    return Task.objects.filter(Q(id=task.id) | Q(path__startswith=caminho_filhos(task)))
+
+def agrupar_filhos(tarefas):
+    """{parent_task_id: [filhos na ordem recebida]} para montar a árvore em memória"""
+    filhos = defaultdict(list)
+    for tarefa in tarefas:
+        filhos[tarefa.parent_task_id].append(tarefa)
+    return filhos
+
+def montar_subarvore(tarefa, filhos, nivel=0):
+    """
+    Nó aninhado com profundidade e totais acumulados da subárvore
+    (tarefas descendentes, concluídas e progresso), calculados sem consultas
+    """
+    nos = [montar_subarvore(filho, filhos, nivel + 1) for filho in filhos.get(tarefa.id, [])]
+    total = sum(1 + no['total_descendentes'] for no in nos)
+    concluidas = sum(no['concluidas_descendentes'] + (1 if no['is_completed'] else 0) for no in nos)
+    return {
+        'id': tarefa.id,
+        'title': tarefa.title,
+        'is_completed': tarefa.is_completed,
+        'profundidade': nivel,
+        'total_descendentes': total,
+        'concluidas_descendentes': concluidas,
+        'progresso': int(concluidas / total * 100) if total else (100 if tarefa.is_completed else 0),
+        'subTarefas': nos,
+    }
+
+def carregar_subarvore(task):
+    """Árvore aninhada da tarefa com uma única consulta"""
+    tarefas = list(subarvore_queryset(task).order_by('path', '-priority', 'due_date'))
+    raiz = next(t for t in tarefas if t.id == task.id)
+    filhos = agrupar_filhos(t for t in tarefas if t.id != task.id)
+    return montar_subarvore(raiz, filhos, profundidade(raiz.path))
+
+@transaction.atomic
+def mover_tarefa(task, novo_pai):
+    """
+    Pendura a tarefa (com a subárvore) em outro pai da mesma fase, ou na raiz se novo_pai
+    for None. Os paths dos descendentes são reescritos com um único UPDATE
+    """
+    if novo_pai is not None:
+        # a árvore inteira fica numa fase só (reagendar_fase e os contadores por fase contam com isso)
+        if novo_pai.project_phase_id != task.project_phase_id:
+            raise ValueError("A tarefa pai precisa ser da mesma fase")
+        if novo_pai.id == task.id or novo_pai.path.startswith(caminho_filhos(task)):
+            raise ValueError("Uma tarefa não pode ser movida para dentro da própria subárvore")
+        novo_path = caminho_filhos(novo_pai)
+    else:
+        novo_path = '/'
+
+    prefixo_antigo = caminho_filhos(task)
+    task.parent_task = novo_pai
+    task.path = novo_path
+    task.save(update_fields=['parent_task', 'path'])
+
+    prefixo_novo = caminho_filhos(task)
+    Task.objects.filter(path__startswith=prefixo_antigo).update(
+        path=Concat(Value(prefixo_novo), Substr('path', len(prefixo_antigo) + 1))
+    )
+    incrementar_versao(task.project_phase.project_id)
@@ -0,0 +1,106 @@
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import Job, JobStatus
+
+# Nome do job -> função que o executa (importada só quando o worker roda o job)
+HANDLERS = {
+    'emails.enviar': 'api.utils.emails.job_enviar_email',
+    'emails.enviar_lote': 'api.utils.emails.job_enviar_lote',
+    'analise.projeto': 'api.analytics.analisador_desempenho.job_analisar_projeto',
+}
+
+# Job em execução há mais tempo que isso é considerado abandonado (worker morreu) e volta para a fila
+TEMPO_LIMITE_EXECUCAO = timedelta(minutes=10)
+# Espera antes da nova tentativa: BACKOFF_BASE * 2^(tentativas - 1)
+BACKOFF_BASE = timedelta(seconds=30)
+# Jobs finalizados (DONE/FAILED) mais antigos que isso são apagados por purgar_jobs
+RETENCAO_PADRAO = timedelta(days=7)
+
+def enfileirar(nome, payload=None, run_at=None, max_attempts=5):
+    """
+    Cria um job. Chamado dentro de uma transação, o job só fica visível
+    para o worker se a transação for confirmada junto com o resto da escrita.
+    """
+    if nome not in HANDLERS:
+        raise ValueError(f"Job desconhecido: {nome}")
+    return Job.objects.create(
+        name=nome,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+def enfileirar_lote(itens):
+    """Cria vários jobs num único INSERT; itens = [(nome, payload), ...]"""
+    agora = timezone.now()
+    jobs = []
+    for nome, payload in itens:
+        if nome not in HANDLERS:
+            raise ValueError(f"Job desconhecido: {nome}")
+        jobs.append(Job(name=nome, payload=payload or {}, run_at=agora))
+    return Job.objects.bulk_create(jobs)
+
+def _disponiveis(agora):
+    return Q(status=JobStatus.PENDING, run_at__lte=agora) | Q(
+        status=JobStatus.RUNNING, locked_at__lt=agora - TEMPO_LIMITE_EXECUCAO
+    )
+
+def reivindicar_jobs(limite=1):
+    """
+    Marca até `limite` jobs disponíveis como em execução e os devolve.
+    Com suporte a SKIP LOCKED (Postgres) usa SELECT ... FOR UPDATE SKIP LOCKED,
+    então vários workers nunca pegam o mesmo job nem esperam uns pelos outros.
+    No SQLite cada job é reivindicado com um UPDATE condicional: só quem altera
+    a linha (rowcount == 1) fica com ele.
+    """
+    agora = timezone.now()
+    disponiveis = Job.objects.filter(_disponiveis(agora)).order_by('run_at', 'id')
+    marcar = dict(status=JobStatus.RUNNING, locked_at=agora, attempts=F('attempts') + 1)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(disponiveis.select_for_update(skip_locked=True).values_list('id', flat=True)[:limite])
+            Job.objects.filter(id__in=ids).update(**marcar)
+    else:
+        ids = [
+            job_id for job_id in disponiveis.values_list('id', flat=True)[:limite]
+            if Job.objects.filter(_disponiveis(agora), id=job_id).update(**marcar)
+        ]
+
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+def executar_job(job):
+    """Roda o job e registra o resultado; falhas voltam para a fila com backoff até max_attempts"""
+    try:
+        import_string(HANDLERS[job.name])(**job.payload)
+    except Exception:
+        erro = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(status=JobStatus.FAILED, locked_at=None, last_error=erro, payload={})
+        else:
+            Job.objects.filter(id=job.id).update(
+                status=JobStatus.PENDING,
+                locked_at=None,
+                last_error=erro,
+                run_at=timezone.now() + BACKOFF_BASE * (2 ** (job.attempts - 1)),
+            )
+        return False
+
+    # o payload pode ter dados sensíveis (ex.: o HTML com o código de recuperação de senha);
+    # depois de finalizado o job não precisa mais dele
+    Job.objects.filter(id=job.id).update(status=JobStatus.DONE, locked_at=None, last_error='', payload={})
+    return True
+
+def purgar_jobs(retencao=RETENCAO_PADRAO):
+    """Apaga os jobs finalizados (DONE/FAILED) há mais de `retencao`; retorna quantos"""
+    limite = timezone.now() - retencao
+    apagados, _ = Job.objects.filter(
+        status__in=[JobStatus.DONE, JobStatus.FAILED], created_at__lt=limite,
+    ).delete()
+    return apagados
@@ -0,0 +1,52 @@
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from ..models import UserProject
+
+# Mapa {project_id: papel} dos projetos de cada usuário, usado pelas permissões
+# (api/permissions.py). Dentro da requisição fica memorizado no próprio request.
+# Entre requisições só fica no cache quando o cache padrão é compartilhado pelos
+# processos (ex.: Redis, ver CACHES em config/settings.py): o LocMem é da memória de
+# cada worker e a invalidação feita num deles não chegaria aos outros, que seguiriam
+# liberando acesso de quem já saiu do projeto.
+# Quem cria vínculos em lote (bulk_create não dispara sinais) chama invalidar_membros;
+# save/delete de UserProject invalidam pelos sinais em apps.py.
+
+TEMPO_CACHE = 300
+
+def _chave(user_id):
+    return f"membros:{user_id}"
+
+def cache_compartilhado():
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+def papeis_do_usuario(user_id):
+    """{project_id: role} do usuário: cache compartilhado (se houver) ou uma consulta"""
+    if not cache_compartilhado():
+        return dict(UserProject.objects.filter(user_id=user_id).values_list('project_id', 'role'))
+    papeis = cache.get(_chave(user_id))
+    if papeis is None:
+        papeis = dict(UserProject.objects.filter(user_id=user_id).values_list('project_id', 'role'))
+        cache.set(_chave(user_id), papeis, TEMPO_CACHE)
+    return papeis
+
+def papeis_da_requisicao(request):
+    """Mesmo mapa, memorizado no request: várias verificações, uma leitura só"""
+    papeis = getattr(request, '_papeis_projetos', None)
+    if papeis is None:
+        papeis = papeis_do_usuario(request.user.pk)
+        request._papeis_projetos = papeis
+    return papeis
+
+def papel_no_projeto(request, project_id):
+    """'leader', 'member' ou None (sem acesso)"""
+    return papeis_da_requisicao(request).get(project_id)
+
+def membro_do_projeto(user_id, project_id):
+    if not cache_compartilhado():
+        return UserProject.objects.filter(user_id=user_id, project_id=project_id).exists()
+    return project_id in papeis_do_usuario(user_id)
+
+def invalidar_membros(*user_ids):
+    if user_ids and cache_compartilhado():
+        cache.delete_many([_chave(user_id) for user_id in user_ids])
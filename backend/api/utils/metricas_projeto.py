@@ -1,91 +1,141 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.utils import timezone
 from ..models import Project, Task
+from .contadores import garantir_contadores
+
+# Métricas já calculadas no contexto atual (projeto_id -> dict); None fora de contexto_metricas()
+_metricas_memorizadas = ContextVar('metricas_memorizadas', default=None)
 
-def calcular_metricas_projeto(projeto_id):
+@contextmanager
+def contexto_metricas():
     """
-    Calcula métricas de desempenho do projeto usando Earned Value Management CORRETO
+    Memoriza as métricas por projeto enquanto o bloco roda (uma requisição / uma análise),
+    para que analisador e sugestões compartilhem o mesmo cálculo
     """
+    token = _metricas_memorizadas.set({})
     try:
-        projeto = Project.objects.get(id=projeto_id)
-        tarefas = Task.objects.filter(project_phase__project=projeto)
-        
-        # 📊 MÉTRICAS BÁSICAS
-        total_tarefas = tarefas.count()
-        if total_tarefas == 0:
-            return None
-            
-        tarefas_concluidas = tarefas.filter(is_completed=True).count()
-        tarefas_atrasadas = tarefas.filter(is_completed=False, due_date__lt=timezone.now()).count()
-        tarefas_pendentes = total_tarefas - tarefas_concluidas
-        
-        taxa_conclusao = (tarefas_concluidas / total_tarefas * 100) if total_tarefas > 0 else 0
-        
-        # 📅 CÁLCULOS DE TEMPO
-        total_dias = max(1, (projeto.end_date - projeto.start_date).days)
-        dias_decorridos = max(0, (timezone.now() - projeto.start_date).days)
-        dias_restantes = max(0, (projeto.end_date - timezone.now()).days)
-        
-        # ⚠️ VERIFICAÇÃO CRÍTICA: Projeto já está atrasado?
-        projeto_atrasado = timezone.now() > projeto.end_date
-        
-        # 🧮 CÁLCULO EVM CORRETO - CONSIDERANDO PESO DAS TAREFAS
-        # Vamos considerar que cada tarefa tem peso igual
-        ev = tarefas_concluidas / total_tarefas if total_tarefas > 0 else 0  # Earned Value
-        
-        # Planned Value: % do tempo que passou deveria ter sido concluído
-        pv = min(dias_decorridos / total_dias, 1.0) if total_dias > 0 else 0
-        
-        # 📈 SPI (Schedule Performance Index) - CORRIGIDO
-        spi = ev / pv if pv > 0 else 1.0
-        
-        # ✅ CORREÇÃO REALISTA: Se há tarefas atrasadas, SPI deve refletir isso
-        if tarefas_atrasadas > 0:
-            # Reduz o SPI proporcionalmente às tarefas atrasadas
-            penalidade_atraso = (tarefas_atrasadas / total_tarefas) * 0.5  # Penalidade de 50% por tarefa atrasada
-            spi = max(0.1, spi - penalidade_atraso)
-        
-        # ✅ CORREÇÃO ADICIONAL: Se projeto já passou da data final
-        if projeto_atrasado and tarefas_pendentes > 0:
-            spi = 0.3  # SPI crítico para projetos atrasados com tarefas pendentes
-        
-        # 📉 SV (Schedule Variance)
-        sv = ev - pv
-        
-        # 🎯 EAC (Estimate at Completion) - CORRIGIDO
-        eac = total_dias / spi if spi > 0.1 else total_dias * 2  # Limite realista
-        
-        # ⚠️ VAC (Variance at Completion)
-        vac = total_dias - eac
-        
-        # 🔄 TCPI (To Complete Performance Index) - CORRIGIDO
-        trabalho_restante = max(0, 1 - ev)
-        tcpi = trabalho_restante / (dias_restantes / total_dias) if dias_restantes > 0 and total_dias > 0 else 2.0
-        
-        # Se TCPI for muito alto (> 2.0), é praticamente impossível
-        if tcpi > 2.0:
-            tcpi = 2.0
-        
-        return {
-            'spi': round(spi, 3),
-            'sv': round(sv, 3),
-            'tcpi': round(tcpi, 3),
-            'eac': round(eac, 1),
-            'vac': round(vac, 1),
-            'dias_restantes': dias_restantes,
-            'tarefas_atrasadas': tarefas_atrasadas,
-            'tarefas_pendentes': tarefas_pendentes,
-            'taxa_conclusao': round(taxa_conclusao, 2),
-            'total_tarefas': total_tarefas,
-            'tarefas_concluidas': tarefas_concluidas,
-            'dias_decorridos': dias_decorridos,
-            'total_dias': total_dias,
-            'ev': round(ev, 3),
-            'pv': round(pv, 3),
-            'projeto_atrasado': projeto_atrasado
-        }
-        
+        yield
+    finally:
+        _metricas_memorizadas.reset(token)
+
+def memorizar_metricas(projeto_id, metricas):
+    """Registra métricas já calculadas (ex.: em lote) no contexto atual"""
+    memo = _metricas_memorizadas.get()
+    if memo is not None:
+        memo[projeto_id] = metricas
+
+def contar_atrasadas(projeto_id, agora=None):
+    """Tarefas pendentes com prazo vencido (não dá para manter em contador: muda com o tempo)"""
+    agora = agora or timezone.now()
+    return Task.objects.filter(
+        project_phase__project_id=projeto_id, is_completed=False, due_date__lt=agora
+    ).count()
+
+def calcular_metricas_projeto(projeto):
+    """
+    Calcula métricas de desempenho do projeto usando Earned Value Management CORRETO.
+    Aceita o Project (evita buscá-lo de novo) ou o id.
+    """
+    projeto_id = projeto.id if isinstance(projeto, Project) else projeto
+
+    memo = _metricas_memorizadas.get()
+    if memo is not None and projeto_id in memo:
+        return memo[projeto_id]
+
+    try:
+        if not isinstance(projeto, Project):
+            projeto = Project.objects.get(id=projeto_id)
+        garantir_contadores([projeto])
+
+        # Total e concluídas vêm dos contadores do projeto; atraso depende da hora
+        # atual, então continua sendo contado (uma consulta)
+        agora = timezone.now()
+        metricas = montar_metricas(
+            projeto.start_date, projeto.end_date,
+            projeto.total_tasks, projeto.completed_tasks, contar_atrasadas(projeto_id, agora),
+            agora,
+        )
     except Project.DoesNotExist:
         return None
     except Exception as e:
         print(f"Erro ao calcular métricas: {e}")
         return None
+
+    memorizar_metricas(projeto_id, metricas)
+    return metricas
+
+def montar_metricas(start_date, end_date, total_tarefas, tarefas_concluidas, tarefas_atrasadas, agora):
+    """Métricas EVM a partir das contagens de tarefas e das datas do projeto"""
+    # 📊 MÉTRICAS BÁSICAS
+    if total_tarefas == 0:
+        return None
+
+    tarefas_pendentes = total_tarefas - tarefas_concluidas
+
+    taxa_conclusao = (tarefas_concluidas / total_tarefas * 100) if total_tarefas > 0 else 0
+
+    # 📅 CÁLCULOS DE TEMPO
+    total_dias = max(1, (end_date - start_date).days)
+    dias_decorridos = max(0, (agora - start_date).days)
+    dias_restantes = max(0, (end_date - agora).days)
+
+    # ⚠️ VERIFICAÇÃO CRÍTICA: Projeto já está atrasado?
+    projeto_atrasado = agora > end_date
+
+    # 🧮 CÁLCULO EVM CORRETO - CONSIDERANDO PESO DAS TAREFAS
+    # Vamos considerar que cada tarefa tem peso igual
+    ev = tarefas_concluidas / total_tarefas if total_tarefas > 0 else 0  # Earned Value
+
+    # Planned Value: % do tempo que passou deveria ter sido concluído
+    pv = min(dias_decorridos / total_dias, 1.0) if total_dias > 0 else 0
+
+    # 📈 SPI (Schedule Performance Index) - CORRIGIDO
+    spi = ev / pv if pv > 0 else 1.0
+
+    # ✅ CORREÇÃO REALISTA: Se há tarefas atrasadas, SPI deve refletir isso
+    if tarefas_atrasadas > 0:
+        # Reduz o SPI proporcionalmente às tarefas atrasadas
+        penalidade_atraso = (tarefas_atrasadas / total_tarefas) * 0.5  # Penalidade de 50% por tarefa atrasada
+        spi = max(0.1, spi - penalidade_atraso)
+
+    # ✅ CORREÇÃO ADICIONAL: Se projeto já passou da data final
+    if projeto_atrasado and tarefas_pendentes > 0:
+        spi = 0.3  # SPI crítico para projetos atrasados com tarefas pendentes
+
+    # 📉 SV (Schedule Variance)
+    sv = ev - pv
+
+    # 🎯 EAC (Estimate at Completion) - CORRIGIDO
+    eac = total_dias / spi if spi > 0.1 else total_dias * 2  # Limite realista
+
+    # ⚠️ VAC (Variance at Completion)
+    vac = total_dias - eac
+
+    # 🔄 TCPI (To Complete Performance Index) - CORRIGIDO
+    trabalho_restante = max(0, 1 - ev)
+    tcpi = trabalho_restante / (dias_restantes / total_dias) if dias_restantes > 0 and total_dias > 0 else 2.0
+
+    # Se TCPI for muito alto (> 2.0), é praticamente impossível
+    if tcpi > 2.0:
+        tcpi = 2.0
+
+    return {
+        'spi': round(spi, 3),
+        'sv': round(sv, 3),
+        'tcpi': round(tcpi, 3),
+        'eac': round(eac, 1),
+        'vac': round(vac, 1),
+        'dias_restantes': dias_restantes,
+        'tarefas_atrasadas': tarefas_atrasadas,
+        'tarefas_pendentes': tarefas_pendentes,
+        'taxa_conclusao': round(taxa_conclusao, 2),
+        'total_tarefas': total_tarefas,
+        'tarefas_concluidas': tarefas_concluidas,
+        'dias_decorridos': dias_decorridos,
+        'total_dias': total_dias,
+        'ev': round(ev, 3),
+        'pv': round(pv, 3),
+        'projeto_atrasado': projeto_atrasado
+    }
@@ -0,0 +1,121 @@
+import base64
+import heapq
+import json
+from datetime import date
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Paginação por cursor (keyset), opcional nas listagens: ?limite=N e/ou ?cursor=...
+# O cursor guarda os valores de ordenação do último item entregue e a próxima página
+# começa depois dele com um WHERE (campo > valor), que o índice resolve sem percorrer
+# as páginas anteriores (ao contrário do OFFSET). Sem esses parâmetros, nada muda.
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+def _serializar(valor):
+    # isoformat completo: o DjangoJSONEncoder corta os microssegundos e o cursor deixaria de bater
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Valor não suportado no cursor: {valor!r}")
+
+def codificar_cursor(valores):
+    """Cursor opaco (base64 de um JSON) com os valores de ordenação do último item"""
+    dados = json.dumps(list(valores), default=_serializar, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    try:
+        dados = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(dados)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido.")
+    if not isinstance(valores, list):
+        raise ValueError("Cursor inválido.")
+    return valores
+
+def parametros_paginacao(request):
+    """
+    (limite, valores_do_cursor) quando o cliente pediu paginação; None quando não pediu
+    (resposta completa, como antes). ValueError para parâmetros inválidos
+    """
+    limite = request.query_params.get('limite')
+    cursor = request.query_params.get('cursor')
+    if limite is None and cursor is None:
+        return None
+    try:
+        limite = int(limite) if limite is not None else LIMITE_PADRAO
+    except ValueError:
+        raise ValueError("limite deve ser um número inteiro.")
+    if limite < 1:
+        raise ValueError("limite deve ser maior que zero.")
+    return min(limite, LIMITE_MAXIMO), (decodificar_cursor(cursor) if cursor else None)
+
+def validar_cursor(modelo, campos, cursor):
+    """
+    Confere os valores do cursor contra os campos do keyset (ValueError se não servirem),
+    para a view responder 400 antes de calcular ETag e montar a página
+    """
+    if cursor is None:
+        return None
+    if len(cursor) != len(campos) or any(valor is None for valor in cursor):
+        raise ValueError("Cursor inválido.")
+    try:
+        for campo, valor in zip(campos, cursor):
+            modelo._meta.get_field(campo).to_python(valor)
+    except (ValidationError, TypeError):
+        raise ValueError("Cursor inválido.")
+    return cursor
+
+def _depois_de(campos, valores):
+    """(c1, c2, ...) > (v1, v2, ...) em ordem lexicográfica, como OR de prefixos iguais"""
+    if len(valores) != len(campos):
+        raise ValueError("Cursor inválido.")
+    condicao = Q()
+    for i, campo in enumerate(campos):
+        iguais = {campos[j]: valores[j] for j in range(i)}
+        condicao |= Q(**iguais, **{f"{campo}__gt": valores[i]})
+    return condicao
+
+def _valor(item, campo):
+    return item[campo] if isinstance(item, dict) else getattr(item, campo)
+
+def _trecho(queryset, campos, limite, cursor):
+    """Os primeiros limite + 1 itens depois do cursor (o + 1 diz se há próxima página)"""
+    if cursor is not None:
+        try:
+            queryset = queryset.filter(_depois_de(campos, cursor))
+        except (ValidationError, TypeError):
+            raise ValueError("Cursor inválido.")
+    return list(queryset.order_by(*campos)[:limite + 1])
+
+def _pagina(itens, campos, limite):
+    if len(itens) <= limite:
+        return itens, None
+    itens = itens[:limite]
+    return itens, codificar_cursor(_valor(itens[-1], campo) for campo in campos)
+
+def paginar(queryset, campos, limite, cursor=None):
+    """
+    Uma página de `limite` itens em ordem crescente de `campos` (o último precisa ser
+    único, ex. id), a partir do cursor. Busca limite + 1 para saber se há próxima página.
+    Retorna (itens, proximo_cursor ou None)
+    """
+    return _pagina(_trecho(queryset, campos, limite, cursor), campos, limite)
+
+def paginar_intercalado(querysets, campos, limite, cursor=None):
+    """
+    Como paginar, para a união de querysets disjuntos (ex.: as tarefas de cada fase).
+    Cada um busca só os seus limite + 1 primeiros itens depois do cursor, pelo próprio
+    índice, e as listas são intercaladas em memória: o custo da página depende do número
+    de querysets e do limite, não do total de linhas (um IN sobre todos eles obrigaria
+    o banco a juntar e ordenar tudo antes do LIMIT)
+    """
+    trechos = [_trecho(queryset, campos, limite, cursor) for queryset in querysets]
+    ordem = lambda item: tuple(_valor(item, campo) for campo in campos)
+    return _pagina(list(islice(heapq.merge(*trechos, key=ordem), limite + 1)), campos, limite)
+
+def envelope(resultados, proximo_cursor):
+    return {'resultados': resultados, 'proximo_cursor': proximo_cursor}
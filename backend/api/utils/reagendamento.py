@@ -0,0 +1,70 @@
+from django.db import transaction
+from ..analytics.caminho_critico import atualizar_caminho_critico
+from ..models import Task
+from .bootstrap_projeto import distribuir_periodo
+from .versionamento import incrementar_versao
+from .hierarquia_tarefas import agrupar_filhos, subarvore_queryset
+
+CAMPOS_DATAS = ('id', 'parent_task_id', 'path', 'created_at', 'start_date', 'due_date')
+TAMANHO_LOTE = 500
+
+def _inicio(tarefa):
+    return tarefa.start_date or tarefa.created_at
+
+def distribuir_arvore(filhos, pai_id, inicio, fim, alterados):
+    """
+    Divide [inicio, fim] em janelas iguais entre os filhos de pai_id (mantendo a ordem
+    atual de prazo) e desce para os netos dentro da janela de cada filho. Só em memória:
+    as tarefas que mudaram vão para `alterados`
+    """
+    irmaos = sorted(filhos.get(pai_id, []), key=lambda t: (t.due_date, t.id))
+    for tarefa, (novo_inicio, novo_fim) in zip(irmaos, distribuir_periodo(inicio, fim, len(irmaos))):
+        if (tarefa.start_date, tarefa.due_date) != (novo_inicio, novo_fim):
+            tarefa.start_date, tarefa.due_date = novo_inicio, novo_fim
+            alterados.append(tarefa)
+        distribuir_arvore(filhos, tarefa.id, novo_inicio, novo_fim, alterados)
+
+def _gravar(alterados, project_id, ids_extras=()):
+    Task.objects.bulk_update(alterados, ['start_date', 'due_date'], batch_size=TAMANHO_LOTE)
+    # datas mudaram: caminho crítico só a partir dessas tarefas
+    atualizar_caminho_critico(project_id, [t.id for t in alterados] + list(ids_extras))
+    incrementar_versao(project_id)
+    return alterados
+
+@transaction.atomic
+def reagendar_subtarefas(parent):
+    """
+    Redistribui as subtarefas (e descendentes) dentro do período da tarefa pai:
+    uma consulta pela subárvore e um bulk_update. Retorna as tarefas alteradas
+    """
+    tarefas = list(subarvore_queryset(parent).exclude(id=parent.id).only(*CAMPOS_DATAS))
+    alterados = []
+    inicio = min(_inicio(parent), parent.due_date)
+    distribuir_arvore(agrupar_filhos(tarefas), parent.id, inicio, parent.due_date, alterados)
+    return _gravar(alterados, parent.project_phase.project_id, [parent.id])
+
+@transaction.atomic
+def reagendar_fase(project_phase):
+    """
+    Redistribui as tarefas raiz da fase dentro do período que elas já ocupam
+    (do primeiro início ao último prazo) e, abaixo delas, as subtarefas de cada uma
+    """
+    tarefas = list(Task.objects.filter(project_phase=project_phase).only(*CAMPOS_DATAS))
+    raizes = [t for t in tarefas if t.parent_task_id is None]
+    if not raizes:
+        return []
+
+    alterados = []
+    inicio = min(_inicio(t) for t in raizes)
+    fim = max(t.due_date for t in raizes)
+    distribuir_arvore(agrupar_filhos(tarefas), None, inicio, fim, alterados)
+    return _gravar(alterados, project_phase.project_id)
+
+@transaction.atomic
+def alterar_prazo(task, novo_prazo):
+    """Muda o prazo da tarefa e, se mudou de fato, reagenda as subtarefas dentro do novo período"""
+    if task.due_date == novo_prazo:
+        return []
+    task.due_date = novo_prazo
+    task.save(update_fields=['due_date'])
+    return reagendar_subtarefas(task)
@@ -0,0 +1,41 @@
+import hashlib
+
+from django.db.models import F
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+from ..models import Project
+
+# Cada projeto tem um contador `versao` que só cresce. As leituras montam o ETag a partir
+# dele e respondem 304 ao If-None-Match sem montar o payload.
+
+def incrementar_versao(*project_ids):
+    """Marca os projetos como alterados (UPDATE atômico, sem ler o valor atual)"""
+    if project_ids:
+        Project.objects.filter(id__in=project_ids).update(versao=F('versao') + 1)
+
+def gerar_etag(request, *partes):
+    """ETag fraco a partir das versões lidas + usuário + query string (que muda o payload)"""
+    chave = repr((request.user.pk, request.META.get('QUERY_STRING', ''), partes))
+    return f'W/"{hashlib.md5(chave.encode()).hexdigest()}"'
+
+def nao_modificado(request, etag):
+    """If-None-Match bate com o ETag atual?"""
+    cabecalho = request.META.get('HTTP_IF_NONE_MATCH')
+    if not cabecalho:
+        return False
+    etags = [valor.strip() for valor in cabecalho.split(',')]
+    return '*' in etags or etag in etags
+
+def aplicar_etag(response, etag):
+    response['ETag'] = etag
+    # o navegador guarda, mas sempre revalida; a resposta depende de quem está logado
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+def resposta_condicional(request, etag, montar_resposta):
+    """304 se o cliente já tem essa versão; senão monta a resposta e anexa o ETag"""
+    if nao_modificado(request, etag):
+        return aplicar_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+    return aplicar_etag(montar_resposta(), etag)
@@ -1,44 +1,65 @@
 from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
-from django.views import View
-import json
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from api.analytics.analisador_desempenho import AnalisadorDesempenho
+from api.analytics.analise_lote import analisar_projetos
+from api.analytics.caminho_critico import resumo_caminho_critico
 from api.analytics.sistema_sugestoes import SistemaSugestoes
 from api.models import Project
+from api.permissions import IsProjectMember
+from api.utils.jobs import enfileirar
+from api.utils.membros import papeis_da_requisicao
+from api.utils.metricas_projeto import contexto_metricas
+from api.utils.versionamento import incrementar_versao
 
-@method_decorator(csrf_exempt, name='dispatch')
-class AnalisarProjetoView(View):
+class AnalisarProjetoView(APIView):
     """
     View para análise de desempenho do projeto usando EVM
     """
+    permission_classes = [IsAuthenticated, IsProjectMember]
     
     def post(self, request, project_id):
         try:
             projeto = Project.objects.get(id=project_id)
+
+            # ?assincrono=1: o runworker faz a análise e grava em AnaliseProjeto
+            if request.query_params.get('assincrono') in ('1', 'true'):
+                job = enfileirar('analise.projeto', {'project_id': projeto.id})
+                return JsonResponse({'sucesso': True, 'job_id': job.id}, status=202)
+
             analisador = AnalisadorDesempenho()
             sistema_sugestoes = SistemaSugestoes()
             
-            # Análise de desempenho EVM
-            analise_desempenho = analisador.analisar_situacao_projeto(projeto)
-            
-            if 'erro' in analise_desempenho:
-                return JsonResponse({
-                    'sucesso': False,
-                    'erro': analise_desempenho['erro']
-                }, status=400)
-            
-            # Gerar sugestões
-            sugestoes = sistema_sugestoes.gerar_sugestoes(projeto)
+            # Analisador e sugestões usam as mesmas métricas: uma consulta de agregação só
+            with contexto_metricas():
+                # Análise de desempenho EVM
+                analise_desempenho = analisador.analisar_situacao_projeto(projeto)
+                
+                if 'erro' in analise_desempenho:
+                    return JsonResponse({
+                        'sucesso': False,
+                        'erro': analise_desempenho['erro']
+                    }, status=400)
+                
+                # Gerar sugestões
+                sugestoes = sistema_sugestoes.gerar_sugestoes(projeto)
             
             # Calcular probabilidade de atraso
             probabilidade_atraso = self._calcular_probabilidade_atraso(analise_desempenho)
+
+            # Caminho crítico: separa atrasos que empurram o fim do projeto dos que têm folga
+            caminho_critico = resumo_caminho_critico(projeto.id)
+            explicacao = analise_desempenho['explicacao']
+            if caminho_critico['atrasos_criticos']:
+                explicacao += f" ({caminho_critico['atrasos_criticos']} no caminho crítico)"
             
             resposta = {
                 'sucesso': True,
                 'status': analise_desempenho['status'],
                 'cor': analise_desempenho['cor'],
-                'explicacao': analise_desempenho['explicacao'],
+                'explicacao': explicacao,
                 'spi': analise_desempenho['spi'],
                 'sv': analise_desempenho['sv'],
                 'tcpi': analise_desempenho['tcpi'],
@@ -49,6 +70,7 @@ class AnalisarProjetoView(View):
                 'tarefas_pendentes': analise_desempenho['tarefas_pendentes'],  # ✅ ADICIONADO
                 'taxa_conclusao': analise_desempenho['taxa_conclusao'],
                 'probabilidade_atraso': probabilidade_atraso,
+                'caminho_critico': caminho_critico,
                 'sugestoes': sugestoes
             }
             
@@ -67,48 +89,48 @@ class AnalisarProjetoView(View):
     
     def _calcular_probabilidade_atraso(self, analise_desempenho):
         """Calcular probabilidade de atraso baseada em métricas EXISTENTES"""
-        if analise_desempenho.get('status') == "CONCLUÍDO":
-            return 0
-            
-        probabilidade = 0
-        spi = analise_desempenho['spi']
-        tarefas_atrasadas = analise_desempenho['tarefas_atrasadas']
-        taxa_conclusao = analise_desempenho['taxa_conclusao']
-        dias_restantes = analise_desempenho['dias_restantes']
-        tarefas_pendentes = analise_desempenho['tarefas_pendentes']  # ✅ AGORA EXISTE
-        
-        # Baseado no SPI (50% do peso)
-        if spi < 0.7:
-            probabilidade += 50
-        elif spi < 0.9:
-            probabilidade += 30
-        elif spi < 1.0:
-            probabilidade += 10
-        
-        # Baseado em tarefas atrasadas (30% do peso)
-        if tarefas_atrasadas > 5:
-            probabilidade += 30
-        elif tarefas_atrasadas > 2:
-            probabilidade += 20
-        elif tarefas_atrasadas > 0:
-            probabilidade += 10
-        
-        # Baseado em pressão de tempo (20% do peso)
-        if taxa_conclusao < 50 and dias_restantes < 7:
-            probabilidade += 20
-        
-        return min(95, probabilidade)
+        return AnalisadorDesempenho().calcular_probabilidade_atraso(analise_desempenho)
+
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class AplicarSugestaoView(View):
+class AnalisarProjetosLoteView(APIView):
+    """
+    Análise EVM de vários projetos do usuário em uma requisição (sem sugestões).
+    Corpo: {"project_ids": [...]}; sem a lista, analisa todos os projetos do usuário
+    """
+
+    def post(self, request):
+        project_ids = request.data.get('project_ids')
+        if project_ids is not None and (
+            not isinstance(project_ids, list) or not all(isinstance(pid, int) for pid in project_ids)
+        ):
+            return Response({"error": "'project_ids' deve ser uma lista de ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Só entram projetos dos quais o usuário participa (mapa de papéis da requisição)
+        meus_projetos = list(papeis_da_requisicao(request))
+        if project_ids is not None:
+            pedidos = set(project_ids)
+            meus_projetos = [project_id for project_id in meus_projetos if project_id in pedidos]
+
+        linhas, _, analises = analisar_projetos(meus_projetos)
+
+        return Response({
+            'sucesso': True,
+            'projetos': [
+                {'project_id': linha['id'], 'nome': linha['name'], **analises[linha['id']]}
+                for linha in linhas
+            ],
+        })
+
+class AplicarSugestaoView(APIView):
     """
     View para aplicar sugestões automáticas no projeto
     """
+    permission_classes = [IsAuthenticated, IsProjectMember]
     
     def post(self, request, project_id):
         try:
-            data = json.loads(request.body)
+            data = request.data
             sugestao_id = data.get('sugestao_id')
             acao = data.get('acao')
             
@@ -152,22 +174,20 @@ class AplicarSugestaoView(View):
             }, status=500)
     
     def _aplicar_priorizacao_atrasadas(self, projeto):
-        """Priorizar tarefas atrasadas"""
-        from api.models import Task
+        """Priorizar tarefas atrasadas: sobe um nível de prioridade de todas num UPDATE só"""
+        from api.models import Task, TaskPriority
+        from django.db.models import F, Value
+        from django.db.models.functions import Least
         from django.utils import timezone
         
-        tarefas_atrasadas = Task.objects.filter(
+        tarefas_atualizadas = Task.objects.filter(
             project_phase__project=projeto,
             is_completed=False,
-            due_date__lt=timezone.now()
-        ).order_by('due_date')
-        
-        tarefas_atualizadas = 0
-        for tarefa in tarefas_atrasadas:
-            if hasattr(tarefa, 'priority'):
-                tarefa.priority = min(tarefa.priority + 1, 3)
-                tarefa.save()
-                tarefas_atualizadas += 1
+            due_date__lt=timezone.now(),
+            priority__lt=TaskPriority.URGENTE
+        ).update(priority=Least(F('priority') + 1, Value(TaskPriority.URGENTE)))
+        if tarefas_atualizadas:
+            incrementar_versao(projeto.id)
         
         return {
             'mensagem': f'Prioridade aumentada para {tarefas_atualizadas} tarefas atrasadas',
@@ -180,7 +200,7 @@ class AplicarSugestaoView(View):
         """Revisar metas do projeto"""
         from ..utils.metricas_projeto import calcular_metricas_projeto
         
-        metricas = calcular_metricas_projeto(projeto.id)
+        metricas = calcular_metricas_projeto(projeto)
         dias_extensao = 7
         
         if metricas and metricas.get('tcpi', 1.0) > 1.2:
@@ -197,7 +217,7 @@ class AplicarSugestaoView(View):
         """Ajustar prazos finais"""
         from ..utils.metricas_projeto import calcular_metricas_projeto
         
-        metricas = calcular_metricas_projeto(projeto.id)
+        metricas = calcular_metricas_projeto(projeto)
         
         if metricas and metricas.get('vac', 0) < -7:
             dias_necessarios = abs(int(metricas['vac']))
@@ -215,31 +235,20 @@ class AplicarSugestaoView(View):
         }
     
     def _aplicar_balanceamento_carga(self, projeto):
-        """Balancear carga de trabalho"""
-        from api.models import UserProject, Task, TaskAssignee
-        
-        usuarios = UserProject.objects.filter(project=projeto)
-        cargas = []
+        """Balancear carga de trabalho: reatribui tarefas não iniciadas dos mais carregados"""
+        from api.analytics.balanceamento_carga import rebalancear_carga
         
-        for up in usuarios:
-            tarefas_pendentes = Task.objects.filter(
-                project_phase__project=projeto,
-                is_completed=False,
-                taskassignee__user=up.user
-            ).count()
-            cargas.append(tarefas_pendentes)
+        resultado = rebalancear_carga(projeto.id)
         
-        if cargas and (max(cargas) - min(cargas) > 3):
+        if resultado['tarefas_reatribuidas']:
             return {
-                'mensagem': f'Balanceamento sugerido - Diferença de {max(cargas) - min(cargas)} tarefas entre membros',
-                'detalhes': {
-                    'diferenca': max(cargas) - min(cargas)
-                }
+                'mensagem': f"Carga rebalanceada - {resultado['tarefas_reatribuidas']} tarefas reatribuídas",
+                'detalhes': resultado
             }
         
         return {
             'mensagem': 'Carga balanceada - Distribuição adequada',
-            'detalhes': {}
+            'detalhes': resultado
         }
     
     def _aplicar_acelerar_conclusao(self, projeto):
@@ -1,11 +1,11 @@
 from django.shortcuts import get_object_or_404
 from django.conf import settings
-from django.core.cache import cache
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Q
 
 from datetime import timedelta
 from django.utils import timezone
-import os
 
 # Imports do Django Rest Framework
 from rest_framework import status, generics
@@ -15,7 +15,10 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 # Imports do projeto
-from ..models import Project, User, UserProject, ProjectRole, Task, ProjectPhase, Phase
+from ..models import (
+    Project, User, UserProject, ProjectRole, Task, TaskAssignee, TaskDependency, ProjectPhase, Phase,
+)
+from ..permissions import IsProjectLeader, IsProjectMember
 from ..serializers import (
     UserSerializer,
     CustomTokenObtainPairSerializer,
@@ -23,191 +26,18 @@ from ..serializers import (
     ProjectWithCollaboratorsAndTasksSerializer,
     ProjectWithTasksSerializer,
     TaskSerializer,
-    SharedProjectSerializer
+    SharedProjectSerializer,
+    campos_da_requisicao,
 )
-
-# Lista de convites pendentes (email -> lista de IDs de projetos) - mantido para compatibilidade
-invited_users = {}
-
-import threading
-import requests
-
-import threading
-import requests
-import os
-
-def enviar_email_async(subject, html_content, from_email, recipient_list):
-    """Usa API direta do Resend - 100% funcionando"""
-    def _enviar():
-        try:
-            print(f"📧 API RESEND PARA: {recipient_list}")
-            print(f"📧 ASSUNTO: {subject}")
-            
-            api_key = os.environ.get('RESEND_API_KEY')
-            api_url = os.environ.get('RESEND_API_URL', 'https://api.resend.com/emails')
-            
-            if not api_key:
-                print("❌ RESEND_API_KEY não encontrada")
-                return
-            
-            payload = {
-                "from": from_email,
-                "to": recipient_list,
-                "subject": subject,
-                "html": html_content,
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(api_url, json=payload, headers=headers, timeout=10)
-            
-            print(f"RESPOSTA RESEND: {response.status_code}")
-            
-            if response.status_code == 200:
-                print(f"EMAIL ENVIADO COM SUCESSO!")
-                print(f"ID: {response.json().get('id')}")
-            else:
-                print(f"ERRO RESEND: {response.text}")
-                
-        except Exception as e:
-            print(f" ERRO API: {str(e)}")
-    
-    thread = threading.Thread(target=_enviar)
-    thread.daemon = True
-    thread.start()
-
-def create_invite_email_html(project_name, inviter_name):
-    """Cria o template HTML personalizado para o email de convite"""
-    return f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <style>
-        body {{
-            font-family: 'Arial', sans-serif;
-            background-color: #f4f4f4;
-            margin: 0;
-            padding: 20px;
-        }}
-        .container {{
-            max-width: 600px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        .header {{
-            background: linear-gradient(166deg, #8474a1 0%, #86b6a3 100%);
-            color: white;
-            padding: 40px 30px;
-            text-align: center;
-        }}
-        .logo-container {{
-            margin-bottom: 15px;
-        }}
-        .logo {{
-            font-size: 32px;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        .content {{
-            padding: 40px 30px;
-            color: #383560;
-            line-height: 1.6;
-        }}
-        .highlight {{
-            background: #c1d5cd;
-            border: 2px dashed #58917a;
-            border-radius: 10px;
-            padding: 20px;
-            font-size: 20px;
-            font-weight: bold;
-            text-align: center;
-            color: #045a5c;
-            margin: 25px 0;
-        }}
-        .cta-button {{
-            background: linear-gradient(45deg, #86b6a3, #58917a);
-            color: white;
-            padding: 15px 30px;
-            text-decoration: none;
-            border-radius: 8px;
-            display: inline-block;
-            margin: 20px 0;
-            font-weight: bold;
-            font-size: 16px;
-        }}
-        .footer {{
-            background: #c8c1d4;
-            padding: 25px;
-            text-align: center;
-            color: #383560;
-            font-size: 14px;
-        }}
-        .footer-image {{
-            display: block;
-            margin: 15px auto;
-            max-width: 200px;
-            height: auto;
-        }}
-        .brand-text {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #5b4584;
-            margin: 15px 0;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="logo-container">
-                <div class="logo">BuildYourProject</div>
-            </div>
-            <div style="font-size: 18px;">Convite para Colaboração</div>
-        </div>
-        
-        <div class="content">
-            <h2 style="color: #5b4584; margin-top: 0;">Olá!</h2>
-            <p>Você recebeu um convite especial para colaborar em um projeto!</p>
-            
-            <div class="highlight">
-                <strong>{inviter_name}</strong> convidou você para colaborar no projeto:<br>
-                <strong style="font-size: 24px;">"{project_name}"</strong>
-            </div>
-            
-            <p>Para aceitar este convite e começar a colaborar:</p>
-            
-            <div style="text-align: center;">
-                <a href="https://buildyourproject-front.onrender.com/" class="cta-button">
-                    🚀 Acessar a Plataforma
-                </a>
-            </div>
-            
-            <p style="color: #54969a; font-size: 14px; margin-top: 20px;">
-                <strong>💡 Dica:</strong> Se você ainda não tem uma conta, 
-                registre-se usando este e-mail para ter acesso imediato ao projeto.
-            </p>
-        </div>
-        
-        <div class="footer">
-            <p>Atenciosamente,<br>
-            <strong>Equipe BuildYourProject</strong></p>
-            <div class="brand-text">BuildYourProject</div>
-            
-            <p style="margin-top: 15px; font-size: 12px; color: #5b4584;">
-                © 2025 BuildYourProject. Todos os direitos reservados.
-            </p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+from ..utils.emails import ClienteEmail, create_invite_email_html
+from ..utils.jobs import enfileirar_lote
+from ..utils.contadores import garantir_contadores
+from ..utils.convites import aceitar_convites_pendentes, registrar_convites
+from ..utils.membros import invalidar_membros, membro_do_projeto
+from ..utils.cache_respostas import resposta_em_cache
+from ..utils.paginacao import envelope, paginar, parametros_paginacao
+from ..utils.versionamento import gerar_etag, incrementar_versao, resposta_condicional
+from ..utils.consultas_projetos import agrupar_tarefas_por_projeto, projetos_compartilhados_queryset
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -216,41 +46,7 @@ class RegisterView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         user = serializer.save()
-
-        # Verifica convites na MEMÓRIA (sistema antigo)
-        projetos_convidados_memoria = invited_users.get(user.email, [])
-        for project_id in projetos_convidados_memoria:
-            try:
-                project = Project.objects.get(id=project_id)
-                UserProject.objects.get_or_create(
-                    user=user,
-                    project=project,
-                    role=ProjectRole.MEMBER
-                )
-            except Project.DoesNotExist:
-                continue
-
-        # Remove o email do dicionário após tratar
-        if user.email in invited_users:
-            del invited_users[user.email]
-
-        # Verifica convites no CACHE (sistema novo)
-        cache_key = f"project_invite_{user.email}"
-        projetos_convidados_cache = cache.get(cache_key, [])
-        
-        for project_id in projetos_convidados_cache:
-            try:
-                project = Project.objects.get(id=project_id)
-                UserProject.objects.get_or_create(
-                    user=user,
-                    project=project,
-                    role=ProjectRole.MEMBER
-                )
-            except Project.DoesNotExist:
-                continue
-
-        # Remove do cache após tratar
-        cache.delete(cache_key)
+        aceitar_convites_pendentes(user)
 
 class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
@@ -266,148 +62,149 @@ class ProjectView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Filtra apenas projetos onde o usuário é líder
-        projetos = Project.objects.filter(
-            userproject__user=request.user, 
-            userproject__role=ProjectRole.LEADER
-        ).distinct()
-        serializer = ProjectWithTasksSerializer(projetos, many=True)
-        return Response(serializer.data)
+        incluir_compartilhados = request.query_params.get('incluir') == 'compartilhados'
+        vinculos = UserProject.objects.filter(user=request.user)
+        if not incluir_compartilhados:
+            vinculos = vinculos.filter(role=ProjectRole.LEADER)
+
+        try:
+            pagina = parametros_paginacao(request)
+            if pagina is not None:
+                # ?limite / ?cursor: só os projetos desta página (por id) entram no ETag e no payload
+                projetos, proximo = paginar(
+                    Project.objects.filter(id__in=vinculos.values('project_id')).values('id', 'versao'),
+                    ('id',), *pagina,
+                )
+                vinculos = vinculos.filter(project_id__in=[p['id'] for p in projetos])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ETag a partir de (projeto, papel, versão) dos vínculos: uma consulta leve antes do payload
+        etag = gerar_etag(request, *vinculos.order_by('project_id').values_list('project_id', 'role', 'project__versao'))
+        if pagina is None:
+            montar = lambda: self._montar_lista(request)
+        else:
+            montar = lambda: self._montar_lista(request, [p['id'] for p in projetos], proximo)
+        # o ETag já resume usuário + query + versões: serve de chave do payload
+        return resposta_condicional(request, etag, lambda: resposta_em_cache(f"projetos:{etag}", montar))
+
+    def _montar_lista(self, request, project_ids=None, proximo_cursor=None):
+        """Lista completa ou, com project_ids, a página já recortada em get() (envelope com o cursor)"""
+        # ?incluir=compartilhados devolve também os projetos em que o usuário é membro
+        # ?contagens=1 adiciona total_tasks / completed_tasks em cada projeto
+        # ?fields= / ?expand= escolhem os campos; sem tasks, a consulta de tarefas nem roda
+        incluir_compartilhados = request.query_params.get('incluir') == 'compartilhados'
+        incluir_contagens = request.query_params.get('contagens') in ('1', 'true')
+        fields, expand = campos_da_requisicao(request)
+        campos = ProjectWithTasksSerializer.campos_selecionados(fields, expand)
+        colunas = ProjectWithTasksSerializer.colunas(campos)
+        if incluir_contagens:
+            colunas += ['total_tasks', 'completed_tasks', 'contadores_inicializados']
+
+        # Uma consulta para os projetos do usuário (com o papel em cada um)
+        vinculos = (
+            UserProject.objects.filter(user=request.user)
+            .select_related('project')
+            .only('project', 'role', *(f'project__{coluna}' for coluna in colunas))
+            .order_by('project_id')
+        )
+        if not incluir_compartilhados:
+            vinculos = vinculos.filter(role=ProjectRole.LEADER)
+        if project_ids is not None:
+            vinculos = vinculos.filter(project_id__in=project_ids)
+
+        projetos_lider = {}
+        projetos_compartilhados = {}
+        for vinculo in vinculos:
+            if vinculo.role == ProjectRole.LEADER:
+                projetos_lider[vinculo.project_id] = vinculo.project
+            else:
+                projetos_compartilhados[vinculo.project_id] = vinculo.project
+        for project_id in projetos_lider:
+            projetos_compartilhados.pop(project_id, None)
+        if incluir_contagens:
+            garantir_contadores([*projetos_lider.values(), *projetos_compartilhados.values()])
+
+        # Uma consulta para as tarefas de todos esses projetos
+        context = {
+            'tarefas_por_projeto': agrupar_tarefas_por_projeto(
+                list(projetos_lider) + list(projetos_compartilhados)
+            ) if campos is None or 'tasks' in campos else {},
+            'incluir_contagens': incluir_contagens,
+        }
+
+        dados = ProjectWithTasksSerializer(
+            list(projetos_lider.values()), many=True, context=context, fields=fields, expand=expand
+        ).data
+        if incluir_compartilhados:
+            dados = {
+                'lider': dados,
+                'compartilhados': ProjectWithTasksSerializer(
+                    list(projetos_compartilhados.values()), many=True, context=context, fields=fields, expand=expand
+                ).data,
+            }
+        if project_ids is not None:
+            dados = envelope(dados, proximo_cursor)
+        return Response(dados)
     
     def post(self, request):
         serializer = ProjectSerializer(data=request.data)
         if serializer.is_valid():
-            project = serializer.save()
-            
-            # Cria o líder do projeto
-            UserProject.objects.create(
-                user=request.user,
-                project=project,
-                role=ProjectRole.LEADER
-            )
-
             collaborator_emails = request.data.get('collaborators', [])
-            
-            # Busca usuários existentes de forma otimizada
-            users_existentes = User.objects.filter(email__in=collaborator_emails)
-            users_existentes_map = {user.email: user for user in users_existentes}
-            
-            for email in collaborator_emails:
-                if email in users_existentes_map:
-                    # Usuário existe, adiciona ao projeto
-                    UserProject.objects.create(
-                        user=users_existentes_map[email],
-                        project=project,
-                        role=ProjectRole.MEMBER
-                    )
-                else:
-                    # SALVA CONVITE NO CACHE (sistema novo)
-                    cache_key = f"project_invite_{email}"
-                    existing_invites = cache.get(cache_key, [])
-                    existing_invites.append(project.id)
-                    cache.set(cache_key, existing_invites, 60*60*24*7)  # 7 dias
-
-                    # SALVA CONVITE NA MEMÓRIA (sistema antigo - para compatibilidade)
-                    if email not in invited_users:
-                        invited_users[email] = []
-                    invited_users[email].append(project.id)
-
-                    # CORREÇÃO: USAR A FUNÇÃO ASYNC
+
+            # Projeto, fases/tarefas (bootstrap em lote) e vínculos na mesma transação
+            with transaction.atomic():
+                project = serializer.save()
+
+                # Busca usuários existentes de forma otimizada
+                users_existentes = User.objects.filter(email__in=collaborator_emails)
+                users_existentes_map = {user.email: user for user in users_existentes}
+
+                # Líder + colaboradores já cadastrados em um único INSERT
+                vinculos = [UserProject(user=request.user, project=project, role=ProjectRole.LEADER)]
+                vinculos.extend(
+                    UserProject(user=user, project=project, role=ProjectRole.MEMBER)
+                    for user in users_existentes_map.values()
+                )
+                UserProject.objects.bulk_create(vinculos)
+                invalidar_membros(*(vinculo.user_id for vinculo in vinculos))
+
+                # Convites persistidos para quem ainda não tem conta (aceitos no cadastro)
+                emails_convidados = [email for email in dict.fromkeys(collaborator_emails) if email not in users_existentes_map]
+                registrar_convites(project, emails_convidados, invited_by=request.user)
+
+                if emails_convidados:
+                    # O HTML é o mesmo para todos os convidados: renderiza uma vez e enfileira
+                    # um job de envio em lote por bloco de destinatários. Os jobs entram na
+                    # mesma transação do projeto e o runworker faz o envio fora da requisição.
                     subject = "Você foi convidado para colaborar em um projeto!"
                     html_message = create_invite_email_html(
                         project_name=project.name,
                         inviter_name=request.user.full_name or request.user.email
                     )
                     from_email = settings.DEFAULT_FROM_EMAIL
-                    
-                    # CHAMADA CORRIGIDA - sem try/except
-                    enviar_email_async(subject, html_message, from_email, [email])
-
-            # Criar tarefas a partir das fases
-            fases = project.phases or []
-            if fases and project.start_date and project.end_date:
-                self.calcular_e_criar_tarefas_com_datas(project, fases)
+                    tamanho_lote = ClienteEmail.TAMANHO_MAXIMO_LOTE
+                    enfileirar_lote([
+                        ('emails.enviar_lote', {
+                            'subject': subject,
+                            'html_content': html_message,
+                            'from_email': from_email,
+                            'destinatarios': emails_convidados[inicio:inicio + tamanho_lote],
+                        })
+                        for inicio in range(0, len(emails_convidados), tamanho_lote)
+                    ])
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
                     
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def calcular_e_criar_tarefas_com_datas(self, project, fases):
-        """Calcula datas automaticamente para tarefas e subtarefas"""
-        start_date = project.start_date
-        end_date = project.end_date - timedelta(days=1)  # 1 dia de antecedência
-        
-        total_duration = (end_date - start_date).days
-        phases_count = len(fases)
-        
-        if phases_count == 0:
-            return
-        
-        # Duração por fase (em dias)
-        days_per_phase = total_duration / phases_count
-        
-        for index, fase_nome in enumerate(fases):
-            # Calcular datas para esta fase
-            phase_start = start_date + timedelta(days=index * days_per_phase)
-            phase_end = start_date + timedelta(days=(index + 1) * days_per_phase)
-            
-            # Criar fase e tarefa principal
-            phase_obj, _ = Phase.objects.get_or_create(name=fase_nome)
-            project_phase = ProjectPhase.objects.create(project=project, phase=phase_obj)
-            
-            # Criar tarefa principal com datas calculadas
-            main_task = Task.objects.create(
-                project_phase=project_phase,
-                title=fase_nome,
-                description=f"Fase: {fase_nome}",
-                is_completed=False,
-                created_at=phase_start,  # ✅ Data de início calculada
-                due_date=phase_end,      # ✅ Data de fim calculada
-                complexidade=3.0  # Valor padrão
-            )
-            
-            # ✅ CRIAR SUBTAREFAS AUTOMATICAMENTE COM DATAS
-            self.criar_subtarefas_automaticas(main_task, phase_start, phase_end, fase_nome)
-
-    def criar_subtarefas_automaticas(self, main_task, phase_start, phase_end, fase_nome):
-        """Cria subtarefas com datas distribuídas dentro da tarefa principal"""
-        subtarefas_base = [
-            f"Planejar {fase_nome}",
-            f"Executar {fase_nome}", 
-            f"Revisar {fase_nome}",
-            f"Finalizar {fase_nome}"
-        ]
-        
-        total_duration = (phase_end - phase_start).days
-        subtasks_count = len(subtarefas_base)
-        
-        if subtasks_count == 0:
-            return
-        
-        days_per_subtask = total_duration / subtasks_count
-        
-        for sub_index, subtarefa_nome in enumerate(subtarefas_base):
-            sub_start = phase_start + timedelta(days=sub_index * days_per_subtask)
-            sub_end = phase_start + timedelta(days=(sub_index + 1) * days_per_subtask)
-            
-            Task.objects.create(
-                project_phase=main_task.project_phase,
-                title=subtarefa_nome,
-                description=f"Subtarefa: {subtarefa_nome}",
-                is_completed=False,
-                created_at=sub_start,  # ✅ Data de início calculada
-                due_date=sub_end,      # ✅ Data de fim calculada  
-                parent_task=main_task,  # ✅ Link com tarefa principal
-                complexidade=2.0  # Valor padrão para subtarefas
-            )
 
 class ProjectDeleteView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectLeader]
 
     def delete(self, request, project_id):
         try:
             project = get_object_or_404(Project, id=project_id)
-            project.delete()
+            self._excluir(project)
             
             return Response(
                 {"detail": "Projeto excluído com sucesso."}, 
@@ -419,19 +216,37 @@ class ProjectDeleteView(APIView):
                 {"detail": f"Erro ao excluir projeto: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
+
+    @staticmethod
+    @transaction.atomic
+    def _excluir(project):
+        # Responsáveis e dependências (inclusive as de/para outros projetos) saem antes, cada um
+        # com um DELETE ... WHERE task_id IN (subconsulta); assim o delete() das tarefas só
+        # encontra vazio nessas tabelas e o que carrega em lotes são as próprias tarefas
+        tarefas = Task.objects.filter(project_phase__project=project)
+        TaskAssignee.objects.filter(task__in=tarefas).delete()
+        TaskDependency.objects.filter(Q(task__in=tarefas) | Q(depends_on__in=tarefas)).delete()
+        tarefas.delete()
+        # o restante (fases, vínculos com os sinais de membros, convites, chat, análises) é pequeno
+        project.delete()
+
 class ProjectCollaboratorsView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
 
     def get(self, request, project_id):
-        try:
-            project = Project.objects.get(pk=project_id)
-            if not UserProject.objects.filter(user=request.user, project=project).exists():
-                return Response({"error": "Você não tem permissão para acessar este recurso."}, status=status.HTTP_403_FORBIDDEN)
-        except Project.DoesNotExist:
+        # a lista de membros só muda junto com a versão do projeto
+        versao = Project.objects.filter(pk=project_id).values_list('versao', flat=True).first()
+        if versao is None:
             return Response({"error": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-        user_projects = UserProject.objects.filter(project=project).select_related('user')
+        etag = gerar_etag(request, project_id, versao)
+        chave = f"colaboradores:{project_id}:v{versao}"
+        return resposta_condicional(
+            request, etag, lambda: resposta_em_cache(chave, lambda: self._montar_colaboradores(project_id))
+        )
+
+    def _montar_colaboradores(self, project_id):
+        user_projects = UserProject.objects.filter(project_id=project_id).select_related('user')
         users = [up.user for up in user_projects]
         serializer = UserSerializer(users, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -440,20 +255,51 @@ class ProjectShareWithMeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        projetos = Project.objects.filter(
-            userproject__user=request.user,
-            userproject__role=ProjectRole.MEMBER
-        ).distinct()
-        serializer = SharedProjectSerializer(projetos, many=True)
-        return Response(serializer.data)
+        vinculos = UserProject.objects.filter(user=request.user, role=ProjectRole.MEMBER).order_by('project_id')
+        try:
+            pagina = parametros_paginacao(request)
+            if pagina is not None:
+                # ?limite / ?cursor: versões só dos projetos desta página
+                projetos, proximo = paginar(
+                    Project.objects.filter(id__in=vinculos.values('project_id')).values('id', 'versao'),
+                    ('id',), *pagina,
+                )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if pagina is None:
+            etag = gerar_etag(request, *vinculos.values_list('project_id', 'project__versao'))
+            montar = lambda: self._montar_lista(request)
+        else:
+            etag = gerar_etag(request, *[(p['id'], p['versao']) for p in projetos])
+            montar = lambda: self._montar_lista(request, [p['id'] for p in projetos], proximo)
+        return resposta_condicional(request, etag, lambda: resposta_em_cache(f"compartilhados:{etag}", montar))
+
+    def _montar_lista(self, request, project_ids=None, proximo_cursor=None):
+        # Número fixo de consultas: projetos (com anotações), colaboradores e tarefas;
+        # com ?fields= / ?expand=, só as que os campos pedidos usam
+        fields, expand = campos_da_requisicao(request)
+        campos = SharedProjectSerializer.campos_selecionados(fields, expand)
+        projetos = projetos_compartilhados_queryset(request.user, campos)
+        if project_ids is not None:
+            projetos = projetos.filter(id__in=project_ids)
+        projetos = list(projetos)
+        context = {
+            'tarefas_por_projeto': agrupar_tarefas_por_projeto([p.id for p in projetos])
+            if campos is None or 'tasks' in campos else {},
+        }
+        dados = SharedProjectSerializer(projetos, many=True, context=context, fields=fields, expand=expand).data
+        if project_ids is not None:
+            dados = envelope(dados, proximo_cursor)
+        return Response(dados)
     
 # atribuição de tarefas
 class TaskAssignView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
 
     def put(self, request, task_id):
         try:
-            task = get_object_or_404(Task, id=task_id)
+            task = get_object_or_404(Task.objects.select_related('project_phase'), id=task_id)
             user_id = request.data.get('user_id')
             
             if not user_id:
@@ -462,19 +308,10 @@ class TaskAssignView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Verifica se o usuário tem permissão para atribuir tarefas neste projeto
-            project_phase = task.project_phase
-            project = project_phase.project
-            
-            if not UserProject.objects.filter(user=request.user, project=project).exists():
-                return Response(
-                    {"error": "Você não tem permissão para atribuir tarefas neste projeto"}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
-
-            # Verifica se o usuário a ser atribuído é membro do projeto
+            # quem atribui já passou por IsProjectMember; falta conferir quem recebe
+            project_id = task.project_phase.project_id
             user_to_assign = get_object_or_404(User, id=user_id)
-            if not UserProject.objects.filter(user=user_to_assign, project=project).exists():
+            if not membro_do_projeto(user_to_assign.id, project_id):
                 return Response(
                     {"error": "O usuário não é membro deste projeto"}, 
                     status=status.HTTP_400_BAD_REQUEST
@@ -489,6 +326,7 @@ class TaskAssignView(APIView):
             if not created:
                 task_assignee.user = user_to_assign
                 task_assignee.save()
+            incrementar_versao(project_id)
 
             # Serializa a resposta
             user_data = UserSerializer(user_to_assign).data
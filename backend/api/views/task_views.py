@@ -1,84 +1,146 @@
-from rest_framework import status, generics
+from rest_framework import serializers, status, generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Count, Min, Max
+from django.db.models import Count, Min, Max, Prefetch, prefetch_related_objects
 from datetime import timedelta
 
+from ..analytics.caminho_critico import CicloDependencias, adicionar_dependencia, remover_dependencia
 from ..models import Project, UserProject, ProjectPhase, Task, TaskAssignee, Phase, ProjectRole
+from ..permissions import IsProjectMember
 from ..serializers import TaskSerializer
+from ..utils.catalogo_fases import obter_id_fase
+from ..utils.contadores import alterar_status, excluir_tarefa, garantir_contadores, registrar_criacao
+from ..utils.hierarquia_tarefas import carregar_subarvore, mover_tarefa
+from ..utils.membros import membro_do_projeto
+from ..utils.cache_respostas import resposta_em_cache
+from ..utils.paginacao import envelope, paginar_intercalado, parametros_paginacao, validar_cursor
+from ..utils.versionamento import gerar_etag, incrementar_versao, resposta_condicional
+from ..utils.reagendamento import alterar_prazo, reagendar_fase, reagendar_subtarefas
 
 User = get_user_model()
 
+# keyset da lista paginada de tarefas do projeto (índice task_phase_due_idx dentro de cada fase)
+CAMPOS_PAGINA = ('due_date', 'id')
+
 class ProjectTasksView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
 
     def get(self, request, project_id):
-        if not UserProject.objects.filter(user=request.user, project_id=project_id).exists():
-            return Response({"detail": "Você não tem acesso a este projeto."}, status=status.HTTP_403_FORBIDDEN)
+        # Acesso vem do mapa de papéis da requisição; depois dele, a versão é a única consulta antes do 304
+        versao = Project.objects.filter(id=project_id).values_list('versao', flat=True).first()
+        if versao is None:
+            return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
         try:
-            project = Project.objects.select_related().get(id=project_id)
-        except Project.DoesNotExist:
-            return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+            pagina = parametros_paginacao(request)
+            if pagina is not None:
+                # cursor inválido vira 400 aqui, sem ETag: o montador só produz páginas válidas
+                validar_cursor(Task, CAMPOS_PAGINA, pagina[1])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = gerar_etag(request, project_id, versao)
+        if pagina is not None:
+            # ?limite / ?cursor: lista plana das tarefas do projeto por (prazo, id)
+            chave = f"tarefas:{project_id}:v{versao}:{request.META.get('QUERY_STRING', '')}"
+            montar = lambda: self._montar_pagina(project_id, *pagina)
+        else:
+            # o quadro é o mesmo para todos os membros: um payload por (projeto, versão)
+            chave = f"quadro:{project_id}:v{versao}"
+            montar = lambda: self._montar_quadro(project_id)
+        return resposta_condicional(request, etag, lambda: resposta_em_cache(chave, montar))
+
+    @staticmethod
+    def _tarefa_quadro(task):
+        # lê os responsáveis do prefetch de taskassignee_set
+        responsaveis = [a.user.full_name for a in task.taskassignee_set.all()]
+        return {
+            "id": task.id,
+            "title": task.title,
+            "is_completed": task.is_completed,
+            "prioridade": task.priority,
+            "responsavel": ", ".join(responsaveis) if responsaveis else None,
+            "prazo": task.due_date.strftime("%d/%m/%Y") if task.due_date else None,
+            "status": "concluído" if task.is_completed else "pendente"
+        }
 
-        leader = UserProject.objects.filter(project=project, role=ProjectRole.LEADER).first()
-        creator_name = leader.user.full_name if leader else None
+    def _montar_pagina(self, project_id, limite, cursor):
+        # uma consulta por fase, cada uma lendo só limite + 1 linhas do índice (project_phase, due_date, id)
+        # já na ordem; as fases são intercaladas em memória
+        fases = {pp.id: pp for pp in ProjectPhase.objects.filter(project_id=project_id).select_related('phase')}
+        itens, proximo = paginar_intercalado(
+            [Task.objects.filter(project_phase_id=pp_id) for pp_id in fases], CAMPOS_PAGINA, limite, cursor
+        )
+        for task in itens:
+            task.project_phase = fases[task.project_phase_id]
+        prefetch_related_objects(itens, Prefetch('taskassignee_set', queryset=TaskAssignee.objects.select_related('user')))
 
-        collaborators_qs = UserProject.objects.filter(project=project).select_related('user')
+        resultados = [
+            {**self._tarefa_quadro(task), "fase_id": task.project_phase.phase_id, "fase": task.project_phase.phase.name}
+            for task in itens
+        ]
+        return Response(envelope(resultados, proximo), status=status.HTTP_200_OK)
 
-        collaborators = [
-            {
+    def _montar_quadro(self, project_id):
+        try:
+            project = Project.objects.get(id=project_id)
+        except Project.DoesNotExist:
+            return Response({"detail": "Projeto não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        # o progresso das fases vem dos contadores
+        garantir_contadores([project])
+
+        # Uma consulta para os colaboradores; o líder sai da mesma lista
+        collaborators_qs = UserProject.objects.filter(project=project).select_related('user').order_by('id')
+
+        collaborators = []
+        creator_name = None
+        for up in collaborators_qs:
+            if creator_name is None and up.role == ProjectRole.LEADER:
+                creator_name = up.user.full_name
+            collaborators.append({
                 'id': up.user.id,
                 'full_name': up.user.full_name, 
                 'email': up.user.email
-            } 
-            for up in collaborators_qs
-        ]
+            })
 
-        tarefasProjeto = []
-        project_phases = ProjectPhase.objects.filter(project=project).prefetch_related(
-            'task_set',
-            'task_set__taskassignee_set',
-            'task_set__taskassignee_set__user'
+        # Fases (com a Phase no mesmo SELECT), tarefas e responsáveis: três consultas no total.
+        # Tudo abaixo percorre só o cache do prefetch, então o nº de consultas não cresce com o projeto.
+        project_phases = (
+            ProjectPhase.objects
+            .filter(project=project)
+            .select_related('phase')
+            .prefetch_related(
+                Prefetch(
+                    'task_set',
+                    queryset=Task.objects.order_by('-priority', 'due_date').prefetch_related(
+                        Prefetch('taskassignee_set', queryset=TaskAssignee.objects.select_related('user'))
+                    )
+                )
+            )
         )
-        
+
+        tarefasProjeto = []
         for pp in project_phases:
             phase = pp.phase
             tasks = pp.task_set.all()
 
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(is_completed=True).count()
-            progresso = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
-
-            subTarefas = []
-            for task in tasks:
-                assignees = task.taskassignee_set.select_related('user')
-                responsaveis = [a.user.full_name for a in assignees]
-
-                subTarefas.append({
-                    "id": task.id,
-                    "title": task.title,
-                    "is_completed": task.is_completed,
-                    "responsavel": ", ".join(responsaveis) if responsaveis else None,
-                    "prazo": task.due_date.strftime("%d/%m/%Y") if task.due_date else None,
-                    "status": "concluído" if task.is_completed else "pendente"
-                })
+            subTarefas = [self._tarefa_quadro(task) for task in tasks]
 
             tarefasProjeto.append({
                 "id": phase.id,
                 "nomeTarefa": phase.name,
-                "progresso": progresso,
+                "progresso": pp.progresso,  # lido dos contadores da fase
                 "subTarefas": subTarefas
             })
 
         projeto_data = {
             "name": project.name,
             "creator_name": creator_name,
-            "collaborator_count": collaborators_qs.count(),
+            "collaborator_count": len(collaborators),
             "collaborators": collaborators,
             "tarefasProjeto": tarefasProjeto
         }
@@ -86,9 +148,6 @@ class ProjectTasksView(APIView):
         return Response(projeto_data, status=status.HTTP_200_OK)
 
     def post(self, request, project_id):
-        if not UserProject.objects.filter(user=request.user, project_id=project_id).exists():
-            return Response({"detail": "Você não tem acesso a este projeto."}, status=status.HTTP_403_FORBIDDEN)
-
         data = request.data.copy()
         project = get_object_or_404(Project, id=project_id)
         
@@ -107,12 +166,14 @@ class ProjectTasksView(APIView):
             due_date=task_due_date,
             project_phase=phase
         )
+        registrar_criacao(task, project_id)
 
         assignee_ids = data.get("assignee_ids", [])
         for uid in assignee_ids:
             try:
                 user = User.objects.get(id=uid)
                 TaskAssignee.objects.create(task=task, user=user)
+                incrementar_versao(project_id)
             except User.DoesNotExist:
                 continue
 
@@ -144,9 +205,6 @@ class ProjectTasksView(APIView):
         return due_date
 
     def patch(self, request, project_id, task_id):
-        if not UserProject.objects.filter(user=request.user, project_id=project_id).exists():
-            return Response({"detail": "Você não tem acesso a este projeto."}, status=status.HTTP_403_FORBIDDEN)
-
         try:
             task = Task.objects.get(id=task_id, project_phase__project_id=project_id)
         except Task.DoesNotExist:
@@ -156,34 +214,29 @@ class ProjectTasksView(APIView):
         if is_completed is None or not isinstance(is_completed, bool):
             return Response({"error": "O campo 'is_completed' deve ser booleano."}, status=status.HTTP_400_BAD_REQUEST)
 
-        task.is_completed = is_completed
-        task.save()
+        alterar_status(task, is_completed, project_id)
         return Response({"detail": "Status atualizado com sucesso."})
 
     def delete(self, request, project_id, task_id):
-        if not UserProject.objects.filter(user=request.user, project_id=project_id).exists():
-            return Response({"detail": "Você não tem acesso a este projeto."}, status=status.HTTP_403_FORBIDDEN)
-
         try:
             task = Task.objects.get(id=task_id, project_phase__project_id=project_id)
         except Task.DoesNotExist:
             return Response({"detail": "Tarefa não encontrada."}, status=status.HTTP_404_NOT_FOUND)
 
-        task.delete()
+        excluir_tarefa(task, project_id)
         return Response({"detail": "Tarefa excluída com sucesso."}, status=status.HTTP_204_NO_CONTENT)
 
 class CreateTaskView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
 
     def post(self, request, project_id):
-        if not UserProject.objects.filter(user=request.user, project_id=project_id).exists():
-            return Response({"detail": "Você não tem acesso a este projeto."}, status=status.HTTP_403_FORBIDDEN)
-
         data = request.data.copy()
         project = get_object_or_404(Project, id=project_id)
 
-        phase_obj, _ = Phase.objects.get_or_create(name=data.get("nome"))
-        project_phase = ProjectPhase.objects.create(project_id=project_id, phase=phase_obj)
+        if not data.get("nome"):
+            return Response({"error": "Nome da tarefa é obrigatório"}, status=status.HTTP_400_BAD_REQUEST)
+
+        project_phase = ProjectPhase.objects.create(project_id=project_id, phase_id=obter_id_fase(data.get("nome")))
 
         # Calcula a data distribuída para a tarefa
         task_due_date = self.calculate_distributed_task_due_date(project, project_phase)
@@ -195,12 +248,14 @@ class CreateTaskView(APIView):
             is_completed=False,
             due_date=task_due_date
         )
+        registrar_criacao(task, project_id)
 
         responsavel_id = data.get("responsavel")
         if responsavel_id:
             try:
                 user = User.objects.get(id=responsavel_id)
                 TaskAssignee.objects.create(task=task, user=user)
+                incrementar_versao(project_id)
             except User.DoesNotExist:
                 pass
 
@@ -231,38 +286,160 @@ class CreateTaskView(APIView):
         return due_date
 
 class TaskUpdateStatusView(generics.UpdateAPIView):
-    permission_classes = [IsAuthenticated]
-    queryset = Task.objects.all()
+    permission_classes = [IsAuthenticated, IsProjectMember]
+    queryset = Task.objects.select_related('project_phase')
     serializer_class = TaskSerializer
 
     def patch(self, request, *args, **kwargs):
         task = self.get_object()
         is_completed = request.data.get('is_completed')
+        prazo = request.data.get('prazo')
 
-        if is_completed is None:
+        if is_completed is None and prazo is None:
             return Response({"error": "O campo 'is_completed' é obrigatório."}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not isinstance(is_completed, bool):
+        if is_completed is not None and not isinstance(is_completed, bool):
             return Response({"error": "O campo 'is_completed' deve ser booleano."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if prazo is not None:
+            try:
+                novo_prazo = serializers.DateTimeField().to_internal_value(prazo)
+            except serializers.ValidationError:
+                return Response({"error": "O campo 'prazo' deve ser uma data válida."}, status=status.HTTP_400_BAD_REQUEST)
+            alterar_prazo(task, novo_prazo)
         
-        task.is_completed = is_completed
-        task.save()
+        if is_completed is not None:
+            alterar_status(task, is_completed, task.project_phase.project_id)
         
         return Response({"detail": "Status atualizado com sucesso."})
+
+    def perform_update(self, serializer):
+        prazo_anterior = serializer.instance.due_date
+        task = serializer.save()
+        if task.due_date != prazo_anterior:
+            reagendar_subtarefas(task)
+        incrementar_versao(task.project_phase.project_id)
+
+
+class TaskSubtreeView(APIView):
+    """
+    GET: a tarefa com todas as subtarefas (aninhadas), profundidade e totais acumulados.
+    PATCH {"parent_id": id | null}: move a tarefa (com a subárvore) para outro pai da mesma fase.
+    """
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def _buscar_tarefa(self, task_id):
+        return get_object_or_404(Task.objects.select_related('project_phase'), id=task_id)
+
+    def get(self, request, task_id):
+        task = self._buscar_tarefa(task_id)
+        return Response(carregar_subarvore(task))
+
+    def patch(self, request, task_id):
+        task = self._buscar_tarefa(task_id)
+
+        if 'parent_id' not in request.data:
+            return Response({"error": "O campo 'parent_id' é obrigatório."}, status=status.HTTP_400_BAD_REQUEST)
+
+        novo_pai = None
+        parent_id = request.data.get('parent_id')
+        if parent_id is not None:
+            try:
+                novo_pai = Task.objects.get(id=parent_id, project_phase__project_id=task.project_phase.project_id)
+            except (Task.DoesNotExist, ValueError, TypeError):
+                return Response({"detail": "Tarefa pai não encontrada neste projeto."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            mover_tarefa(task, novo_pai)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"detail": "Tarefa movida com sucesso.", "path": task.path})
   
 
+class TaskDependenciesView(APIView):
+    """
+    GET: predecessoras/sucessoras da tarefa e os valores do caminho crítico.
+    POST {"depends_on": id}: a tarefa passa a depender de outra do mesmo projeto.
+    DELETE {"depends_on": id}: remove a dependência.
+    """
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def _buscar_tarefa(self, task_id):
+        return get_object_or_404(Task.objects.select_related('project_phase'), id=task_id)
+
+    def get(self, request, task_id):
+        task = self._buscar_tarefa(task_id)
+
+        return Response({
+            "id": task.id,
+            "depende_de": list(task.dependencias.values_list('depends_on_id', flat=True)),
+            "dependentes": list(task.dependentes.values_list('task_id', flat=True)),
+            "inicio_mais_cedo": task.inicio_mais_cedo,
+            "inicio_mais_tarde": task.inicio_mais_tarde,
+            "folga_dias": task.folga_dias,
+            "critica": task.folga_dias is not None and task.folga_dias <= 0,
+        })
+
+    def post(self, request, task_id):
+        task = self._buscar_tarefa(task_id)
+
+        project_id = task.project_phase.project_id
+        try:
+            depends_on = Task.objects.get(id=request.data.get('depends_on'), project_phase__project_id=project_id)
+        except (Task.DoesNotExist, ValueError, TypeError):
+            return Response({"detail": "Tarefa predecessora não encontrada neste projeto."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            adicionar_dependencia(task, depends_on, project_id)
+        except CicloDependencias as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"detail": "Dependência criada com sucesso."}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, task_id):
+        task = self._buscar_tarefa(task_id)
+
+        depends_on_id = request.data.get('depends_on')
+        if not isinstance(depends_on_id, int):
+            return Response({"error": "O campo 'depends_on' deve ser o id de uma tarefa."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not remover_dependencia(task, depends_on_id, task.project_phase.project_id):
+            return Response({"detail": "Dependência não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Dependência removida com sucesso."})
+
+
+class ReagendarTarefasView(APIView):
+    """
+    Recalcula os prazos das subtarefas de uma tarefa (tasks/<id>/reagendar/) ou de todas
+    as tarefas de uma fase (projetos/<id>/fases/<project_phase_id>/reagendar/)
+    """
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def post(self, request, task_id=None, project_id=None, phase_id=None):
+        if task_id is not None:
+            task = get_object_or_404(Task.objects.select_related('project_phase'), id=task_id)
+        else:
+            project_phase = get_object_or_404(ProjectPhase, id=phase_id, project_id=project_id)
+
+        alteradas = reagendar_subtarefas(task) if task_id is not None else reagendar_fase(project_phase)
+
+        return Response({
+            "detail": f"{len(alteradas)} tarefas reagendadas.",
+            "tarefas": [
+                {"id": t.id, "data_inicio": t.start_date, "prazo": t.due_date}
+                for t in alteradas
+            ],
+        })
+
+
 class CreateSubtaskView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, IsProjectMember]
 
     def post(self, request, project_id, task_id):
         try:
-            # Verifica se o projeto existe e o usuário tem acesso
+            # acesso ao projeto já conferido por IsProjectMember
             project = get_object_or_404(Project, id=project_id)
-            if not UserProject.objects.filter(user=request.user, project=project).exists():
-                return Response(
-                    {"error": "Você não tem permissão para acessar este projeto"}, 
-                    status=status.HTTP_403_FORBIDDEN
-                )
 
             # Verifica se a tarefa pai existe e pertence ao projeto
             parent_task = get_object_or_404(Task, id=task_id)
@@ -275,14 +452,11 @@ class CreateSubtaskView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Calcula a data distribuída para a subtarefa
-            subtask_due_date = self.calculate_distributed_subtask_due_date(parent_task, project)
-
             # Cria a subtarefa
             subtask_data = {
                 'title': request.data.get('nome'),
                 'description': request.data.get('descricao', ''),
-                'due_date': subtask_due_date,
+                'due_date': parent_task.due_date,  # provisório: o reagendamento abaixo define a janela
                 'project_phase': parent_task.project_phase,
                 'parent_task': parent_task,
                 'complexidade': 2.0
@@ -297,6 +471,11 @@ class CreateSubtaskView(APIView):
 
             # Cria a subtarefa
             subtask = Task.objects.create(**subtask_data)
+            registrar_criacao(subtask, project.id)
+
+            # Redistribui todas as irmãs (não só a nova) dentro do prazo da tarefa pai
+            reagendar_subtarefas(parent_task)
+            subtask.refresh_from_db(fields=['start_date', 'due_date'])
 
             # Se foi especificado um responsável, atribui a subtarefa
             responsavel_email = request.data.get('user')
@@ -305,8 +484,9 @@ class CreateSubtaskView(APIView):
                 try:
                     user_responsavel = User.objects.get(email=responsavel_email)
                     # Verifica se o usuário é membro do projeto
-                    if UserProject.objects.filter(user=user_responsavel, project=project).exists():
+                    if membro_do_projeto(user_responsavel.id, project.id):
                         TaskAssignee.objects.create(task=subtask, user=user_responsavel)
+                        incrementar_versao(project.id)
                 except User.DoesNotExist:
                     # Se o usuário não existe, continua sem atribuir
                     pass
@@ -328,40 +508,3 @@ class CreateSubtaskView(APIView):
                 {"error": f"Erro ao criar subtarefa: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-
-    def calculate_distributed_subtask_due_date(self, parent_task, project):
-        # Define datas base
-        start_date = max(project.start_date, timezone.now().date())
-        end_date = parent_task.due_date or project.end_date
-
-        if not end_date or end_date <= start_date:
-            # Caso o prazo seja inválido, usa uma semana padrão
-            return timezone.now().date() + timedelta(days=7)
-
-        # Garante que não use o dia final da tarefa pai
-        end_date_adjusted = end_date - timedelta(days=1)
-
-        # Calcula a duração total disponível em dias
-        total_days = (end_date_adjusted - start_date).days
-        if total_days <= 0:
-            return end_date_adjusted
-
-        # Conta subtarefas existentes e define a posição da nova
-        existing_subtasks_count = Task.objects.filter(parent_task=parent_task).count()
-        total_subtasks = existing_subtasks_count + 1
-
-        # Calcula o intervalo de tempo entre subtarefas
-        interval = total_days / total_subtasks
-
-        # A nova subtarefa ocupará a última "fatia"
-        # Exemplo: se total_subtasks = 3 → posições 1, 2, 3 → nova = 3
-        subtask_index = total_subtasks
-
-        # Prazo da nova subtarefa = início + (posição * intervalo)
-        due_date = start_date + timedelta(days=subtask_index * interval)
-
-        # Garante que não ultrapasse o prazo final da tarefa pai
-        if due_date >= end_date:
-            due_date = end_date_adjusted
-
-        return due_date
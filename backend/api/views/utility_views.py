@@ -4,7 +4,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 
+from ..models import UserProject
+from ..permissions import IsAdmin
 from ..serializers import UserSerializer
+from ..utils.cache_respostas import cache_respostas
+from ..utils.versionamento import incrementar_versao
 
 User = get_user_model()
 
@@ -32,6 +36,8 @@ class UserConfigurationView(APIView):
         serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            # nome/e-mail aparecem nos quadros e listas dos projetos do usuário
+            incrementar_versao(*UserProject.objects.filter(user=user).values_list('project_id', flat=True))
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -45,4 +51,11 @@ class PoliticsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        return Response({"message": "Política de privacidade"})
\ No newline at end of file
+        return Response({"message": "Política de privacidade"})
+
+class CacheEstatisticasView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        # hits/misses do cache de respostas deste processo
+        return Response(cache_respostas().estatisticas())
@@ -80,6 +80,31 @@ else:
         }
     }
 
+# ------------------------
+# Cache
+# ------------------------
+# "respostas": payloads serializados chaveados pela versão do projeto (api/utils/cache_respostas.py)
+# O cache padrão é o LocMem, da memória de cada processo. Com REDIS_URL definido passa a
+# ser o Redis, compartilhado por todos os workers; só assim o mapa de papéis dos usuários
+# (api/utils/membros.py) é guardado entre requisições, já que a invalidação precisa
+# alcançar todos os processos. O "respostas" pode ser por processo porque a versão está na chave.
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
+        if os.getenv("REDIS_URL") else
+        {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+    "respostas": {
+        "BACKEND": "api.utils.cache_respostas.CacheLRULimitado",
+        "LOCATION": "respostas",
+        "TIMEOUT": int(os.getenv("CACHE_RESPOSTAS_TIMEOUT", 3600)),
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "MAX_BYTES": int(os.getenv("CACHE_RESPOSTAS_MAX_BYTES", 32 * 1024 * 1024)),
+        },
+    },
+}
+
 # ------------------------
 # Autenticação
 # ------------------------